@@ -13,3 +13,87 @@ SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT = os.getenv("SMTP_PORT")
 SMTP_USERNAME = os.getenv("SMTP_USERNAME")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+NOTIFICATION_EMAIL = os.getenv("NOTIFICATION_EMAIL") or "nassytheresa@gmail.com"
+
+# Notification dispatcher: "immediate", "digest" or "debounce" for success
+# notifications (failures are always sent immediately)
+NOTIFY_MODE = os.getenv("NOTIFY_MODE", "digest")
+NOTIFY_DIGEST_SECONDS = float(os.getenv("NOTIFY_DIGEST_SECONDS", "3600"))
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "100"))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+
+# MongoDB client pool settings (shared by every module in a process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+    os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+)
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primaryPreferred")
+
+# Number of documents fetched per cursor batch during ETL extraction
+EXTRACT_BATCH_SIZE = int(os.getenv("EXTRACT_BATCH_SIZE", "5000"))
+
+# Change-detection fetches: the first FETCH_HOT_PAGES pages are fetched on
+# every cycle, stable pages after them at most every FETCH_MAX_PAGE_INTERVAL
+FETCH_HOT_PAGES = int(os.getenv("FETCH_HOT_PAGES", "2"))
+FETCH_MAX_PAGE_INTERVAL = int(os.getenv("FETCH_MAX_PAGE_INTERVAL", "8"))
+
+# Anomaly scoring: threads used for large frames (-1 = all cores) and rows per chunk
+DATA_CLEANER_N_JOBS = int(os.getenv("DATA_CLEANER_N_JOBS", "-1"))
+DATA_CLEANER_CHUNK_SIZE = int(os.getenv("DATA_CLEANER_CHUNK_SIZE", "50000"))
+
+# Dashboard refresh: browser tick (ms) and server-side result polling (s)
+DASHBOARD_REFRESH_MS = int(os.getenv("DASHBOARD_REFRESH_MS", "15000"))
+DASHBOARD_POLL_SECONDS = float(os.getenv("DASHBOARD_POLL_SECONDS", "5"))
+
+# Scheduler job-run history retention
+JOB_HISTORY_TTL_DAYS = int(os.getenv("JOB_HISTORY_TTL_DAYS", "14"))
+
+# Analysis results retention: full-resolution runs expire after
+# RESULTS_RETENTION_HOURS, hourly rollups after HOURLY_ROLLUP_RETENTION_DAYS;
+# daily rollups are kept
+RESULTS_RETENTION_HOURS = int(os.getenv("RESULTS_RETENTION_HOURS", "48"))
+HOURLY_ROLLUP_RETENTION_DAYS = int(os.getenv("HOURLY_ROLLUP_RETENTION_DAYS", "90"))
+
+# OHLCV bars: 1m bars expire after BARS_1M_TTL_DAYS, 1h bars after
+# BARS_1H_TTL_DAYS; 1d bars are kept. Raw snapshots expire after
+# MARKET_DATA_TTL_DAYS (0 keeps them forever); keep it above the ETL window.
+BARS_1M_TTL_DAYS = int(os.getenv("BARS_1M_TTL_DAYS", "7"))
+BARS_1H_TTL_DAYS = int(os.getenv("BARS_1H_TTL_DAYS", "365"))
+MARKET_DATA_TTL_DAYS = int(os.getenv("MARKET_DATA_TTL_DAYS", "0"))
+
+# Worker processes publish their metrics to MongoDB this often; the
+# dashboard's /metrics serves them alongside its own
+METRICS_PUBLISH_SECONDS = float(os.getenv("METRICS_PUBLISH_SECONDS", "15"))
+
+# Analysis engine: "pandas" extracts the window and analyzes it in the ETL
+# process, "mongo" runs the statistics as an aggregation inside MongoDB
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "pandas")
+
+# What the scheduled ETL analyzes over its SCHEDULED_ETL_DAYS window:
+# "current" (newest snapshot of every coin), "incremental" (new rows merged
+# into persisted state) or "window" (every snapshot, via the snapshot cache)
+SCHEDULED_ETL_MODE = os.getenv("SCHEDULED_ETL_MODE", "current")
+SCHEDULED_ETL_DAYS = int(os.getenv("SCHEDULED_ETL_DAYS", "1"))
+
+# Bar resolution of the rolling volatility/momentum/drawdown analysis;
+# empty disables it
+VOLATILITY_RESOLUTION = os.getenv("VOLATILITY_RESOLUTION", "1h")
+
+# Exponentially weighted return correlations: co-moments of the
+# CORRELATION_TOP_N largest coins (0 disables) are updated from closed bars
+# and persisted; the CORRELATION_PUBLISH_N largest are published
+CORRELATION_TOP_N = int(os.getenv("CORRELATION_TOP_N", "100"))
+CORRELATION_PUBLISH_N = int(os.getenv("CORRELATION_PUBLISH_N", "20"))
+CORRELATION_RESOLUTION = os.getenv("CORRELATION_RESOLUTION", "1h")
+CORRELATION_HALFLIFE_DAYS = float(os.getenv("CORRELATION_HALFLIFE_DAYS", "7"))
+
+# On-disk cache of extracted closed days; an empty SNAPSHOT_CACHE_DIR disables it
+SNAPSHOT_CACHE_DIR = os.getenv("SNAPSHOT_CACHE_DIR", ".cache/snapshots")
+SNAPSHOT_CACHE_CLOSE_MINUTES = int(os.getenv("SNAPSHOT_CACHE_CLOSE_MINUTES", "15"))
+SNAPSHOT_CACHE_RETENTION_DAYS = int(os.getenv("SNAPSHOT_CACHE_RETENTION_DAYS", "35"))
@@ -0,0 +1,90 @@
+from typing import Dict, Iterable
+import numpy as np
+import pandas as pd
+
+# Declared dtype of every CoinGecko market field the pipeline reads.
+# Identifiers repeat for every snapshot, so they are categoricals. Prices and
+# market caps are summed and reported, so they keep float64; supplies and
+# percentages only feed ratios, averages and the model, so float32 is enough.
+# Integer fields use pandas' nullable integers because CoinGecko sends nulls.
+MARKET_SCHEMA: Dict[str, object] = {
+    "id": "category",
+    "symbol": "category",
+    "name": "category",
+    "current_price": np.float64,
+    "market_cap": np.float64,
+    "market_cap_rank": "Int32",
+    "total_volume": np.float64,
+    "circulating_supply": np.float32,
+    "total_supply": np.float32,
+    "max_supply": np.float32,
+    "price_change_percentage_24h": np.float32,
+    "last_updated": "datetime64[ns, UTC]",
+    "fetched_at": "datetime64[ns, UTC]",
+}
+
+# Columns the anomaly model scores
+FEATURE_COLUMNS = [
+    "current_price",
+    "market_cap",
+    "circulating_supply",
+    "total_supply",
+    "price_change_percentage_24h",
+]
+
+
+def market_schema(columns: Iterable[str]) -> Dict[str, object]:
+    """
+    Get the declared dtypes of a subset of the market columns.
+
+    Args:
+        columns: Column names, in the order the frame should have them
+
+    Returns:
+        Dict of column -> dtype
+    """
+    return {column: MARKET_SCHEMA[column] for column in columns}
+
+
+def is_category(dtype) -> bool:
+    return isinstance(dtype, str) and dtype == "category"
+
+
+def is_datetime(dtype) -> bool:
+    return str(dtype).startswith("datetime64")
+
+
+def is_nullable_int(dtype) -> bool:
+    return isinstance(dtype, str) and dtype.startswith("Int")
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce the known market columns of a frame to their declared dtypes.
+
+    Columns that already have their dtype are left alone, so a frame built
+    with the schema is returned as is, without a copy.
+
+    Args:
+        df: Frame with some MARKET_SCHEMA columns
+
+    Returns:
+        The same frame, or a new one with coerced columns
+    """
+    converted = {}
+    for column in df.columns.intersection(list(MARKET_SCHEMA)):
+        dtype = MARKET_SCHEMA[column]
+        values = df[column]
+        if is_category(dtype):
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                converted[column] = values.astype("category")
+        elif is_datetime(dtype):
+            if str(values.dtype) != dtype:
+                converted[column] = pd.to_datetime(values, utc=True)
+        elif values.dtype != dtype:
+            if values.dtype == object:
+                values = pd.to_numeric(values, errors="coerce")
+            converted[column] = values.astype(dtype)
+    if not converted:
+        return df
+    return df.assign(**converted)
@@ -0,0 +1,216 @@
+# app/data/bars.py
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.database import Database
+from app.storage.mongo import ensure_ttl_index, get_db
+from app.utils.metrics import MONGO_OPERATION_SECONDS
+from app.core.config import (
+    COLLECTION_NAME,
+    BARS_1M_TTL_DAYS,
+    BARS_1H_TTL_DAYS,
+)
+
+# Resolution -> (collection, bar length in seconds, TTL in days or 0 to keep)
+BAR_RESOLUTIONS = {
+    "1m": ("market_bars_1m", 60, BARS_1M_TTL_DAYS),
+    "1h": ("market_bars_1h", 3600, BARS_1H_TTL_DAYS),
+    "1d": ("market_bars_1d", 86400, 0),
+}
+
+_indexes_ready = False
+
+
+def ensure_bar_indexes(db: Optional[Database] = None) -> None:
+    """
+    Create the unique (id, bucket) index of every bar collection and the TTL
+    index of the resolutions that expire.
+
+    Args:
+        db: Database to index. Defaults to get_db().
+    """
+    global _indexes_ready
+    db = db if db is not None else get_db()
+    for collection_name, _, ttl_days in BAR_RESOLUTIONS.values():
+        collection = db[collection_name]
+        collection.create_index(
+            [("id", ASCENDING), ("bucket", ASCENDING)], unique=True, name="bar_key"
+        )
+        if ttl_days:
+            ensure_ttl_index(collection, "bucket", ttl_days * 24 * 3600, "bucket_ttl")
+        else:
+            collection.create_index([("bucket", ASCENDING)], name="bucket")
+    _indexes_ready = True
+
+
+def _bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+def aggregate_bars(rows: Iterable[Dict], seconds: int) -> Dict[tuple, Dict]:
+    """
+    Collapse snapshots into partial OHLCV bars keyed by (coin id, bucket).
+
+    Volume is CoinGecko's rolling 24h total_volume at the bar's close.
+
+    Args:
+        rows: Snapshots with a datetime last_updated
+        seconds: Bar length in seconds
+
+    Returns:
+        Dict mapping (id, bucket) to the partial bar
+    """
+    bars: Dict[tuple, Dict] = {}
+    for row in rows:
+        price = row.get("current_price")
+        at = row.get("last_updated")
+        if price is None or not isinstance(at, datetime):
+            continue
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        key = (row["id"], _bucket_start(at, seconds))
+        bar = bars.get(key)
+        if bar is None:
+            bars[key] = {
+                "open": price,
+                "open_at": at,
+                "high": price,
+                "low": price,
+                "close": price,
+                "close_at": at,
+                "volume": row.get("total_volume"),
+            }
+            continue
+        if at < bar["open_at"]:
+            bar["open"], bar["open_at"] = price, at
+        if at >= bar["close_at"]:
+            bar["close"], bar["close_at"] = price, at
+            bar["volume"] = row.get("total_volume")
+        bar["high"] = max(bar["high"], price)
+        bar["low"] = min(bar["low"], price)
+    return bars
+
+
+def _merge_pipeline(coin_id: str, bucket: datetime, bar: Dict) -> List[Dict]:
+    """
+    Update pipeline merging a partial bar into the stored one.
+
+    Open and close are taken from whichever side has the earlier/later
+    timestamp, so merging is order-independent and idempotent.
+    """
+    opens_earlier = {
+        "$or": [{"$not": ["$open_at"]}, {"$lt": [bar["open_at"], "$open_at"]}]
+    }
+    closes_later = {
+        "$or": [{"$not": ["$close_at"]}, {"$gte": [bar["close_at"], "$close_at"]}]
+    }
+    return [
+        {
+            "$set": {
+                "id": coin_id,
+                "bucket": bucket,
+                "open": {"$cond": [opens_earlier, bar["open"], "$open"]},
+                "open_at": {"$min": ["$open_at", bar["open_at"]]},
+                "high": {"$max": ["$high", bar["high"]]},
+                "low": {"$min": ["$low", bar["low"]]},
+                "close": {"$cond": [closes_later, bar["close"], "$close"]},
+                "volume": {"$cond": [closes_later, bar["volume"], "$volume"]},
+                "close_at": {"$max": ["$close_at", bar["close_at"]]},
+            }
+        }
+    ]
+
+
+def update_bars(rows: List[Dict], db: Optional[Database] = None) -> int:
+    """
+    Fold newly stored snapshots into the 1m, 1h and 1d bar collections.
+
+    Args:
+        rows: Snapshots prepared by prepare_snapshot
+        db: Database to write to. Defaults to get_db().
+
+    Returns:
+        Number of bars inserted or modified
+    """
+    if not rows:
+        return 0
+    db = db if db is not None else get_db()
+    if not _indexes_ready:
+        ensure_bar_indexes(db)
+
+    changed = 0
+    for collection_name, seconds, _ in BAR_RESOLUTIONS.values():
+        operations = [
+            UpdateOne(
+                {"id": coin_id, "bucket": bucket},
+                _merge_pipeline(coin_id, bucket, bar),
+                upsert=True,
+            )
+            for (coin_id, bucket), bar in aggregate_bars(rows, seconds).items()
+        ]
+        if operations:
+            with MONGO_OPERATION_SECONDS.time(operation="update_bars"):
+                result = db[collection_name].bulk_write(operations, ordered=False)
+            changed += result.upserted_count + result.modified_count
+    return changed
+
+
+def backfill_bars(batch_size: int = 5000) -> int:
+    """
+    Build bars from every raw snapshot already stored. Merging is idempotent,
+    so the backfill can be re-run safely.
+
+    Args:
+        batch_size: Number of snapshots folded per write
+
+    Returns:
+        Number of snapshots processed
+    """
+    collection = get_db()[COLLECTION_NAME]
+    cursor = collection.find(
+        {},
+        {"_id": 0, "id": 1, "current_price": 1, "total_volume": 1, "last_updated": 1},
+    ).batch_size(batch_size)
+
+    processed = 0
+    batch: List[Dict] = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            update_bars(batch)
+            processed += len(batch)
+            batch = []
+    if batch:
+        update_bars(batch)
+        processed += len(batch)
+    print(f"Built bars from {processed} snapshots")
+    return processed
+
+
+def get_bars(
+    coin_id: str,
+    resolution: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Read one coin's bars in a time range (served by the (id, bucket) index).
+
+    Args:
+        coin_id: CoinGecko coin id
+        resolution: "1m", "1h" or "1d"
+        start: First bucket to include
+        end: Last bucket to include. Defaults to no upper bound.
+
+    Returns:
+        List of bars ordered by bucket
+    """
+    query = {"id": coin_id, "bucket": {"$gte": start}}
+    if end is not None:
+        query["bucket"]["$lte"] = end
+    collection_name = BAR_RESOLUTIONS[resolution][0]
+    return list(
+        get_db()[collection_name].find(query, {"_id": 0}).sort("bucket", ASCENDING)
+    )
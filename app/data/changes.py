@@ -0,0 +1,170 @@
+# app/data/changes.py
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from app.storage.mongo import get_db
+from app.core.config import FETCH_HOT_PAGES, FETCH_MAX_PAGE_INTERVAL
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.data.store import parse_timestamp
+from app.etl.incremental import STATE_COLLECTION
+
+# etl_state document holding the page schedule between fetch runs
+SCHEDULE_ID = "fetch_schedule"
+
+# Fields whose change makes a fetched row worth storing
+FINGERPRINT_FIELDS = ("last_updated", "current_price", "market_cap", "total_volume")
+
+
+def fingerprint(row: Dict) -> bytes:
+    """
+    Hash the fields of a market row that identify a new snapshot.
+
+    last_updated is normalized to a UTC timestamp, so a raw CoinGecko row and
+    the stored copy of the same snapshot hash the same.
+
+    Args:
+        row: Raw CoinGecko row or stored snapshot
+
+    Returns:
+        8-byte digest
+    """
+    last_updated = parse_timestamp(row.get("last_updated"))
+    values = (
+        last_updated.timestamp() if last_updated else None,
+        *(row.get(field) for field in FINGERPRINT_FIELDS[1:]),
+    )
+    return hashlib.blake2b(repr(values).encode(), digest_size=8).digest()
+
+
+class ChangeTracker:
+    """
+    Remembers the fingerprint of every coin's last stored snapshot and how
+    long each page has gone without changes.
+
+    The fingerprints are seeded from the current_market view, which already
+    holds the last stored snapshot of every coin, so they survive restarts.
+    Pages past the first FETCH_HOT_PAGES are polled less often the longer
+    they stay unchanged: every 2, 4, ... up to FETCH_MAX_PAGE_INTERVAL fetch
+    cycles. The page schedule is saved to etl_state after every cycle, so
+    separate `--mode fetch` runs continue it instead of fetching every page.
+    """
+
+    def __init__(
+        self,
+        hot_pages: int = FETCH_HOT_PAGES,
+        max_interval: int = FETCH_MAX_PAGE_INTERVAL,
+    ):
+        """
+        Args:
+            hot_pages: Number of leading pages fetched on every cycle
+            max_interval: Longest gap between fetches of a stable page, in cycles
+        """
+        self.hot_pages = hot_pages
+        self.max_interval = max(1, max_interval)
+        self.fingerprints: Optional[Dict[str, bytes]] = None
+        self._cycle = 0
+        # page -> (consecutive unchanged fetches, cycle it is next due)
+        self._pages: Dict[int, Tuple[int, int]] = {}
+
+    def load(self, db: Optional[Database] = None) -> None:
+        """
+        Seed the fingerprints from the current market view and restore the
+        saved page schedule, once per process.
+        """
+        if self.fingerprints is not None:
+            return
+        db = db if db is not None else get_db()
+        projection = {field: 1 for field in FINGERPRINT_FIELDS}
+        try:
+            self.fingerprints = {
+                doc["_id"]: fingerprint(doc)
+                for doc in db[CURRENT_MARKET_COLLECTION].find({}, projection)
+            }
+        except PyMongoError as e:
+            print(f"Could not load fingerprints, storing every row: {e}")
+            self.fingerprints = {}
+        try:
+            schedule = db[STATE_COLLECTION].find_one({"_id": SCHEDULE_ID}) or {}
+        except PyMongoError as e:
+            print(f"Could not load the page schedule, fetching every page: {e}")
+            schedule = {}
+        self._cycle = schedule.get("cycle", 0)
+        self._pages = {
+            int(page): (streak, due)
+            for page, (streak, due) in schedule.get("pages", {}).items()
+        }
+
+    def save(self, db: Optional[Database] = None) -> None:
+        """Persist the page schedule for the next fetch run."""
+        db = db if db is not None else get_db()
+        try:
+            db[STATE_COLLECTION].replace_one(
+                {"_id": SCHEDULE_ID},
+                {
+                    "_id": SCHEDULE_ID,
+                    "cycle": self._cycle,
+                    "pages": {
+                        str(page): [streak, due]
+                        for page, (streak, due) in self._pages.items()
+                    },
+                },
+                upsert=True,
+            )
+        except PyMongoError as e:
+            # Only costs extra fetches of stable pages on the next run
+            print(f"Could not save the page schedule: {e}")
+
+    def pages_due(self, pages: int) -> List[int]:
+        """
+        Start a fetch cycle and list the pages to fetch in it.
+
+        Args:
+            pages: Number of pages configured
+
+        Returns:
+            Page numbers, hot pages first
+        """
+        self._cycle += 1
+        return [
+            page
+            for page in range(1, pages + 1)
+            if page <= self.hot_pages or self._pages.get(page, (0, 0))[1] <= self._cycle
+        ]
+
+    def select_changed(self, rows: Iterable[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Keep the rows whose fingerprint differs from the last stored one.
+
+        Args:
+            rows: Raw CoinGecko rows of one page
+
+        Returns:
+            Tuple of (changed rows, their fingerprints to pass to mark_stored)
+        """
+        if self.fingerprints is None:
+            self.load()
+        changed, pending = [], {}
+        for row in rows:
+            digest = fingerprint(row)
+            if self.fingerprints.get(row.get("id")) != digest:
+                changed.append(row)
+                pending[row.get("id")] = digest
+        return changed, pending
+
+    def mark_stored(self, page: int, pending: Dict[str, bytes]) -> None:
+        """
+        Record a page's stored rows and schedule its next fetch.
+
+        Args:
+            page: Page number
+            pending: Fingerprints returned by select_changed
+        """
+        self.fingerprints.update(pending)
+        streak = 0 if pending else self._pages.get(page, (0, 0))[0] + 1
+        interval = min(2**streak, self.max_interval)
+        self._pages[page] = (streak, self._cycle + interval)
+
+
+change_tracker = ChangeTracker()
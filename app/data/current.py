@@ -0,0 +1,94 @@
+# app/data/current.py
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+from app.storage.mongo import get_db
+from app.core.config import COLLECTION_NAME
+from app.utils.metrics import MONGO_OPERATION_SECONDS
+
+CURRENT_MARKET_COLLECTION = "current_market"
+
+
+def _latest_per_coin(rows: List[Dict]) -> List[Dict]:
+    """Keep only the newest snapshot of each coin in a batch."""
+    latest: Dict[str, Dict] = {}
+    for row in rows:
+        previous = latest.get(row["id"])
+        if previous is None or row["last_updated"] > previous["last_updated"]:
+            latest[row["id"]] = row
+    return list(latest.values())
+
+
+def update_current_market(rows: List[Dict], db: Optional[Database] = None) -> int:
+    """
+    Replace each coin's current snapshot when a newer last_updated arrives.
+
+    The upsert only matches a document with an older last_updated; when the
+    stored one is newer or equal, the insert fails on the _id and is ignored.
+
+    Args:
+        rows: Snapshots prepared by prepare_snapshot
+        db: Database to write to. Defaults to get_db().
+
+    Returns:
+        Number of coins inserted or updated
+    """
+    if not rows:
+        return 0
+    db = db if db is not None else get_db()
+    operations = [
+        UpdateOne(
+            {"_id": row["id"], "last_updated": {"$lt": row["last_updated"]}},
+            {"$set": {key: value for key, value in row.items() if key != "_id"}},
+            upsert=True,
+        )
+        for row in _latest_per_coin(rows)
+    ]
+    try:
+        with MONGO_OPERATION_SECONDS.time(operation="update_current_market"):
+            result = db[CURRENT_MARKET_COLLECTION].bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+    except BulkWriteError as e:
+        # Duplicate _id errors mean the stored snapshot is already newer
+        details = e.details
+        non_duplicate = [err for err in details["writeErrors"] if err["code"] != 11000]
+        if non_duplicate:
+            raise
+        return details["nUpserted"] + details["nModified"]
+
+
+def backfill_current_market(batch_size: int = 1000) -> int:
+    """
+    Build the current market view from the snapshots already stored.
+
+    Args:
+        batch_size: Number of coins written per bulk write
+
+    Returns:
+        Number of coins processed
+    """
+    cursor = get_db()[COLLECTION_NAME].aggregate(
+        [
+            {"$match": {"last_updated": {"$type": "date"}}},
+            {"$sort": {"id": 1, "last_updated": -1}},
+            {"$group": {"_id": "$id", "doc": {"$first": "$$ROOT"}}},
+            {"$replaceRoot": {"newRoot": "$doc"}},
+            {"$project": {"_id": 0}},
+        ],
+        allowDiskUse=True,
+    )
+    processed = 0
+    batch: List[Dict] = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            update_current_market(batch)
+            processed += len(batch)
+            batch = []
+    if batch:
+        update_current_market(batch)
+        processed += len(batch)
+    print(f"Built the current market view for {processed} coins")
+    return processed
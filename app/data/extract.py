@@ -1,6 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+import threading
+import time
+
+import requests
 from pycoingecko import CoinGeckoAPI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.data.changes import change_tracker
 from app.data.store import store_to_mongo
-import time
+from app.utils.metrics import (
+    DUPLICATE_ROWS,
+    FETCH_PAGE_FAILURES,
+    FETCH_PAGE_SECONDS,
+    PAGES_SKIPPED,
+    ROWS_FETCHED,
+    UNCHANGED_ROWS,
+)
+
+_client: Optional[CoinGeckoAPI] = None
+_client_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all fetch workers."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second. A non-positive rate disables limiting.
+            capacity: Maximum burst size. Defaults to max(1, rate).
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    elapsed = now - self._updated
+                    self._tokens = min(
+                        self.capacity, self._tokens + elapsed * self.rate
+                    )
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens to every worker for the given time."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+            self._updated = self._paused_until
+
+
+def get_coingecko_client(pool_size: int = 10) -> CoinGeckoAPI:
+    """Get the shared CoinGecko client so every request reuses one HTTP session.
+
+    Args:
+        pool_size: Minimum number of pooled HTTP connections to keep.
+
+    Returns:
+        CoinGeckoAPI: Shared client instance
+    """
+    global _client
+    with _client_lock:
+        if _client is None or getattr(_client, "_pool_size", 0) < pool_size:
+            client = _client or CoinGeckoAPI()
+            retries = Retry(
+                total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504]
+            )
+            client.session.mount(
+                "https://",
+                HTTPAdapter(
+                    max_retries=retries,
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                ),
+            )
+            client._pool_size = pool_size
+            _client = client
+        return _client
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Return the backoff (seconds) for a rate-limited response, None otherwise."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if error.response.status_code != 429:
+            return None
+        header = error.response.headers.get("Retry-After")
+        try:
+            return float(header)
+        except (TypeError, ValueError):
+            return 0.0
+    # pycoingecko re-raises JSON error bodies as ValueError(dict)
+    if isinstance(error, ValueError) and error.args and isinstance(error.args[0], dict):
+        status = error.args[0].get("status", error.args[0])
+        if isinstance(status, dict) and status.get("error_code") == 429:
+            return 0.0
+    return None
 
 
 def fetch_market_data(
@@ -8,6 +119,7 @@ def fetch_market_data(
     order: str = "market_cap_desc",
     per_page: int = 10,
     page: int = 1,
+    client: Optional[CoinGeckoAPI] = None,
 ):
     """Fetch market data from CoinGecko
 
@@ -16,31 +128,147 @@ def fetch_market_data(
         order (str, optional): Order by which to sort the data. Defaults to "market_cap_desc".
         per_page (int, optional): Number of items per page. Defaults to 10.
         page (int, optional): Page number. Defaults to 1.
+        client (CoinGeckoAPI, optional): Client to use. Defaults to the shared client.
 
     Returns:
         list[dict]: List of market data
     """
-    cg = CoinGeckoAPI()
+    cg = client or get_coingecko_client()
     data = cg.get_coins_markets(
         vs_currency=currency, order=order, per_page=per_page, page=page
     )
     return data
 
 
-def fetch_and_store_data(pages: int = 10, per_page: int = 100, delay: int = 1):
+def fetch_page_with_backoff(
+    page: int,
+    per_page: int,
+    limiter: TokenBucket,
+    client: CoinGeckoAPI,
+    max_retries: int = 5,
+    base_backoff: float = 2.0,
+):
+    """
+    Fetch one page, waiting on the shared rate limiter and backing off on HTTP 429.
+
+    Args:
+        page: Page number
+        per_page: Number of items per page
+        limiter: Shared token bucket
+        client: Shared CoinGecko client
+        max_retries: Number of retries after a rate-limited response
+        base_backoff: Initial backoff in seconds, doubled on every retry
+
+    Returns:
+        list[dict]: List of market data
+    """
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            with FETCH_PAGE_SECONDS.time():
+                return fetch_market_data(page=page, per_page=per_page, client=client)
+        except (requests.HTTPError, ValueError) as e:
+            retry_after = _retry_after(e)
+            if retry_after is None or attempt == max_retries:
+                raise
+            backoff = max(retry_after, base_backoff * 2**attempt)
+            print(f"Page {page} rate limited, backing off {backoff:.1f}s")
+            limiter.pause(backoff)
+
+
+def fetch_and_store_data(
+    pages: int = 10,
+    per_page: int = 100,
+    delay: int = 1,
+    concurrency: int = 4,
+    rate: Optional[float] = None,
+    changes_only: bool = False,
+):
     """
     Fetch cryptocurrency data from CoinGecko and store in MongoDB.
 
+    Pages are fetched concurrently through a shared rate limiter and stored
+    as they arrive, so Mongo writes overlap with in-flight HTTP requests.
+    With changes_only, rows whose fingerprint matches the last stored
+    snapshot of their coin are not written, and stable pages past the first
+    few are fetched on fewer cycles.
+
     Args:
         pages: Number of pages to fetch
         per_page: Number of items per page
-        delay: Delay between requests in seconds
+        delay: Delay between requests in seconds, used when rate is not given
+        concurrency: Number of pages fetched in parallel
+        rate: Maximum requests per second across all workers
+        changes_only: Only store changed rows and poll stable pages less often
+
+    Returns:
+        Dict with fetched, inserted, skipped and unchanged row counts, and
+        skipped and failed pages
     """
-    print("Fetching data from CoinGecko...")
-    for page in range(pages):
-        data = fetch_market_data(page=page + 1, per_page=per_page)
-        print(f"Page {page + 1} fetched {len(data)} rows")
-        store_to_mongo(data)
-        time.sleep(delay)
+    if rate is None:
+        rate = 1 / delay if delay > 0 else 0
+    concurrency = max(1, concurrency)
+    limiter = TokenBucket(rate)
+    client = get_coingecko_client(pool_size=concurrency)
+
+    totals = {
+        "fetched": 0,
+        "inserted": 0,
+        "skipped": 0,
+        "unchanged": 0,
+        "skipped_pages": 0,
+        "failed_pages": 0,
+    }
+
+    page_numbers = list(range(1, pages + 1))
+    if changes_only:
+        change_tracker.load()
+        page_numbers = change_tracker.pages_due(pages)
+        totals["skipped_pages"] = pages - len(page_numbers)
+        PAGES_SKIPPED.inc(totals["skipped_pages"])
+
+    print(
+        f"Fetching data from CoinGecko ({concurrency} workers, "
+        f"{rate or 'unlimited'} req/s)..."
+    )
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                fetch_page_with_backoff, page, per_page, limiter, client
+            ): page
+            for page in page_numbers
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"Page {page} failed: {e}")
+                totals["failed_pages"] += 1
+                FETCH_PAGE_FAILURES.inc()
+                continue
+            rows = data
+            if changes_only:
+                rows, pending = change_tracker.select_changed(data)
+            counts = store_to_mongo(rows)
+            if changes_only:
+                change_tracker.mark_stored(page, pending)
+            unchanged = len(data) - len(rows)
+            totals["fetched"] += len(data)
+            totals["inserted"] += counts["inserted"]
+            totals["skipped"] += counts["skipped"]
+            totals["unchanged"] += unchanged
+            ROWS_FETCHED.inc(len(data))
+            DUPLICATE_ROWS.inc(counts["skipped"])
+            UNCHANGED_ROWS.inc(unchanged)
+            print(
+                f"Page {page} fetched {len(data)} rows ({counts['inserted']} "
+                f"inserted, {counts['skipped']} skipped, {unchanged} unchanged)"
+            )
 
+    if changes_only:
+        change_tracker.save()
+    if totals["skipped_pages"]:
+        print(f"Skipped {totals['skipped_pages']} stable pages")
     print("Data fetching and storage completed.")
+    return totals
@@ -0,0 +1,125 @@
+# app/data/migrate.py
+from typing import List
+
+from pymongo import DeleteOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from app.storage.mongo import get_db
+from app.core.config import COLLECTION_NAME
+from app.data.store import SNAPSHOT_KEY, ensure_indexes, parse_timestamp
+
+
+def dedupe_snapshots(collection: Collection = None, batch_size: int = 1000) -> int:
+    """
+    Delete duplicate snapshots so the unique (id, last_updated) index can be
+    built, keeping the first stored copy (lowest _id) of every snapshot, the
+    one a $setOnInsert upsert would have kept.
+
+    Args:
+        collection: Collection to deduplicate. Defaults to COLLECTION_NAME.
+        batch_size: Number of documents deleted per bulk write
+
+    Returns:
+        Number of deleted documents
+    """
+    if collection is None:
+        collection = get_db()[COLLECTION_NAME]
+    duplicates = collection.aggregate(
+        [
+            {
+                "$group": {
+                    "_id": {field: f"${field}" for field in SNAPSHOT_KEY},
+                    "keep": {"$min": "$_id"},
+                    "ids": {"$push": "$_id"},
+                }
+            },
+            {"$match": {"ids.1": {"$exists": True}}},
+        ],
+        allowDiskUse=True,
+    )
+
+    removed = 0
+    batch: List = []
+    for group in duplicates:
+        batch.extend(_id for _id in group["ids"] if _id != group["keep"])
+        if len(batch) >= batch_size:
+            removed += collection.delete_many({"_id": {"$in": batch}}).deleted_count
+            batch = []
+    if batch:
+        removed += collection.delete_many({"_id": {"$in": batch}}).deleted_count
+    return removed
+
+
+def migrate_timestamps(batch_size: int = 1000) -> dict:
+    """
+    One-off migration converting string last_updated values to BSON dates
+    and back-filling fetched_at from the ObjectId creation time.
+
+    Snapshots whose converted key already exists as a date are duplicates of
+    an already-migrated row and are deleted. Remaining duplicate snapshots
+    are then removed and the unique (id, last_updated) index is built.
+
+    Args:
+        batch_size: Number of documents updated per bulk write
+
+    Returns:
+        Dict with the number of converted and removed documents
+    """
+    collection = get_db()[COLLECTION_NAME]
+    query = {
+        "$or": [
+            {"last_updated": {"$not": {"$type": "date"}}},
+            {"fetched_at": {"$exists": False}},
+        ]
+    }
+    cursor = collection.find(query, {"_id": 1, "last_updated": 1}).batch_size(
+        batch_size
+    )
+
+    converted = 0
+    removed = 0
+    operations = []
+    ids = []
+
+    def flush():
+        nonlocal converted, removed
+        if not operations:
+            return
+        try:
+            converted += collection.bulk_write(operations, ordered=False).modified_count
+        except BulkWriteError as e:
+            converted += e.details["nModified"]
+            duplicates = [
+                DeleteOne({"_id": ids[err["index"]]})
+                for err in e.details["writeErrors"]
+                if err["code"] == 11000
+            ]
+            if len(duplicates) != len(e.details["writeErrors"]):
+                raise
+            removed += collection.bulk_write(duplicates, ordered=False).deleted_count
+        operations.clear()
+        ids.clear()
+
+    for doc in cursor:
+        fetched_at = doc["_id"].generation_time
+        last_updated = parse_timestamp(doc.get("last_updated")) or fetched_at
+        ids.append(doc["_id"])
+        operations.append(
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"last_updated": last_updated, "fetched_at": fetched_at}},
+            )
+        )
+        if len(operations) >= batch_size:
+            flush()
+    flush()
+
+    # Without the unique index the conversion above cannot detect duplicates,
+    # and stores made before the index existed may have left some as well
+    removed += dedupe_snapshots(collection, batch_size)
+    if not ensure_indexes(collection):
+        print(
+            "Warning: unique snapshot index is still missing, run the migration again"
+        )
+    print(f"Migrated {converted} documents, removed {removed} duplicates")
+    return {"converted": converted, "removed": removed}
@@ -1,9 +1,148 @@
 # app/data/store.py
-from app.storage.mongo import get_db
-from app.core.config import COLLECTION_NAME
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, OperationFailure
+from app.storage.mongo import ensure_ttl_index, get_db
+from app.core.config import COLLECTION_NAME, MARKET_DATA_TTL_DAYS
+from app.data.bars import update_bars
+from app.data.current import update_current_market
+from app.utils.metrics import MONGO_OPERATION_SECONDS
 
-def store_to_mongo(data):
-    db = get_db()
-    collection = db[COLLECTION_NAME]
-    collection.insert_many(data)
+SNAPSHOT_KEY = ("id", "last_updated")
+
+_indexes_ready = False
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """
+    Convert a CoinGecko ISO-8601 timestamp to a UTC datetime.
+
+    Args:
+        value: ISO string, datetime or None
+
+    Returns:
+        Timezone-aware datetime, or None if the value cannot be parsed
+    """
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def prepare_snapshot(row: Dict, fetched_at: datetime) -> Dict:
+    """
+    Store timestamps as native BSON dates. Rows without a usable
+    last_updated take their fetch time so they stay inside windowed queries.
+
+    Args:
+        row: Raw CoinGecko market data row
+        fetched_at: Time the row was fetched
+
+    Returns:
+        Row ready to be written to MongoDB
+    """
+    row = dict(row)
+    row["last_updated"] = parse_timestamp(row.get("last_updated")) or fetched_at
+    row["fetched_at"] = fetched_at
+    return row
+
+
+def ensure_indexes(collection: Collection = None) -> bool:
+    """
+    Create the unique (id, last_updated) snapshot index and the last_updated
+    and fetched_at indexes used by windowed and incremental extraction.
+    With MARKET_DATA_TTL_DAYS set, the fetched_at index also expires raw
+    snapshots (they are already rolled up into bars). Safe to call repeatedly.
+
+    Args:
+        collection: Collection to index. Defaults to COLLECTION_NAME.
+
+    Returns:
+        bool: Whether the unique snapshot index exists
+    """
+    global _indexes_ready
+    if collection is None:
+        collection = get_db()[COLLECTION_NAME]
+    collection.create_index([("last_updated", ASCENDING)], name="last_updated")
+    if MARKET_DATA_TTL_DAYS:
+        ensure_ttl_index(
+            collection, "fetched_at", MARKET_DATA_TTL_DAYS * 24 * 3600, "fetched_at"
+        )
+    else:
+        collection.create_index([("fetched_at", ASCENDING)], name="fetched_at")
+    try:
+        collection.create_index(
+            [(field, ASCENDING) for field in SNAPSHOT_KEY],
+            unique=True,
+            name="snapshot_key",
+        )
+    except OperationFailure as e:
+        # Existing duplicate snapshots prevent building a unique index; upserts
+        # still work, they just cannot rely on the index for deduplication.
+        # `--mode migrate` removes the duplicates and builds it.
+        print(f"Warning: could not create unique snapshot index: {e}")
+        _indexes_ready = True
+        return False
+    _indexes_ready = True
+    return True
+
+
+def store_to_mongo(data: List[Dict]) -> Dict[str, int]:
+    """
+    Upsert raw CoinGecko rows keyed on (id, last_updated).
+
+    Snapshots already stored are left untouched, so re-fetching an unchanged
+    page costs no new documents. Newly inserted snapshots are folded into the
+    OHLCV bars and the current market view.
+
+    Args:
+        data: List of market data rows
+
+    Returns:
+        Dict with the number of inserted and skipped rows
+    """
+    if not data:
+        return {"inserted": 0, "skipped": 0}
+
+    collection = get_db()[COLLECTION_NAME]
+    if not _indexes_ready:
+        ensure_indexes(collection)
+
+    fetched_at = datetime.now(timezone.utc)
+    data = [prepare_snapshot(row, fetched_at) for row in data]
+    operations = [
+        UpdateOne(
+            {field: row.get(field) for field in SNAPSHOT_KEY},
+            {"$setOnInsert": row},
+            upsert=True,
+        )
+        for row in data
+    ]
+    try:
+        with MONGO_OPERATION_SECONDS.time(operation="upsert_snapshots"):
+            result = collection.bulk_write(operations, ordered=False)
+        inserted = result.upserted_count
+        upserted = list(result.upserted_ids)
+    except BulkWriteError as e:
+        # Concurrent writers racing on the same snapshot hit the unique index;
+        # those rows are duplicates and count as skipped.
+        details = e.details
+        non_duplicate = [err for err in details["writeErrors"] if err["code"] != 11000]
+        if non_duplicate:
+            raise
+        inserted = details["nUpserted"]
+        upserted = [item["index"] for item in details["upserted"]]
+
+    new_rows = [data[index] for index in upserted]
+    update_bars(new_rows)
+    update_current_market(new_rows)
+
+    return {"inserted": inserted, "skipped": len(data) - inserted}
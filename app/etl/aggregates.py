@@ -0,0 +1,189 @@
+import math
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class RunningStats:
+    """Mergeable count/sum/mean/variance using Welford's algorithm."""
+
+    def __init__(
+        self, count: int = 0, mean: float = 0.0, m2: float = 0.0, total: float = 0.0
+    ):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.total = total
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Fold a batch of values into the running statistics.
+
+        Args:
+            values: Array of values, NaNs are ignored
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        self.merge(RunningStats(len(values), batch_mean, batch_m2, float(values.sum())))
+
+    def merge(self, other: "RunningStats") -> None:
+        """
+        Combine another set of statistics into this one (Chan et al.).
+
+        Args:
+            other: Statistics to merge in
+        """
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), matching pandas."""
+        if self.count < 2:
+            return float("nan")
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "total": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "RunningStats":
+        return cls(**data) if data else cls()
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch over positive values with bounded relative error.
+
+    Values are counted in logarithmic buckets of width gamma = (1 + a) / (1 - a),
+    so any reported quantile is within a relative error of a of the true value.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, buckets: Optional[Dict] = None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {int(k): v for k, v in (buckets or {}).items()}
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Add a batch of values. Non-positive and NaN values are ignored.
+
+        Args:
+            values: Array of values
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[values > 0]
+        if not len(values):
+            return
+        indexes, counts = np.unique(
+            np.ceil(np.log(values) / self._log_gamma).astype(np.int64),
+            return_counts=True,
+        )
+        for index, count in zip(indexes.tolist(), counts.tolist()):
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimated value, NaN if the sketch is empty
+        """
+        total = self.count
+        if not total:
+            return float("nan")
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "QuantileSketch":
+        return cls(**data) if data else cls()
+
+
+class TopK:
+    """Bounded set of the k records with the largest (or smallest) value."""
+
+    def __init__(
+        self,
+        k: int,
+        field: str,
+        largest: bool = True,
+        records: Optional[List[Dict]] = None,
+    ):
+        self.k = k
+        self.field = field
+        self.largest = largest
+        self.records: List[Dict] = list(records or [])
+
+    def update(self, names: np.ndarray, values: np.ndarray) -> None:
+        """
+        Offer a batch of (name, value) pairs, keeping only the best k overall.
+
+        Args:
+            names: Array of coin names
+            values: Array of metric values, NaNs are ignored
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) > self.k:
+            keys = -values[valid] if self.largest else values[valid]
+            valid = valid[np.argpartition(keys, self.k - 1)[: self.k]]
+        candidates = self.records + [
+            {"name": names[i], self.field: float(values[i])} for i in valid
+        ]
+        candidates.sort(key=lambda record: record[self.field], reverse=self.largest)
+        self.records = candidates[: self.k]
+
+    def merge(self, other: "TopK") -> None:
+        candidates = self.records + other.records
+        candidates.sort(key=lambda record: record[self.field], reverse=self.largest)
+        self.records = candidates[: self.k]
+
+    def to_dict(self) -> Dict:
+        return {
+            "k": self.k,
+            "field": self.field,
+            "largest": self.largest,
+            "records": self.records,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TopK":
+        return cls(**data)
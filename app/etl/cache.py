@@ -0,0 +1,337 @@
+import json
+import os
+import shutil
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from app.core.schema import is_category, is_datetime
+
+# Partition files are only reused when they were written with the same dtypes
+META_FILE = "meta.json"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+class SnapshotCache:
+    """
+    On-disk columnar cache of extracted market data, partitioned by UTC day
+    of last_updated.
+
+    A day is closed once it ended more than `close_after` ago (late snapshots
+    carry a last_updated shortly before their fetch). Closed days are written
+    as one .npy file per column and afterwards memory-mapped. The open days
+    are kept in memory. Every window runs one fetched_at delta query over all
+    of its days: rows of the open days are appended in memory, and the rare
+    rows that arrive after their day closed are merged into its partition,
+    which is then rewritten. Each partition records the fetched_at watermark
+    it is complete up to, so late rows are also picked up after a restart.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        schema: Dict[str, object],
+        close_after: timedelta = timedelta(minutes=15),
+        retention_days: int = 35,
+        settle: timedelta = timedelta(seconds=60),
+    ):
+        """
+        Args:
+            root: Directory holding one sub-directory per closed day
+            schema: Column -> dtype of the cached frames
+            close_after: Time after midnight UTC before a day is closed
+            retention_days: Closed days older than this are deleted
+            settle: Age after which a fetched row is assumed fully written
+        """
+        self.root = Path(root)
+        self.schema = schema
+        self.close_after = close_after
+        self.retention_days = retention_days
+        self.settle = settle
+        self._schema_key = {column: str(dtype) for column, dtype in schema.items()}
+        self._open: Optional[pd.DataFrame] = None
+        self._open_start: Optional[datetime] = None
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def _partition_path(self, day: date) -> Path:
+        return self.root / day.isoformat()
+
+    def _read_meta(self, day: date) -> Optional[Dict]:
+        """Read a closed day's metadata, or return None if it is not cached."""
+        path = self._partition_path(day)
+        try:
+            with open(path / META_FILE) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Partitions written without a watermark can't be topped up; rebuild them
+        if meta.get("schema") != self._schema_key or "watermark" not in meta:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return meta
+
+    def _read_partition(self, day: date) -> Optional[pd.DataFrame]:
+        """Memory-map a closed day, or return None if it is not cached."""
+        path = self._partition_path(day)
+        columns = {}
+        try:
+            for column, dtype in self.schema.items():
+                if is_category(dtype):
+                    codes = np.load(path / f"{column}.codes.npy", mmap_mode="r")
+                    categories = np.load(path / f"{column}.categories.npy")
+                    columns[column] = pd.Categorical.from_codes(codes, categories)
+                else:
+                    values = np.load(path / f"{column}.npy", mmap_mode="r")
+                    if is_datetime(dtype):
+                        values = pd.DatetimeIndex(values).tz_localize("UTC")
+                    columns[column] = values
+        except OSError:
+            return None
+        return pd.DataFrame(columns, copy=False)
+
+    def _write_partition(
+        self, day: date, df: pd.DataFrame, watermark: datetime
+    ) -> None:
+        """
+        Write a closed day to a temporary directory and move it into place,
+        replacing any previous copy.
+
+        The watermark is the fetched_at up to which the day is complete.
+        """
+        path = self._partition_path(day)
+        tmp_path = self.root / f".{day.isoformat()}.{os.getpid()}.tmp"
+        old_path = self.root / f".{day.isoformat()}.{os.getpid()}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        for column, dtype in self.schema.items():
+            if is_category(dtype):
+                values = df[column].astype("category").cat
+                np.save(tmp_path / f"{column}.codes.npy", values.codes.to_numpy())
+                np.save(
+                    tmp_path / f"{column}.categories.npy",
+                    values.categories.to_numpy(dtype=str),
+                )
+            elif is_datetime(dtype):
+                np.save(
+                    tmp_path / f"{column}.npy",
+                    df[column].to_numpy(dtype="datetime64[ns]"),
+                )
+            else:
+                np.save(tmp_path / f"{column}.npy", df[column].to_numpy(dtype=dtype))
+        meta = {
+            "rows": len(df),
+            "schema": self._schema_key,
+            "watermark": watermark.isoformat(),
+        }
+        with open(tmp_path / META_FILE, "w") as f:
+            json.dump(meta, f)
+        try:
+            # Open memory maps of the old copy stay valid after it is removed
+            if path.exists():
+                os.rename(path, old_path)
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process replaced the same day at the same time
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def _advance_watermark(self, day: date, meta: Dict, watermark: datetime) -> None:
+        """Record that a closed day had no late rows up to `watermark`."""
+        path = self._partition_path(day)
+        tmp_file = path / f".{META_FILE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({**meta, "watermark": watermark.isoformat()}, f)
+            os.replace(tmp_file, path / META_FILE)
+        except OSError:
+            # The day was pruned or replaced meanwhile; it is rebuilt if needed
+            pass
+
+    def _concat(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate frames column by column, merging categories."""
+        columns = {}
+        for column, dtype in self.schema.items():
+            parts = [frame[column] for frame in frames]
+            if is_category(dtype):
+                columns[column] = union_categoricals(parts, ignore_order=True)
+            elif is_datetime(dtype):
+                columns[column] = pd.DatetimeIndex(
+                    np.concatenate([part.to_numpy("datetime64[ns]") for part in parts])
+                ).tz_localize("UTC")
+            else:
+                columns[column] = np.concatenate([part.to_numpy() for part in parts])
+        return pd.DataFrame(columns)
+
+    def _prune(self, today: date) -> None:
+        oldest = today - timedelta(days=self.retention_days)
+        for path in self.root.glob("????-??-??"):
+            try:
+                day = date.fromisoformat(path.name)
+            except ValueError:
+                continue
+            if day < oldest:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _fetch_day(
+        self, day: date, fetch: Callable[[Dict], pd.DataFrame]
+    ) -> pd.DataFrame:
+        return fetch(
+            {
+                "last_updated": {
+                    "$gte": _day_start(day),
+                    "$lt": _day_start(day + timedelta(days=1)),
+                }
+            }
+        )
+
+    def _fold_late(
+        self, late: pd.DataFrame, metas: Dict[date, Dict], cutoff: datetime
+    ) -> None:
+        """
+        Merge late rows into the closed days they belong to and advance the
+        watermark of every closed day to `cutoff`.
+
+        A late row may already be in its partition when the day was written
+        after the row was fetched, so rows are deduplicated on
+        (id, last_updated), keeping the cached copy.
+        """
+        for day, meta in metas.items():
+            watermark = datetime.fromisoformat(meta["watermark"])
+            if watermark >= cutoff:
+                continue
+            rows = late[
+                (
+                    (late["last_updated"] >= _day_start(day))
+                    & (late["last_updated"] < _day_start(day + timedelta(days=1)))
+                    & (late["fetched_at"] > watermark)
+                ).to_numpy()
+            ]
+            partition = self._read_partition(day) if len(rows) else None
+            if partition is None:
+                self._advance_watermark(day, meta, cutoff)
+                continue
+            merged = self._concat([partition, rows])
+            merged = merged[~merged.duplicated(["id", "last_updated"]).to_numpy()]
+            self._write_partition(day, merged, cutoff)
+            print(f"Folded {len(merged) - len(partition)} late rows into {day}")
+
+    def _refresh(
+        self,
+        window_start: datetime,
+        open_start: datetime,
+        metas: Dict[date, Dict],
+        fetch: Callable[[Dict], pd.DataFrame],
+        cutoff: datetime,
+    ) -> pd.DataFrame:
+        """
+        Bring the window up to date with one fetched_at delta query.
+
+        The delta covers every day of the window, so snapshots written late
+        for a closed day are folded into its partition instead of being lost.
+        Rows fetched after `cutoff` are returned but not kept in the open
+        days, because a page whose bulk write is still in progress may be
+        only partly visible; the next delta query reads them again.
+        """
+        cold = self._open is None or self._open_start > open_start
+        watermarks = [
+            datetime.fromisoformat(meta["watermark"]) for meta in metas.values()
+        ]
+        if not cold:
+            watermarks.append(self._watermark)
+        since = min(watermarks, default=cutoff)
+
+        delta = None
+        if since < cutoff:
+            last_updated = {"$gte": window_start}
+            if cold:
+                # The open days are read in full below
+                last_updated["$lt"] = open_start
+            delta = fetch({"fetched_at": {"$gt": since}, "last_updated": last_updated})
+            self._fold_late(
+                delta[(delta["last_updated"] < open_start).to_numpy()], metas, cutoff
+            )
+
+        if cold:
+            full = fetch({"last_updated": {"$gte": open_start}})
+        else:
+            stable = self._open
+            if self._open_start < open_start:
+                # Days that just closed now live in their partitions
+                stable = stable[(stable["last_updated"] >= open_start).to_numpy()]
+            full = stable
+            if delta is not None:
+                new = delta[
+                    (
+                        (delta["last_updated"] >= open_start)
+                        & (delta["fetched_at"] > self._watermark)
+                    ).to_numpy()
+                ]
+                if len(new):
+                    full = self._concat([stable, new])
+        self._open = full[(full["fetched_at"] <= cutoff).to_numpy()]
+        self._open_start = open_start
+        self._watermark = cutoff
+        return full
+
+    def load_window(
+        self,
+        start: datetime,
+        fetch: Callable[[Dict], pd.DataFrame],
+        now: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Assemble every snapshot with last_updated >= start.
+
+        Args:
+            start: Start of the window
+            fetch: Runs a Mongo query and returns its frame with the cache schema
+            now: Current time (for tests)
+
+        Returns:
+            DataFrame of the window
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - self.settle
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            open_day = (now - self.close_after).date()
+            metas: Dict[date, Dict] = {}
+            fetched: Dict[date, pd.DataFrame] = {}
+            day = start.date()
+            while day < open_day:
+                meta = self._read_meta(day)
+                if meta is None:
+                    fetched[day] = self._fetch_day(day, fetch)
+                    self._write_partition(day, fetched[day], cutoff)
+                    meta = {"watermark": cutoff.isoformat()}
+                metas[day] = meta
+                day += timedelta(days=1)
+            open_frame = self._refresh(
+                _day_start(start.date()), _day_start(open_day), metas, fetch, cutoff
+            )
+
+            frames = []
+            for day in metas:
+                frame = self._read_partition(day)
+                if frame is None:
+                    frame = fetched.get(day)
+                    if frame is None:
+                        frame = self._fetch_day(day, fetch)
+                frames.append(frame)
+            frames.append(open_frame)
+            self._prune(open_day)
+
+            df = self._concat(frames)
+            # Only the first day can start before the window
+            in_window = (df["last_updated"] >= start).to_numpy()
+            if not in_window.all():
+                df = df[in_window].reset_index(drop=True)
+            return df
@@ -0,0 +1,304 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from pymongo.database import Database
+from app.core.config import (
+    CORRELATION_HALFLIFE_DAYS,
+    CORRELATION_PUBLISH_N,
+    CORRELATION_RESOLUTION,
+    CORRELATION_TOP_N,
+)
+from app.data.bars import BAR_RESOLUTIONS
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.etl.incremental import STATE_COLLECTION
+from app.etl.volatility import build_price_panel, forward_fill, log_returns
+from app.storage.mongo import get_db
+from app.utils.metrics import MONGO_OPERATION_SECONDS
+
+CORRELATION_STATE_ID = "correlation"
+
+# A cold start folds this many half-lives of stored bars
+HISTORY_HALFLIVES = 4
+
+# Coins need this many observed returns before they are published
+MIN_OBSERVATIONS = 24
+
+# Rows of the covariance matrix updated per matrix product
+BLOCK_ROWS = 256
+
+# Number of most and least correlated pairs reported
+TOP_PAIRS = 5
+
+
+class CorrelationState:
+    """
+    Exponentially weighted co-moments of the tracked coins' log returns.
+
+    Follows the RiskMetrics estimator: returns are assumed to have zero mean,
+    so every period scales the covariance by the decay and adds the weighted
+    outer product of its returns. A batch of T periods is one weighted matrix
+    product, applied in row blocks to a float32 matrix so no float64 N x N
+    temporary is ever allocated.
+    """
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.coins: List[str] = data.get("coins", [])
+        n = len(self.coins)
+        self.resolution: Optional[str] = data.get("resolution")
+        self.decay: Optional[float] = data.get("decay")
+        self.watermark: Optional[datetime] = data.get("watermark")
+        self.covariance = (
+            np.frombuffer(data["covariance"], dtype=np.float32).reshape(n, n).copy()
+            if "covariance" in data
+            else np.zeros((n, n), dtype=np.float32)
+        )
+        self.last_close = np.array(data.get("last_close", [np.nan] * n), dtype=float)
+        self.observations = np.array(data.get("observations", [0] * n), dtype=int)
+
+    def reindex(self, coins: List[str]) -> None:
+        """
+        Track a new set of coins, keeping the co-moments of those that stay.
+
+        Args:
+            coins: Coin ids to track, in publishing order
+        """
+        if coins == self.coins:
+            return
+        positions = pd.Index(self.coins).get_indexer(coins)
+        kept = np.flatnonzero(positions >= 0)
+        old = positions[kept]
+
+        covariance = np.zeros((len(coins), len(coins)), dtype=np.float32)
+        covariance[np.ix_(kept, kept)] = self.covariance[np.ix_(old, old)]
+        last_close = np.full(len(coins), np.nan)
+        last_close[kept] = self.last_close[old]
+        observations = np.zeros(len(coins), dtype=int)
+        observations[kept] = self.observations[old]
+
+        self.coins = list(coins)
+        self.covariance, self.last_close = covariance, last_close
+        self.observations = observations
+
+    def update(self, returns: np.ndarray) -> None:
+        """
+        Fold a batch of periods into the co-moments, oldest first.
+
+        Args:
+            returns: Log returns of shape (periods, coins); missing returns
+                count as zero
+        """
+        periods = len(returns)
+        if not periods:
+            return
+        observed = ~np.isnan(returns)
+        returns = np.where(observed, returns, 0.0)
+        # Period t of T is decayed T - 1 - t times by the later periods
+        weights = (1 - self.decay) * self.decay ** np.arange(periods - 1, -1, -1)
+        weighted = returns * weights[:, None]
+
+        self.covariance *= np.float32(self.decay**periods)
+        for start in range(0, len(self.coins), BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            self.covariance[block] += weighted[:, block].T @ returns
+        self.observations += observed.sum(axis=0)
+
+    def correlation(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Correlation matrix of a subset of the tracked coins.
+
+        Args:
+            rows: Positions of the coins in self.coins
+
+        Returns:
+            float32 matrix of shape (len(rows), len(rows)); NaN for coins
+            with zero variance
+        """
+        covariance = self.covariance[np.ix_(rows, rows)]
+        std = np.sqrt(np.diag(covariance))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance / np.outer(std, std)
+        return np.clip(correlation, -1.0, 1.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "coins": self.coins,
+            "resolution": self.resolution,
+            "decay": self.decay,
+            "watermark": self.watermark,
+            "covariance": self.covariance.tobytes(),
+            "last_close": self.last_close.tolist(),
+            "observations": self.observations.tolist(),
+        }
+
+
+def load_correlation_state(db: Database) -> CorrelationState:
+    data = db[STATE_COLLECTION].find_one({"_id": CORRELATION_STATE_ID})
+    return CorrelationState(data)
+
+
+def save_correlation_state(state: CorrelationState, db: Database) -> None:
+    db[STATE_COLLECTION].replace_one(
+        {"_id": CORRELATION_STATE_ID},
+        {"_id": CORRELATION_STATE_ID, **state.to_dict()},
+        upsert=True,
+    )
+
+
+def load_closes(
+    coins: List[str], resolution: str, start: datetime, periods: int, db: Database
+) -> np.ndarray:
+    """
+    Read the close prices of some coins into a panel on the bar grid.
+
+    Args:
+        coins: Coin ids, one panel row each
+        resolution: Bar resolution
+        start: First bucket
+        periods: Number of buckets
+        db: Database to read from
+
+    Returns:
+        Price panel of shape (len(coins), periods), NaN where no bar exists
+    """
+    collection_name, step_seconds, _ = BAR_RESOLUTIONS[resolution]
+    end = start + timedelta(seconds=step_seconds * periods)
+    with MONGO_OPERATION_SECONDS.time(operation="find_bars"):
+        docs = list(
+            db[collection_name].find(
+                {"id": {"$in": coins}, "bucket": {"$gte": start, "$lt": end}},
+                {"_id": 0, "id": 1, "bucket": 1, "close": 1},
+            )
+        )
+    panel = np.full((len(coins), periods), np.nan)
+    if not docs:
+        return panel
+    ids, found = build_price_panel(
+        np.array([doc["id"] for doc in docs], dtype=object),
+        pd.to_datetime([doc["bucket"] for doc in docs], utc=True).to_numpy(
+            dtype="datetime64[ns]"
+        ),
+        np.array(
+            [np.nan if doc.get("close") is None else doc["close"] for doc in docs],
+            dtype=float,
+        ),
+        np.datetime64(start.replace(tzinfo=None), "ns"),
+        np.timedelta64(step_seconds, "s"),
+        periods,
+    )
+    panel[pd.Index(coins).get_indexer(ids)] = found
+    return panel
+
+
+def top_coins(n: int, db: Database) -> List[Dict]:
+    """The n largest coins by market cap in the current market view."""
+    return list(
+        db[CURRENT_MARKET_COLLECTION]
+        .find({"market_cap": {"$gt": 0}}, {"name": 1})
+        .sort("market_cap", -1)
+        .limit(n)
+    )
+
+
+def correlated_pairs(
+    names: List[str], correlation: np.ndarray, k: int, largest: bool
+) -> List[Dict]:
+    """The k most (or least) correlated pairs of distinct coins."""
+    first, second = np.triu_indices(len(names), 1)
+    values = correlation[first, second].astype(np.float64)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return []
+    keys = -values[valid] if largest else values[valid]
+    k = min(k, len(valid))
+    best = valid[np.argpartition(keys, k - 1)[:k]]
+    best = best[np.argsort(-values[best] if largest else values[best])]
+    return [
+        {"pair": [names[first[i]], names[second[i]]], "correlation": float(values[i])}
+        for i in best
+    ]
+
+
+def update_correlations(
+    resolution: str = CORRELATION_RESOLUTION,
+    top_n: int = CORRELATION_TOP_N,
+    publish_n: int = CORRELATION_PUBLISH_N,
+    halflife_days: float = CORRELATION_HALFLIFE_DAYS,
+    db: Optional[Database] = None,
+    now: Optional[datetime] = None,
+) -> Dict:
+    """
+    Fold the bars closed since the last run into the persisted co-moments
+    and publish the correlations of the largest coins.
+
+    Args:
+        resolution: Bar resolution of the returns
+        top_n: Number of coins (by market cap) whose co-moments are tracked
+        publish_n: Number of coins in the published correlation matrix
+        halflife_days: Half-life of the exponential weighting in days
+        db: Database to use. Defaults to get_db().
+        now: Current time (for tests)
+
+    Returns:
+        Dict with the correlation analysis results
+    """
+    db = db if db is not None else get_db()
+    step_seconds = BAR_RESOLUTIONS[resolution][1]
+    decay = 0.5 ** (step_seconds / (halflife_days * 86400))
+
+    state = load_correlation_state(db)
+    if state.resolution != resolution or state.decay != decay:
+        state = CorrelationState()
+        state.resolution, state.decay = resolution, decay
+
+    coins = top_coins(top_n, db)
+    names = {doc["_id"]: doc.get("name") or doc["_id"] for doc in coins}
+    state.reindex(list(names))
+
+    # Only closed bars are folded; the current one still changes
+    now = now or datetime.now(timezone.utc)
+    epoch = int(now.timestamp())
+    end = datetime.fromtimestamp(epoch - epoch % step_seconds, tz=timezone.utc)
+    history = int(HISTORY_HALFLIVES * halflife_days * 86400 // step_seconds)
+    first = end - timedelta(seconds=step_seconds * history)
+    watermark = state.watermark
+    if watermark is not None:
+        # The watermark bucket was folded already; it only provides the
+        # previous close of the first new return
+        watermark = watermark.replace(tzinfo=timezone.utc)
+        first = max(first, watermark)
+    periods = int((end - first).total_seconds()) // step_seconds
+
+    if periods >= 2 and state.coins:
+        prices = load_closes(state.coins, resolution, first, periods, db)
+        if watermark is not None and first == watermark:
+            missing = np.isnan(prices[:, 0])
+            prices[missing, 0] = state.last_close[missing]
+        prices = forward_fill(prices)
+        state.update(log_returns(prices).T)
+        state.last_close = prices[:, -1]
+        state.watermark = end - timedelta(seconds=step_seconds)
+        save_correlation_state(state, db)
+        print(f"Folded {periods - 1} {resolution} periods into the correlations")
+
+    eligible = np.flatnonzero(state.observations >= MIN_OBSERVATIONS)
+    correlation = state.correlation(eligible)
+    eligible_names = [names[state.coins[i]] for i in eligible]
+    published = min(publish_n, len(eligible))
+    return {
+        "resolution": resolution,
+        "halflife_days": halflife_days,
+        "updated_to": state.watermark,
+        "tracked": len(eligible),
+        "coins": eligible_names[:published],
+        "matrix": np.round(
+            correlation[:published, :published].astype(np.float64), 4
+        ).tolist(),
+        "most_correlated": correlated_pairs(
+            eligible_names, correlation, TOP_PAIRS, True
+        ),
+        "least_correlated": correlated_pairs(
+            eligible_names, correlation, TOP_PAIRS, False
+        ),
+    }
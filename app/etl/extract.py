@@ -1,16 +1,182 @@
-from typing import List, Dict
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, timezone
 from app.storage.mongo import get_db
-from app.core.config import COLLECTION_NAME
+from app.core.config import (
+    COLLECTION_NAME,
+    EXTRACT_BATCH_SIZE,
+    SNAPSHOT_CACHE_DIR,
+    SNAPSHOT_CACHE_CLOSE_MINUTES,
+    SNAPSHOT_CACHE_RETENTION_DAYS,
+)
+from app.core.schema import is_category, is_datetime, is_nullable_int, market_schema
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.etl.cache import SnapshotCache
+from app.utils.metrics import MONGO_OPERATION_SECONDS
 
+# Columns the analyses need, built with their declared market schema dtypes
+EXTRACT_SCHEMA: Dict[str, object] = market_schema(
+    [
+        "id",
+        "name",
+        "current_price",
+        "market_cap",
+        "total_volume",
+        "circulating_supply",
+        "total_supply",
+        "price_change_percentage_24h",
+        "last_updated",
+        "fetched_at",
+    ]
+)
 
-def extract_crypto_data(days: int = 1) -> pd.DataFrame:
+EXTRACT_PROJECTION = {"_id": 0, **{column: 1 for column in EXTRACT_SCHEMA}}
+
+
+def _to_float(value) -> float:
+    """Return value as a float, NaN for missing or non-numeric values."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _build_chunk(documents: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convert one cursor batch into typed NumPy column arrays."""
+    chunk = {}
+    for column, dtype in EXTRACT_SCHEMA.items():
+        values = (doc.get(column) for doc in documents)
+        if is_category(dtype):
+            chunk[column] = np.array(list(values), dtype=object)
+        elif is_datetime(dtype):
+            chunk[column] = pd.to_datetime(list(values), utc=True).to_numpy(
+                dtype="datetime64[ns]"
+            )
+        else:
+            chunk[column] = np.fromiter(
+                (_to_float(value) for value in values),
+                dtype=np.float64 if is_nullable_int(dtype) else dtype,
+                count=len(documents),
+            )
+    return chunk
+
+
+def build_market_frame(
+    documents: Iterable[Dict], batch_size: int = EXTRACT_BATCH_SIZE
+) -> pd.DataFrame:
+    """
+    Build a typed DataFrame from market data documents, one batch at a time.
+
+    Args:
+        documents: Iterable of market data documents (e.g. a Mongo cursor)
+        batch_size: Number of documents converted per batch
+
+    Returns:
+        DataFrame with the EXTRACT_SCHEMA columns and dtypes
+    """
+    iterator = iter(documents)
+    chunks = []
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        chunks.append(_build_chunk(batch))
+
+    chunks = chunks or [_build_chunk([])]
+    columns = {}
+    for column, dtype in EXTRACT_SCHEMA.items():
+        values = np.concatenate([chunk[column] for chunk in chunks])
+        if is_category(dtype):
+            columns[column] = pd.Categorical(values)
+        elif is_datetime(dtype):
+            columns[column] = pd.DatetimeIndex(values).tz_localize("UTC")
+        elif is_nullable_int(dtype):
+            columns[column] = pd.array(values, dtype="Float64").astype(dtype)
+        else:
+            columns[column] = values
+    return pd.DataFrame(columns)
+
+
+snapshot_cache = (
+    SnapshotCache(
+        SNAPSHOT_CACHE_DIR,
+        EXTRACT_SCHEMA,
+        close_after=timedelta(minutes=SNAPSHOT_CACHE_CLOSE_MINUTES),
+        retention_days=SNAPSHOT_CACHE_RETENTION_DAYS,
+    )
+    if SNAPSHOT_CACHE_DIR
+    else None
+)
+
+
+def find_market_frame(collection, query: Dict) -> pd.DataFrame:
+    """
+    Run a projected query and build its typed frame.
+
+    Args:
+        collection: Market data collection
+        query: MongoDB filter
+
+    Returns:
+        DataFrame with the EXTRACT_SCHEMA columns and dtypes
+    """
+    # The cursor is drained while the frame is built, so time both
+    with MONGO_OPERATION_SECONDS.time(operation="find_snapshots"):
+        cursor = collection.find(query, EXTRACT_PROJECTION).batch_size(
+            EXTRACT_BATCH_SIZE
+        )
+        return build_market_frame(cursor)
+
+
+def window_query(collection, days: int = 1) -> Tuple[Optional[Dict], bool]:
+    """
+    Build the filter selecting the last `days` days of snapshots.
+
+    last_updated is stored as a BSON date, so the filter is a range scan on
+    the last_updated index. If nothing is recent, the same window ending at
+    the newest snapshot is used.
+
+    Args:
+        collection: Market data collection
+        days: Length of the window in days
+
+    Returns:
+        Tuple of (MongoDB filter, None if the collection has no snapshots;
+        whether the window ends now)
+    """
+    date_threshold = datetime.now(timezone.utc) - timedelta(days=days)
+    if collection.find_one({"last_updated": {"$gte": date_threshold}}, {"_id": 1}):
+        return {"last_updated": {"$gte": date_threshold}}, True
+
+    latest = collection.find_one(
+        {"last_updated": {"$type": "date"}},
+        {"last_updated": 1},
+        sort=[("last_updated", -1)],
+    )
+    if not latest:
+        return None, False
+    print("No data found with date filter, using latest available window...")
+    return {
+        "last_updated": {"$gte": latest["last_updated"] - timedelta(days=days)}
+    }, False
+
+
+def extract_crypto_data(
+    days: int = 1, since: Optional[datetime] = None
+) -> pd.DataFrame:
     """
     Extract cryptocurrency data from MongoDB.
 
+    Only the EXTRACT_SCHEMA columns are projected, and the cursor is streamed
+    in batches straight into typed column arrays. Windowed extraction reads
+    closed days from the snapshot cache and only queries the open day.
+
     Args:
         days: Number of days of historical data to extract
+        since: If given, only extract documents fetched after this time
+            instead of the last `days` days
 
     Returns:
         DataFrame containing cryptocurrency data
@@ -18,67 +184,51 @@ def extract_crypto_data(days: int = 1) -> pd.DataFrame:
     # Get MongoDB collection
     collection = get_db()[COLLECTION_NAME]
 
-    # Calculate date threshold as string in ISO format
-    date_threshold = (datetime.now(timezone.utc) - timedelta(days=days)).strftime(
-        "%Y-%m-%dT%H:%M:%S.%fZ"
-    )
-
+    windowed = False
     try:
-        # Query the data with date filter
-        cursor = collection.find(
-            {
-                "$or": [
-                    {"last_updated": {"$gte": date_threshold}},
-                    {
-                        "last_updated": {"$exists": False}
-                    },  # Include documents without last_updated
-                ]
-            }
-        )
-        data = list(cursor)
-
-        # If no data found with date filter, get all data
-        if not data:
-            print("No data found with date filter, fetching all available data...")
-            cursor = collection.find()
-            data = list(cursor)
-
-        print(f"Found {len(data)} records")
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-
-        # Convert timestamp columns to datetime
-        if "last_updated" in df.columns:
-            df["last_updated"] = pd.to_datetime(df["last_updated"])
-
-        # Ensure required columns exist
-        required_columns = [
-            "id",
-            "name",
-            "current_price",
-            "market_cap",
-            "circulating_supply",
-            "total_supply",
-            "price_change_percentage_24h",
-            "last_updated",
-        ]
-
-        # Add missing columns with default values
-        for col in required_columns:
-            if col not in df.columns:
-                print(f"Warning: Column '{col}' not found, adding with default values")
-                if col == "price_change_percentage_24h":
-                    df[col] = 0.0
-                elif col in ["market_cap", "circulating_supply", "total_supply"]:
-                    df[col] = 0.0
-                elif col == "current_price":
-                    df[col] = 0.0
-                else:
-                    df[col] = None
+        if since is not None:
+            query = {"fetched_at": {"$gt": since}}
+        else:
+            query, windowed = window_query(collection, days)
+            if query is None:
+                print("Found 0 records")
+                return pd.DataFrame()
+
+        if windowed and snapshot_cache is not None:
+            # Closed days come from the cache, only the open day is queried
+            df = snapshot_cache.load_window(
+                query["last_updated"]["$gte"],
+                lambda query: find_market_frame(collection, query),
+            )
+        else:
+            df = find_market_frame(collection, query)
+        print(f"Found {len(df)} records")
+
         df["price"] = df["current_price"]
         return df
 
     except Exception as e:
         print(f"Error extracting data: {str(e)}")
         return pd.DataFrame()  # Return empty DataFrame on error
+
+
+def extract_current_market(days: int = 1) -> pd.DataFrame:
+    """
+    Extract the newest snapshot of every coin from the current market view.
+
+    Args:
+        days: Skip coins whose newest snapshot is older than this many days
+
+    Returns:
+        DataFrame with one row per coin
+    """
+    collection = get_db()[CURRENT_MARKET_COLLECTION]
+    date_threshold = datetime.now(timezone.utc) - timedelta(days=days)
+    try:
+        df = find_market_frame(collection, {"last_updated": {"$gte": date_threshold}})
+        print(f"Found {len(df)} coins")
+        df["price"] = df["current_price"]
+        return df
+    except Exception as e:
+        print(f"Error extracting current market: {str(e)}")
+        return pd.DataFrame()
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.etl.aggregates import QuantileSketch, RunningStats, TopK
+from app.etl.extract import extract_crypto_data
+from app.etl.transform import clean_data, empty_results
+from app.storage.mongo import get_db
+from app.utils.metrics import ETL_STAGE_SECONDS
+
+STATE_COLLECTION = "etl_state"
+STATE_ID = "market_analysis"
+
+# Rows fetched more recently than this are left for the next run: a page is
+# stored with one fetched_at in an unordered bulk write, so a run overlapping
+# the write would otherwise see part of the page and skip the rest forever.
+# It also absorbs clock skew between the fetch and ETL processes.
+SETTLE = timedelta(seconds=60)
+
+# (state key, metric column, k, largest)
+TOP_K_SPECS = [
+    ("top_market_cap", "market_cap", 10, True),
+    ("top_volume", "total_volume", 10, True),
+    ("top_price_change", "price_change_percentage_24h", 10, True),
+    ("bottom_price_change", "price_change_percentage_24h", 5, False),
+    ("top_supply_utilization", "supply_utilization", 5, True),
+    ("bottom_supply_utilization", "supply_utilization", 5, False),
+]
+
+
+class IncrementalState:
+    """
+    Mergeable aggregate state behind the analysis results.
+
+    Holds Welford statistics for market cap, a quantile sketch for its median,
+    running sums for the averages and bounded top-k sets for every ranking.
+    """
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.watermark: Optional[datetime] = data.get("watermark")
+        self.runs_since_rebuild: int = data.get("runs_since_rebuild", 0)
+        self.market_cap = RunningStats.from_dict(data.get("market_cap"))
+        self.market_cap_sketch = QuantileSketch.from_dict(data.get("market_cap_sketch"))
+        self.price_change = RunningStats.from_dict(data.get("price_change"))
+        self.supply_utilization = RunningStats.from_dict(data.get("supply_utilization"))
+        self.top_k = {
+            key: (
+                TopK.from_dict(data["top_k"][key])
+                if key in data.get("top_k", {})
+                else TopK(k, column, largest)
+            )
+            for key, column, k, largest in TOP_K_SPECS
+        }
+
+    def update(self, cleaned_df: pd.DataFrame) -> None:
+        """
+        Fold a batch of cleaned rows into the state.
+
+        Args:
+            cleaned_df: Output of clean_data for the new rows
+        """
+        if cleaned_df.empty:
+            return
+        names = cleaned_df["name"].astype(str).to_numpy()
+        columns = {
+            "market_cap": cleaned_df["market_cap"].to_numpy(dtype=np.float64),
+            "total_volume": cleaned_df["total_volume"].to_numpy(dtype=np.float64),
+            "price_change_percentage_24h": cleaned_df[
+                "price_change_percentage_24h"
+            ].to_numpy(dtype=np.float64),
+        }
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns["supply_utilization"] = cleaned_df["circulating_supply"].to_numpy(
+                dtype=np.float64
+            ) / cleaned_df["total_supply"].to_numpy(dtype=np.float64)
+
+        self.market_cap.update(columns["market_cap"])
+        self.market_cap_sketch.update(columns["market_cap"])
+        self.price_change.update(columns["price_change_percentage_24h"])
+        self.supply_utilization.update(columns["supply_utilization"])
+        for key, column, _, _ in TOP_K_SPECS:
+            self.top_k[key].update(names, columns[column])
+
+    def to_results(self) -> Dict:
+        """
+        Render the state in the same structure transform_data returns.
+
+        Returns:
+            Dict containing all analysis results
+        """
+        if not self.market_cap.count:
+            return empty_results()
+        top_market_cap = self.top_k["top_market_cap"].records
+        return {
+            "market_cap_analysis": {
+                "total_market_cap": int(self.market_cap.total),
+                "top_10_market_cap": int(
+                    sum(record["market_cap"] for record in top_market_cap)
+                ),
+                "market_cap_distribution": {
+                    "mean": float(self.market_cap.mean),
+                    "median": float(self.market_cap_sketch.quantile(0.5)),
+                    "std": float(self.market_cap.std),
+                },
+            },
+            "price_analysis": {
+                "avg_price_change_24h": float(self.price_change.mean),
+                "most_volatile": self.top_k["top_price_change"].records[:5],
+                "least_volatile": self.top_k["bottom_price_change"].records,
+            },
+            "supply_analysis": {
+                "avg_supply_utilization": float(self.supply_utilization.mean),
+                "highest_utilization": self.top_k["top_supply_utilization"].records,
+                "lowest_utilization": self.top_k["bottom_supply_utilization"].records,
+            },
+            "top_performers": {
+                "by_market_cap": top_market_cap,
+                "by_volume": self.top_k["top_volume"].records,
+                "by_price_change": self.top_k["top_price_change"].records,
+            },
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "watermark": self.watermark,
+            "runs_since_rebuild": self.runs_since_rebuild,
+            "market_cap": self.market_cap.to_dict(),
+            "market_cap_sketch": self.market_cap_sketch.to_dict(),
+            "price_change": self.price_change.to_dict(),
+            "supply_utilization": self.supply_utilization.to_dict(),
+            "top_k": {key: topk.to_dict() for key, topk in self.top_k.items()},
+        }
+
+
+def load_state() -> Optional[IncrementalState]:
+    """Load the persisted incremental state, None if there is none yet."""
+    data = get_db()[STATE_COLLECTION].find_one({"_id": STATE_ID})
+    return IncrementalState(data) if data else None
+
+
+def save_state(state: IncrementalState) -> None:
+    """Persist the incremental state."""
+    get_db()[STATE_COLLECTION].replace_one(
+        {"_id": STATE_ID}, {"_id": STATE_ID, **state.to_dict()}, upsert=True
+    )
+
+
+def run_incremental_analysis(
+    days: int = 30, full_rebuild_every: int = 120, now: Optional[datetime] = None
+) -> Tuple[Dict, int]:
+    """
+    Update the analysis results with documents fetched since the last run.
+
+    The state is rebuilt from the full `days` window when none exists yet or
+    every `full_rebuild_every` runs, which also ages out rows that have left
+    the window since the last rebuild. Only rows fetched at least SETTLE ago
+    are folded in, and the watermark moves to that cutoff.
+
+    Args:
+        days: Window used for full rebuilds
+        full_rebuild_every: Number of incremental runs between full rebuilds,
+            0 to rebuild on every run
+        now: Current time (for tests)
+
+    Returns:
+        Tuple of (dict containing all analysis results, rows folded in)
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - SETTLE
+    previous = load_state()
+    rebuild = previous is None or previous.runs_since_rebuild >= full_rebuild_every
+
+    if rebuild:
+        print(f"Rebuilding incremental state from the last {days} days...")
+        with ETL_STAGE_SECONDS.time(stage="extract"):
+            df = extract_crypto_data(days=days)
+        if df.empty:
+            # Extraction errors also come back empty; keep what was built so far
+            print("Rebuild extracted no records, keeping the previous state")
+            return (previous.to_results() if previous else empty_results()), 0
+        state = IncrementalState()
+    else:
+        state = previous
+        print(f"Extracting documents fetched after {state.watermark}...")
+        with ETL_STAGE_SECONDS.time(stage="extract"):
+            df = extract_crypto_data(since=state.watermark)
+        state.runs_since_rebuild += 1
+
+    if not df.empty:
+        fetched_at = df["fetched_at"]
+        settled = ((fetched_at <= cutoff) | fetched_at.isna()).to_numpy()
+        df = df[settled].reset_index(drop=True)
+        # An empty extract may be an error, so the watermark only moves
+        # past rows that were actually read
+        state.watermark = cutoff
+
+    print(f"Extracted {len(df)} new records")
+    if not df.empty:
+        with ETL_STAGE_SECONDS.time(stage="transform"):
+            state.update(clean_data(df))
+
+    save_state(state)
+    return state.to_results(), len(df)
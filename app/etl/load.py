@@ -6,6 +6,8 @@ from pathlib import Path
 import numpy as np
 from app.storage.mongo import get_db
 from app.core.config import COLLECTION_NAME
+from app.etl.retention import RESULTS_COLLECTION, update_current, update_rollups
+from app.utils.metrics import MONGO_OPERATION_SECONDS
 
 
 def convert_numpy_types(obj):
@@ -24,11 +26,14 @@ def convert_numpy_types(obj):
 
 
 def save_analysis_results(
-    analysis_results: Dict, collection_name: str = "analysis_results"
+    analysis_results: Dict, collection_name: str = RESULTS_COLLECTION
 ):
     """
     Save analysis results to MongoDB.
 
+    The full result is kept until its TTL expires; the run is also folded
+    into the hourly and daily rollups and replaces the "current" document.
+
     Args:
         analysis_results: Dictionary containing analysis results
         collection_name: Name of the MongoDB collection to save results to
@@ -43,7 +48,12 @@ def save_analysis_results(
     analysis_results = convert_numpy_types(analysis_results)
 
     # Insert the results
-    collection.insert_one(analysis_results)
+    with MONGO_OPERATION_SECONDS.time(operation="insert_results"):
+        collection.insert_one(analysis_results)
+
+    # Keep the history and the dashboard's current view up to date
+    update_rollups(analysis_results, db)
+    update_current(analysis_results, db)
 
 
 def save_to_csv(df: pd.DataFrame, filename: str):
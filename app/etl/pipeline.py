@@ -1,44 +1,160 @@
-from app.etl.extract import extract_crypto_data
+import math
+from typing import Dict
+from app.core.config import (
+    ANALYSIS_ENGINE,
+    CORRELATION_TOP_N,
+    VOLATILITY_RESOLUTION,
+)
+from app.etl.correlation import update_correlations
+from app.etl.extract import extract_crypto_data, extract_current_market
 from app.etl.transform import transform_data
 from app.etl.load import save_analysis_results
-from app.utils.email import send_email
+from app.etl.incremental import run_incremental_analysis
+from app.etl.pushdown import run_pushdown_analysis
+from app.etl.volatility import analyze_volatility
+from app.utils.metrics import ETL_RUNS, ETL_STAGE_SECONDS
+from app.utils.notifications import FAILURE, notify
 
 
-def run_etl_pipeline(days: int = 1):
+def _format_value(value, spec: str) -> str:
+    """Format a statistic, "n/a" where an engine returned None or NaN."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "n/a"
+    return format(value, spec)
+
+
+def _coin_label(coin: Dict) -> str:
+    """A ranked coin's name, falling back to its id when the name is missing."""
+    name = coin.get("name")
+    if name is None or (isinstance(name, float) and math.isnan(name)):
+        name = coin.get("id") or "unknown"
+    return str(name)
+
+
+def format_summary(analysis_results: Dict, rows: int) -> str:
+    """
+    Render a short plain-text summary of the analysis results.
+
+    Args:
+        analysis_results: Dictionary containing analysis results
+        rows: Number of rows processed
+
+    Returns:
+        Summary text
+    """
+    market_cap = analysis_results["market_cap_analysis"]
+    price = analysis_results["price_analysis"]
+    top = analysis_results["top_performers"]["by_market_cap"][:3]
+    return "\n".join(
+        [
+            f"Rows processed: {rows}",
+            "Total market cap: "
+            + _format_value(market_cap.get("total_market_cap"), ","),
+            "Top 10 market cap: "
+            + _format_value(market_cap.get("top_10_market_cap"), ","),
+            "Average 24h price change: "
+            + _format_value(price.get("avg_price_change_24h"), ".2f")
+            + "%",
+            "Top by market cap: " + ", ".join(_coin_label(coin) for coin in top),
+        ]
+    )
+
+
+def run_etl_pipeline(
+    days: int = 1,
+    incremental: bool = False,
+    full_rebuild_every: int = 120,
+    current: bool = False,
+    engine: str = ANALYSIS_ENGINE,
+):
     """
     Run the ETL pipeline for data analysis.
 
     Args:
         days: Number of days of historical data to analyze
+        incremental: Only process documents fetched since the previous run and
+            merge them into the persisted aggregate state
+        full_rebuild_every: In incremental mode, number of runs between full
+            rebuilds of the state from the `days` window
+        current: Analyze the newest snapshot of every coin (from the
+            current_market view) instead of every snapshot in the window;
+            coins not updated for `days` days are skipped
+        engine: "pandas" to analyze the extracted frame, or "mongo" to run
+            the analysis as a MongoDB aggregation (ignores `incremental`)
+
+    Returns:
+        Dict with the number of rows processed and whether the run succeeded
     """
+    rows = 0
     try:
         print(f"Starting ETL pipeline for last {days} days...")
 
-        # Extract
-        print("Extracting data from MongoDB...")
-        df = extract_crypto_data(days=days)
-        print(f"Extracted {len(df)} records")
-        print(f"df: {df.head(1)}")
+        if engine == "mongo":
+            # Only the aggregated results are transferred
+            print("Analyzing data with a MongoDB aggregation...")
+            with ETL_STAGE_SECONDS.time(stage="aggregate"):
+                analysis_results, rows = run_pushdown_analysis(
+                    days=days, current=current
+                )
+        elif current:
+            print("Extracting the current market from MongoDB...")
+            with ETL_STAGE_SECONDS.time(stage="extract"):
+                df = extract_current_market(days=days)
+            rows = len(df)
+
+            print("Transforming and analyzing data...")
+            with ETL_STAGE_SECONDS.time(stage="transform"):
+                analysis_results = transform_data(df)
+        elif incremental:
+            # Extract and merge only what arrived since the last run
+            analysis_results, rows = run_incremental_analysis(
+                days=days, full_rebuild_every=full_rebuild_every
+            )
+        else:
+            # Extract
+            print("Extracting data from MongoDB...")
+            with ETL_STAGE_SECONDS.time(stage="extract"):
+                df = extract_crypto_data(days=days)
+            rows = len(df)
+            print(f"Extracted {len(df)} records")
+            print(f"df: {df.head(1)}")
+
+            # Transform
+            print("Transforming and analyzing data...")
+            with ETL_STAGE_SECONDS.time(stage="transform"):
+                analysis_results = transform_data(df)
+
+        if VOLATILITY_RESOLUTION:
+            print("Analyzing volatility from the price history...")
+            with ETL_STAGE_SECONDS.time(stage="volatility"):
+                analysis_results["volatility_analysis"] = analyze_volatility(
+                    VOLATILITY_RESOLUTION
+                )
 
-        # Transform
-        print("Transforming and analyzing data...")
-        analysis_results = transform_data(df)
-        print(f"analysis_results: {analysis_results}")
+        if CORRELATION_TOP_N:
+            print("Updating return correlations...")
+            with ETL_STAGE_SECONDS.time(stage="correlation"):
+                analysis_results["correlation_analysis"] = update_correlations()
 
         # Load
         print("Saving analysis results to MongoDB...")
-        save_analysis_results(analysis_results)
+        with ETL_STAGE_SECONDS.time(stage="load"):
+            save_analysis_results(analysis_results)
 
-        # Send email
-        print("Sending email...")
-        send_email(
+        # Queue the notification; delivery happens on the dispatcher thread
+        notify(
             subject="ETL pipeline completed successfully!",
-            body=f"ETL pipeline completed successfully! {analysis_results}",
+            body=format_summary(analysis_results, rows),
         )
+        ETL_RUNS.inc(outcome="success")
         print("ETL pipeline completed successfully!")
+        return {"rows": rows, "success": True}
     except Exception as e:
+        ETL_RUNS.inc(outcome="failed")
         print(f"Error: {e}")
-        send_email(
+        notify(
             subject="ETL pipeline failed!",
             body=f"ETL pipeline failed! {e}",
+            level=FAILURE,
         )
+        return {"rows": rows, "success": False, "error": str(e)}
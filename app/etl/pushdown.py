@@ -0,0 +1,198 @@
+from typing import Dict, List, Tuple
+from datetime import datetime, timedelta, timezone
+from app.core.config import COLLECTION_NAME
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.etl.extract import window_query
+from app.etl.transform import RANKING_SPECS, empty_results
+from app.storage.mongo import get_db
+from app.utils.metrics import MONGO_OPERATION_SECONDS
+
+# The cleaning rules of clean_data that MongoDB can evaluate: fill missing
+# values, then drop coins with no market cap or no price. The IsolationForest
+# anomaly filter has no aggregation equivalent and is not applied.
+CLEAN_STAGES: List[Dict] = [
+    {
+        "$project": {
+            "_id": 0,
+            "name": 1,
+            "current_price": 1,
+            "total_volume": 1,
+            "market_cap": {"$ifNull": ["$market_cap", 0]},
+            "price_change_percentage_24h": {
+                "$ifNull": ["$price_change_percentage_24h", 0]
+            },
+            "circulating_supply": {"$ifNull": ["$circulating_supply", 0]},
+            "total_supply": {
+                "$ifNull": ["$total_supply", {"$ifNull": ["$circulating_supply", 0]}]
+            },
+        }
+    },
+    {"$match": {"market_cap": {"$gt": 0}, "current_price": {"$gt": 0}}},
+    {
+        "$set": {
+            # Follows pandas' float division: x / 0 is +/-inf and 0 / 0 is
+            # NaN, here null so $avg and the rankings skip it like pandas
+            "supply_utilization": {
+                "$switch": {
+                    "branches": [
+                        {
+                            "case": {"$ne": ["$total_supply", 0]},
+                            "then": {
+                                "$divide": ["$circulating_supply", "$total_supply"]
+                            },
+                        },
+                        {
+                            "case": {"$gt": ["$circulating_supply", 0]},
+                            "then": float("inf"),
+                        },
+                        {
+                            "case": {"$lt": ["$circulating_supply", 0]},
+                            "then": float("-inf"),
+                        },
+                    ],
+                    "default": None,
+                }
+            }
+        }
+    },
+]
+
+STATS_GROUP = {
+    "$group": {
+        "_id": None,
+        "rows": {"$sum": 1},
+        "total_market_cap": {"$sum": "$market_cap"},
+        "mean_market_cap": {"$avg": "$market_cap"},
+        # pandas' std is the sample standard deviation
+        "std_market_cap": {"$stdDevSamp": "$market_cap"},
+        "median_market_cap": {
+            "$median": {"input": "$market_cap", "method": "approximate"}
+        },
+        "avg_price_change_24h": {"$avg": "$price_change_percentage_24h"},
+        "avg_supply_utilization": {"$avg": "$supply_utilization"},
+    }
+}
+
+
+def _ranking_facet(metric: str, k: int, largest: bool) -> List[Dict]:
+    """Top-k of a metric, skipping documents where it is missing."""
+    return [
+        {"$match": {metric: {"$type": "number"}}},
+        {"$sort": {metric: -1 if largest else 1}},
+        {"$limit": k},
+        {"$project": {"_id": 0, "name": 1, metric: 1}},
+    ]
+
+
+def analysis_pipeline(match: Dict) -> List[Dict]:
+    """
+    Build the aggregation computing every transform_data statistic.
+
+    The cleaned documents are fanned out with $facet into one $group for the
+    statistics and one $sort+$limit per ranking, so only the small result
+    document leaves the server.
+
+    Args:
+        match: MongoDB filter selecting the snapshots to analyze
+
+    Returns:
+        Aggregation pipeline
+    """
+    facets = {"stats": [STATS_GROUP]}
+    for metric, (largest, smallest) in RANKING_SPECS.items():
+        if largest:
+            facets[f"{metric}_largest"] = _ranking_facet(metric, largest, True)
+        if smallest:
+            facets[f"{metric}_smallest"] = _ranking_facet(metric, smallest, False)
+    return [{"$match": match}, *CLEAN_STAGES, {"$facet": facets}]
+
+
+def _float(value) -> float:
+    """Return an aggregated value as a float, NaN where MongoDB returned null."""
+    return float("nan") if value is None else float(value)
+
+
+def _records(facets: Dict, metric: str, direction: str, k: int) -> List[Dict]:
+    return [
+        {"name": doc.get("name"), metric: float(doc[metric])}
+        for doc in facets.get(f"{metric}_{direction}", [])[:k]
+    ]
+
+
+def aggregate_analysis(collection, match: Dict) -> Tuple[Dict, int]:
+    """
+    Analyze the selected snapshots with a MongoDB aggregation.
+
+    Args:
+        collection: Collection holding the snapshots
+        match: MongoDB filter selecting the snapshots to analyze
+
+    Returns:
+        Tuple of (dict with the transform_data structure, rows analyzed)
+    """
+    with MONGO_OPERATION_SECONDS.time(operation="aggregate_analysis"):
+        result = next(collection.aggregate(analysis_pipeline(match)), None)
+    if not result or not result["stats"]:
+        return empty_results(), 0
+
+    stats = result["stats"][0]
+    top_market_cap = _records(result, "market_cap", "largest", 10)
+    top_price_change = _records(result, "price_change_percentage_24h", "largest", 10)
+    analysis_results = {
+        "market_cap_analysis": {
+            "total_market_cap": int(stats["total_market_cap"]),
+            "top_10_market_cap": int(
+                sum(coin["market_cap"] for coin in top_market_cap)
+            ),
+            "market_cap_distribution": {
+                "mean": _float(stats["mean_market_cap"]),
+                "median": _float(stats["median_market_cap"]),
+                "std": _float(stats["std_market_cap"]),
+            },
+        },
+        "price_analysis": {
+            "avg_price_change_24h": _float(stats["avg_price_change_24h"]),
+            "most_volatile": top_price_change[:5],
+            "least_volatile": _records(
+                result, "price_change_percentage_24h", "smallest", 5
+            ),
+        },
+        "supply_analysis": {
+            "avg_supply_utilization": _float(stats["avg_supply_utilization"]),
+            "highest_utilization": _records(result, "supply_utilization", "largest", 5),
+            "lowest_utilization": _records(result, "supply_utilization", "smallest", 5),
+        },
+        "top_performers": {
+            "by_market_cap": top_market_cap,
+            "by_volume": _records(result, "total_volume", "largest", 10),
+            "by_price_change": top_price_change,
+        },
+    }
+    return analysis_results, stats["rows"]
+
+
+def run_pushdown_analysis(
+    days: int = 1, current: bool = False, db=None
+) -> Tuple[Dict, int]:
+    """
+    Analyze the ETL window (or the current market view) inside MongoDB.
+
+    Args:
+        days: Number of days of historical data to analyze
+        current: Analyze the newest snapshot of every coin instead
+        db: Database to read from. Defaults to get_db().
+
+    Returns:
+        Tuple of (dict containing all analysis results, rows analyzed)
+    """
+    db = db if db is not None else get_db()
+    if current:
+        date_threshold = datetime.now(timezone.utc) - timedelta(days=days)
+        collection = db[CURRENT_MARKET_COLLECTION]
+        match = {"last_updated": {"$gte": date_threshold}}
+    else:
+        collection = db[COLLECTION_NAME]
+        match, _ = window_query(collection, days)
+        if match is None:
+            return empty_results(), 0
+    return aggregate_analysis(collection, match)
@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Dict, Optional
+from pymongo import ASCENDING
+from pymongo.database import Database
+from app.storage.mongo import ensure_ttl_index, get_db
+from app.core.config import RESULTS_RETENTION_HOURS, HOURLY_ROLLUP_RETENTION_DAYS
+
+RESULTS_COLLECTION = "analysis_results"
+CURRENT_COLLECTION = "analysis_current"
+CURRENT_ID = "latest"
+ROLLUP_COLLECTIONS = {
+    "hourly": "analysis_rollups_hourly",
+    "daily": "analysis_rollups_daily",
+}
+
+# Rollup metric name -> path into the analysis results
+ROLLUP_METRICS = {
+    "total_market_cap": ("market_cap_analysis", "total_market_cap"),
+    "top_10_market_cap": ("market_cap_analysis", "top_10_market_cap"),
+    "market_cap_mean": ("market_cap_analysis", "market_cap_distribution", "mean"),
+    "market_cap_median": ("market_cap_analysis", "market_cap_distribution", "median"),
+    "market_cap_std": ("market_cap_analysis", "market_cap_distribution", "std"),
+    "avg_price_change_24h": ("price_analysis", "avg_price_change_24h"),
+    "avg_supply_utilization": ("supply_analysis", "avg_supply_utilization"),
+}
+
+
+def ensure_results_indexes(db: Optional[Database] = None) -> None:
+    """
+    Create the TTL index that expires full-resolution results and the
+    retention index on hourly rollups. Daily rollups are kept forever.
+
+    Args:
+        db: Database to index. Defaults to get_db().
+    """
+    db = db if db is not None else get_db()
+    ensure_ttl_index(
+        db[RESULTS_COLLECTION],
+        "timestamp",
+        RESULTS_RETENTION_HOURS * 3600,
+        "timestamp_ttl",
+    )
+    ensure_ttl_index(
+        db[ROLLUP_COLLECTIONS["hourly"]],
+        "bucket",
+        HOURLY_ROLLUP_RETENTION_DAYS * 24 * 3600,
+        "bucket_ttl",
+    )
+    db[ROLLUP_COLLECTIONS["daily"]].create_index([("bucket", ASCENDING)])
+
+
+def _metric_value(analysis_results: Dict, path) -> Optional[float]:
+    value = analysis_results
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    if resolution == "hourly":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def update_rollups(analysis_results: Dict, db: Optional[Database] = None) -> None:
+    """
+    Fold one analysis run into its hourly and daily rollup documents.
+
+    Each bucket keeps count, sum, min, max and last value per metric, so the
+    full-resolution runs can expire without losing the history.
+
+    Args:
+        analysis_results: Results including their timestamp
+        db: Database to write to. Defaults to get_db().
+    """
+    db = db if db is not None else get_db()
+    timestamp = analysis_results["timestamp"]
+    update = {
+        "$inc": {"runs": 1},
+        "$min": {"first_run": timestamp},
+        "$max": {"last_run": timestamp},
+        "$set": {},
+    }
+    for name, path in ROLLUP_METRICS.items():
+        value = _metric_value(analysis_results, path)
+        if value is None or value != value:  # skip missing and NaN
+            continue
+        update["$inc"][f"{name}.count"] = 1
+        update["$inc"][f"{name}.sum"] = value
+        update["$min"][f"{name}.min"] = value
+        update["$max"][f"{name}.max"] = value
+        update["$set"][f"{name}.last"] = value
+
+    update = {op: fields for op, fields in update.items() if fields}
+
+    for resolution, collection_name in ROLLUP_COLLECTIONS.items():
+        bucket = _bucket_start(timestamp, resolution)
+        db[collection_name].update_one(
+            {"_id": bucket},
+            {**update, "$setOnInsert": {"bucket": bucket}},
+            upsert=True,
+        )
+
+
+def update_current(analysis_results: Dict, db: Optional[Database] = None) -> None:
+    """
+    Replace the single "current" document the dashboard reads by key.
+
+    Args:
+        analysis_results: Results including their _id and timestamp
+        db: Database to write to. Defaults to get_db().
+    """
+    db = db if db is not None else get_db()
+    current = {k: v for k, v in analysis_results.items() if k != "_id"}
+    current["result_id"] = analysis_results.get("_id")
+    db[CURRENT_COLLECTION].replace_one(
+        {"_id": CURRENT_ID}, {"_id": CURRENT_ID, **current}, upsert=True
+    )
+
+
+def get_rollups(
+    resolution: str, start: datetime, end: Optional[datetime] = None
+) -> list:
+    """
+    Read rollup buckets in a time range.
+
+    Args:
+        resolution: "hourly" or "daily"
+        start: First bucket to include
+        end: Last bucket to include. Defaults to no upper bound.
+
+    Returns:
+        List of rollup documents ordered by bucket
+    """
+    query = {"bucket": {"$gte": start}}
+    if end is not None:
+        query["bucket"]["$lte"] = end
+    return list(
+        get_db()[ROLLUP_COLLECTIONS[resolution]].find(query).sort("bucket", ASCENDING)
+    )
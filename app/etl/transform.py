@@ -1,23 +1,105 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
-from app.ml.data_cleaner import CryptoDataCleanerModel
+from typing import Dict, List, Optional, Tuple
+from app.core.schema import apply_schema
+from app.ml.registry import get_data_cleaner
+from app.utils.metrics import ANOMALIES_DETECTED
 import os
 
+# Metric -> (number of largest, number of smallest) rows every analysis needs
+RANKING_SPECS: Dict[str, Tuple[int, int]] = {
+    "market_cap": (10, 0),
+    "total_volume": (10, 0),
+    "price_change_percentage_24h": (10, 5),
+    "supply_utilization": (5, 5),
+}
+
+
+def _metric_values(df: pd.DataFrame, metric: str) -> np.ndarray:
+    """Return a metric column as float64, deriving supply_utilization if needed."""
+    if metric in df.columns:
+        return df[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+    if metric == "supply_utilization":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _metric_values(df, "circulating_supply") / _metric_values(
+                df, "total_supply"
+            )
+    raise KeyError(metric)
+
+
+def rank_metrics(
+    df: pd.DataFrame, specs: Dict[str, Tuple[int, int]] = RANKING_SPECS
+) -> Dict[str, Dict[str, List[Dict]]]:
+    """
+    Compute every requested top-k and bottom-k ranking.
+
+    Every ranking runs np.argpartition over the metric's non-missing values
+    (negated for "largest"), an O(rows) selection instead of a full sort.
+    Ties keep the earlier row first and NaNs are skipped, like
+    nlargest/nsmallest.
+
+    Args:
+        df: DataFrame containing cryptocurrency data
+        specs: Metric -> (number of largest, number of smallest) rows
 
-def analyze_market_cap(df: pd.DataFrame) -> Dict:
+    Returns:
+        Dict of metric -> {"largest": records, "smallest": records}, where
+        records are {"name": ..., metric: ...} dicts sorted best first
+    """
+    rankings = {metric: {"largest": [], "smallest": []} for metric in specs}
+    if not len(df):
+        return rankings
+
+    names = df["name"]
+    for metric, (n_largest, n_smallest) in specs.items():
+        if not (n_largest or n_smallest):
+            continue
+        values = _metric_values(df, metric)
+        # Missing values are left out rather than replaced by a sentinel,
+        # which would tie with real +/-inf values
+        valid = np.flatnonzero(~np.isnan(values))
+        for direction, k, keys in (
+            ("largest", n_largest, -values[valid]),
+            ("smallest", n_smallest, values[valid]),
+        ):
+            k = min(k, len(valid))
+            if not k:
+                continue
+            if k < len(valid):
+                chosen = np.argpartition(keys, k - 1)[:k]
+                # Rows outside the partition can only tie with the cut-off
+                # value; re-pick the tied rows so the earliest ones win
+                cutoff = keys[chosen].max()
+                below = chosen[keys[chosen] < cutoff]
+                tied = np.flatnonzero(keys == cutoff)[: k - len(below)]
+                chosen = np.concatenate([below, tied])
+            else:
+                chosen = np.arange(len(valid))
+            rows = valid[chosen[np.lexsort((chosen, keys[chosen]))]]
+            rankings[metric][direction] = [
+                {"name": name, metric: float(value)}
+                for name, value in zip(names.iloc[rows].tolist(), values[rows])
+            ]
+    return rankings
+
+
+def analyze_market_cap(df: pd.DataFrame, rankings: Optional[Dict] = None) -> Dict:
     """
     Analyze market cap distribution and statistics.
 
     Args:
         df: DataFrame containing cryptocurrency data
+        rankings: Output of rank_metrics, computed if not given
 
     Returns:
         Dict containing market cap analysis results
     """
+    if rankings is None:
+        rankings = rank_metrics(df, {"market_cap": (10, 0)})
+    top_10 = rankings["market_cap"]["largest"][:10]
     market_cap_stats = {
         "total_market_cap": int(df["market_cap"].sum()),
-        "top_10_market_cap": int(df.nlargest(10, "market_cap")["market_cap"].sum()),
+        "top_10_market_cap": int(sum(coin["market_cap"] for coin in top_10)),
         "market_cap_distribution": {
             "mean": float(df["market_cap"].mean()),
             "median": float(df["market_cap"].median()),
@@ -27,176 +109,219 @@ def analyze_market_cap(df: pd.DataFrame) -> Dict:
     return market_cap_stats
 
 
-def analyze_price_changes(df: pd.DataFrame) -> Dict:
+def analyze_price_changes(df: pd.DataFrame, rankings: Optional[Dict] = None) -> Dict:
     """
     Analyze price changes and volatility.
 
     Args:
         df: DataFrame containing cryptocurrency data
+        rankings: Output of rank_metrics, computed if not given
 
     Returns:
         Dict containing price change analysis results
     """
+    if rankings is None:
+        rankings = rank_metrics(df, {"price_change_percentage_24h": (5, 5)})
+    price_change = rankings["price_change_percentage_24h"]
     price_stats = {
         "avg_price_change_24h": float(df["price_change_percentage_24h"].mean()),
-        "most_volatile": df.nlargest(5, "price_change_percentage_24h")[
-            ["name", "price_change_percentage_24h"]
-        ].to_dict("records"),
-        "least_volatile": df.nsmallest(5, "price_change_percentage_24h")[
-            ["name", "price_change_percentage_24h"]
-        ].to_dict("records"),
+        "most_volatile": price_change["largest"][:5],
+        "least_volatile": price_change["smallest"][:5],
     }
     return price_stats
 
 
-def analyze_supply_metrics(df: pd.DataFrame) -> Dict:
+def analyze_supply_metrics(df: pd.DataFrame, rankings: Optional[Dict] = None) -> Dict:
     """
     Analyze supply metrics and utilization.
 
     Args:
         df: DataFrame containing cryptocurrency data
+        rankings: Output of rank_metrics, computed if not given
 
     Returns:
         Dict containing supply analysis results
     """
-    # Calculate supply utilization
-    df["supply_utilization"] = df["circulating_supply"] / df["total_supply"]
+    # Supply utilization is derived on the fly; the input is not modified
+    supply_utilization = pd.Series(_metric_values(df, "supply_utilization"))
 
+    if rankings is None:
+        rankings = rank_metrics(df, {"supply_utilization": (5, 5)})
+    utilization = rankings["supply_utilization"]
     supply_stats = {
-        "avg_supply_utilization": float(df["supply_utilization"].mean()),
-        "highest_utilization": df.nlargest(5, "supply_utilization")[
-            ["name", "supply_utilization"]
-        ].to_dict("records"),
-        "lowest_utilization": df.nsmallest(5, "supply_utilization")[
-            ["name", "supply_utilization"]
-        ].to_dict("records"),
+        "avg_supply_utilization": float(supply_utilization.mean()),
+        "highest_utilization": utilization["largest"][:5],
+        "lowest_utilization": utilization["smallest"][:5],
     }
     return supply_stats
 
 
-def get_top_performers(df: pd.DataFrame) -> Dict:
+def get_top_performers(df: pd.DataFrame, rankings: Optional[Dict] = None) -> Dict:
     """
     Get top performing cryptocurrencies by various metrics.
 
     Args:
         df: DataFrame containing cryptocurrency data
+        rankings: Output of rank_metrics, computed if not given
 
     Returns:
         Dict containing top performers by different metrics
     """
+    if rankings is None:
+        rankings = rank_metrics(
+            df,
+            {
+                "market_cap": (10, 0),
+                "total_volume": (10, 0),
+                "price_change_percentage_24h": (10, 0),
+            },
+        )
     top_performers = {
-        "by_market_cap": df.nlargest(10, "market_cap")[["name", "market_cap"]].to_dict(
-            "records"
-        ),
-        "by_volume": df.nlargest(10, "total_volume")[["name", "total_volume"]].to_dict(
-            "records"
-        ),
-        "by_price_change": df.nlargest(10, "price_change_percentage_24h")[
-            ["name", "price_change_percentage_24h"]
-        ].to_dict("records"),
+        "by_market_cap": rankings["market_cap"]["largest"][:10],
+        "by_volume": rankings["total_volume"]["largest"][:10],
+        "by_price_change": rankings["price_change_percentage_24h"]["largest"][:10],
     }
     return top_performers
 
 
-def transform_data(df: pd.DataFrame) -> Dict:
+def empty_results() -> Dict:
     """
-    Main transformation function that combines all analyses.
-
-    Args:
-        df: DataFrame containing cryptocurrency data
+    Analysis results returned when there is no data to analyze.
 
     Returns:
-        Dict containing all analysis results
+        Dict with the transform_data structure and zero/empty values
     """
-    # Check if DataFrame is empty
-    if df.empty:
-        print("Warning: Empty DataFrame received")
-        return {
-            "market_cap_analysis": {
-                "total_market_cap": 0,
-                "top_10_market_cap": 0,
-                "market_cap_distribution": {"mean": 0, "median": 0, "std": 0},
-            },
-            "price_analysis": {
-                "avg_price_change_24h": 0,
-                "most_volatile": [],
-                "least_volatile": [],
-            },
-            "supply_analysis": {
-                "avg_supply_utilization": 0,
-                "highest_utilization": [],
-                "lowest_utilization": [],
-            },
-            "top_performers": {
-                "by_market_cap": [],
-                "by_volume": [],
-                "by_price_change": [],
-            },
-        }
+    return {
+        "market_cap_analysis": {
+            "total_market_cap": 0,
+            "top_10_market_cap": 0,
+            "market_cap_distribution": {"mean": 0, "median": 0, "std": 0},
+        },
+        "price_analysis": {
+            "avg_price_change_24h": 0,
+            "most_volatile": [],
+            "least_volatile": [],
+        },
+        "supply_analysis": {
+            "avg_supply_utilization": 0,
+            "highest_utilization": [],
+            "lowest_utilization": [],
+        },
+        "top_performers": {
+            "by_market_cap": [],
+            "by_volume": [],
+            "by_price_change": [],
+        },
+    }
+
+
+def _numeric_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Return a schema-typed column as a float array with NaN for missing values."""
+    values = df[column]
+    dtype = values.dtype if values.dtype.kind == "f" else np.float64
+    return values.to_numpy(dtype=dtype, na_value=np.nan)
+
+
+def _fill_missing(values: np.ndarray, fill) -> np.ndarray:
+    """Return a new array with NaNs replaced by fill (a scalar or an array)."""
+    return np.where(np.isnan(values), fill, values).astype(values.dtype, copy=False)
 
-    # Create a copy to avoid modifying the original
-    df = df.copy()
 
-    # Initialize the data cleaner
-    data_cleaner = CryptoDataCleanerModel(contamination=0.1)
+def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove anomalies, duplicates and invalid rows from extracted data.
+
+    Every rule is evaluated on NumPy arrays into a single validity mask, and
+    the cleaned frame is materialized once from it. Frames that were not
+    built with the market schema are coerced to it first. The input is never
+    modified.
+
+    Args:
+        df: DataFrame containing cryptocurrency data
 
-    # Try to load existing model, if not available, train a new one
-    model_path = "app/ml/models/data_cleaner.joblib"
-    try:
-        data_cleaner.load_model(model_path)
-    except:
-        print("Training new data cleaning model...")
-        data_cleaner.fit(df)
-        data_cleaner.save_model(model_path)
+    Returns:
+        Cleaned DataFrame
+    """
+    df = apply_schema(df)
 
-    # Clean the data using ML model
-    cleaned_df, anomalous_df = data_cleaner.predict(df)
+    # Get the resident data cleaner, trained on this data if no model exists
+    data_cleaner = get_data_cleaner(training_df=df)
+    normal_mask = data_cleaner.predict_mask(df)
 
     # Log the number of anomalies detected
-    print(
-        f"Detected {len(anomalous_df)} anomalous data points out of {len(df)} total records"
+    anomalies = len(df) - int(normal_mask.sum())
+    ANOMALIES_DETECTED.inc(anomalies)
+    print(f"Detected {anomalies} anomalous data points out of {len(df)} total records")
+
+    # Fill missing values in the numeric columns
+    current_price = _numeric_column(df, "current_price")
+    market_cap = _fill_missing(_numeric_column(df, "market_cap"), 0.0)
+    circulating_supply = _fill_missing(_numeric_column(df, "circulating_supply"), 0.0)
+    total_supply = _fill_missing(
+        _numeric_column(df, "total_supply"), circulating_supply
     )
-
-    # Remove duplicates based on id and timestamps
-    cleaned_df = cleaned_df.drop_duplicates(subset=["id", "last_updated"], keep="last")
-
-    # Handle remaining missing values
-    cleaned_df["price_change_percentage_24h"] = cleaned_df[
-        "price_change_percentage_24h"
-    ].fillna(0)
-    cleaned_df["market_cap"] = cleaned_df["market_cap"].fillna(0)
-    cleaned_df["circulating_supply"] = cleaned_df["circulating_supply"].fillna(0)
-    cleaned_df["total_supply"] = cleaned_df["total_supply"].fillna(
-        cleaned_df["circulating_supply"]
+    price_change = _fill_missing(
+        _numeric_column(df, "price_change_percentage_24h"), 0.0
     )
 
-    # Remove rows with invalid data
-    cleaned_df = cleaned_df[
-        cleaned_df["market_cap"] > 0
-    ]  # Remove coins with no market cap
-    cleaned_df = cleaned_df[
-        cleaned_df["current_price"] > 0
-    ]  # Remove coins with no price
-
-    # Convert numeric columns to appropriate types
-    numeric_cols = [
-        "current_price",
-        "market_cap",
-        "circulating_supply",
-        "total_supply",
-        "price_change_percentage_24h",
-    ]
-    cleaned_df[numeric_cols] = cleaned_df[numeric_cols].apply(
-        pd.to_numeric, errors="coerce"
-    )
+    # Among normal rows, keep the last snapshot of each (id, last_updated)
+    normal_rows = np.flatnonzero(normal_mask)
+    duplicated = np.zeros(len(df), dtype=bool)
+    duplicated[normal_rows] = pd.DataFrame(
+        {
+            "id": pd.factorize(df["id"])[0][normal_rows],
+            "last_updated": pd.factorize(df["last_updated"])[0][normal_rows],
+        }
+    ).duplicated(keep="last")
+
+    # Remove coins with no market cap or no price
+    valid = normal_mask & ~duplicated & (market_cap > 0) & (current_price > 0)
+
+    overrides = {
+        "current_price": current_price,
+        "market_cap": market_cap,
+        "circulating_supply": circulating_supply,
+        "total_supply": total_supply,
+        "price_change_percentage_24h": price_change,
+    }
+    columns = {
+        column: (
+            overrides[column][valid] if column in overrides else df[column].array[valid]
+        )
+        for column in df.columns
+    }
+    cleaned_df = pd.DataFrame(columns, index=df.index[valid], copy=False)
 
     # Calculate additional metrics
     cleaned_df["market_cap_rank"] = cleaned_df["market_cap"].rank(ascending=False)
-    cleaned_df["price_volatility"] = cleaned_df["price_change_percentage_24h"].abs()
+    cleaned_df["price_volatility"] = np.abs(columns["price_change_percentage_24h"])
+
+    return cleaned_df
+
+
+def transform_data(df: pd.DataFrame) -> Dict:
+    """
+    Main transformation function that combines all analyses.
+
+    Args:
+        df: DataFrame containing cryptocurrency data
+
+    Returns:
+        Dict containing all analysis results
+    """
+    # Check if DataFrame is empty
+    if df.empty:
+        print("Warning: Empty DataFrame received")
+        return empty_results()
+
+    cleaned_df = clean_data(df)
+
+    # Every top-k/bottom-k the analyses report, in a single selection pass
+    rankings = rank_metrics(cleaned_df)
 
     return {
-        "market_cap_analysis": analyze_market_cap(cleaned_df),
-        "price_analysis": analyze_price_changes(cleaned_df),
-        "supply_analysis": analyze_supply_metrics(cleaned_df),
-        "top_performers": get_top_performers(cleaned_df),
+        "market_cap_analysis": analyze_market_cap(cleaned_df, rankings),
+        "price_analysis": analyze_price_changes(cleaned_df, rankings),
+        "supply_analysis": analyze_supply_metrics(cleaned_df, rankings),
+        "top_performers": get_top_performers(cleaned_df, rankings),
     }
@@ -0,0 +1,331 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from pymongo.database import Database
+from app.core.config import EXTRACT_BATCH_SIZE
+from app.data.bars import BAR_RESOLUTIONS
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.etl.transform import rank_metrics
+from app.storage.mongo import get_db
+from app.utils.metrics import MONGO_OPERATION_SECONDS
+
+# Rolling windows the analysis reports; windows shorter than two bars of the
+# chosen resolution are skipped
+WINDOWS: Dict[str, timedelta] = {
+    "24h": timedelta(days=1),
+    "3d": timedelta(days=3),
+    "7d": timedelta(days=7),
+}
+
+# A window's volatility needs at least this fraction of its returns
+MIN_PERIODS_FRACTION = 0.5
+
+# Coins are processed in row blocks so the rolling arrays stay bounded
+BLOCK_ROWS = 64
+
+# Coins whose newest bar is older than this many bars are left out
+STALE_BARS = 2
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def build_price_panel(
+    ids: np.ndarray,
+    times: np.ndarray,
+    prices: np.ndarray,
+    start: np.datetime64,
+    step: np.timedelta64,
+    periods: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pivot (coin, time, price) observations into a dense coins x time panel.
+
+    Each observation goes to the grid cell containing its time; when a cell
+    has several, the latest one wins. Cells without an observation are NaN.
+
+    Args:
+        ids: Coin id of every observation
+        times: datetime64[ns] time of every observation
+        prices: Price of every observation
+        start: Start of the first grid cell
+        step: Grid cell length
+        periods: Number of grid cells
+
+    Returns:
+        Tuple of (coin ids, float64 panel of shape (coins, periods))
+    """
+    codes, coin_ids = pd.factorize(ids)
+    times = times.astype("datetime64[ns]").view(np.int64)
+    step_ns = int(step / np.timedelta64(1, "ns"))
+    cells = (times - start.astype("datetime64[ns]").astype(np.int64)) // step_ns
+    prices = np.asarray(prices, dtype=np.float64)
+    keep = (cells >= 0) & (cells < periods) & (prices > 0)
+    keys = codes[keep].astype(np.int64) * periods + cells[keep]
+    times, prices = times[keep], prices[keep]
+
+    # Scatter the latest time of every cell, then keep the rows that have it;
+    # cheaper than sorting the observations
+    latest = np.full(len(coin_ids) * periods, np.iinfo(np.int64).min)
+    np.maximum.at(latest, keys, times)
+    newest = times == latest[keys]
+
+    panel = np.full((len(coin_ids), periods), np.nan)
+    panel.flat[keys[newest]] = prices[newest]
+    return np.asarray(coin_ids), panel
+
+
+def forward_fill(panel: np.ndarray) -> np.ndarray:
+    """Carry the last observed price forward along the time axis."""
+    observed = ~np.isnan(panel)
+    source = np.where(observed, np.arange(panel.shape[1]), 0)
+    np.maximum.accumulate(source, axis=1, out=source)
+    return np.take_along_axis(panel, source, axis=1)
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """Log returns between consecutive grid cells, shape (coins, periods - 1)."""
+    with np.errstate(invalid="ignore"):
+        return np.diff(np.log(prices), axis=1)
+
+
+def cumulative_squares(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cumulative sums of squared returns and of observed return counts.
+
+    Both arrays have a leading zero column, so the sum over returns
+    [i, j) of any window is sums[:, j] - sums[:, i]. Missing returns count
+    as zero.
+
+    Args:
+        returns: Log returns of shape (coins, periods)
+
+    Returns:
+        Tuple of (squared return sums, counts), each (coins, periods + 1)
+    """
+    observed = ~np.isnan(returns)
+    squares = np.zeros((returns.shape[0], returns.shape[1] + 1))
+    counts = np.zeros((returns.shape[0], returns.shape[1] + 1))
+    np.cumsum(np.where(observed, returns, 0.0) ** 2, axis=1, out=squares[:, 1:])
+    np.cumsum(observed, axis=1, out=counts[:, 1:])
+    return squares, counts
+
+
+def rolling_volatility(
+    squares: np.ndarray, counts: np.ndarray, window: int, periods_per_year: float
+) -> np.ndarray:
+    """
+    Annualized realized volatility over every trailing window of returns.
+
+    Realized variance is the mean squared log return, so windows with a few
+    missing returns are scaled instead of biased towards zero. Windows with
+    fewer than MIN_PERIODS_FRACTION of their returns are NaN. Pass the last
+    window + 1 columns of the cumulative sums to get only the latest value.
+
+    Args:
+        squares: Cumulative squared return sums from cumulative_squares
+        counts: Cumulative return counts from cumulative_squares
+        window: Window length in returns
+        periods_per_year: Grid cells per year, for annualization
+
+    Returns:
+        Array of shape (coins, columns - window); column j covers returns
+        [j, j + window)
+    """
+    observed = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (squares[:, window:] - squares[:, :-window]) / observed
+    variance[observed < window * MIN_PERIODS_FRACTION] = np.nan
+    # Cancellation in the cumulative sums can leave tiny negative values
+    return np.sqrt(np.maximum(variance, 0.0) * periods_per_year)
+
+
+def momentum(log_prices: np.ndarray, window: int) -> np.ndarray:
+    """Log price change over every trailing window, shape (coins, periods - window)."""
+    return log_prices[:, window:] - log_prices[:, :-window]
+
+
+def drawdowns(prices: np.ndarray) -> np.ndarray:
+    """Fraction below the running peak price (0 at a new high, negative below)."""
+    peaks = np.fmax.accumulate(prices, axis=1)
+    with np.errstate(invalid="ignore"):
+        return prices / peaks - 1.0
+
+
+def window_periods(step_seconds: int) -> Dict[str, int]:
+    """Length of every reported window in grid cells, skipping too short ones."""
+    periods = {
+        label: int(window.total_seconds()) // step_seconds
+        for label, window in WINDOWS.items()
+    }
+    return {label: count for label, count in periods.items() if count >= 2}
+
+
+def panel_metrics(panel: np.ndarray, step_seconds: int) -> Dict[str, np.ndarray]:
+    """
+    Compute the latest volatility and momentum of every window and the
+    maximum drawdown of every coin.
+
+    Args:
+        panel: Price panel from build_price_panel
+        step_seconds: Grid cell length in seconds
+
+    Returns:
+        Dict of metric name -> array with one value per coin
+    """
+    windows = window_periods(step_seconds)
+    periods_per_year = SECONDS_PER_YEAR / step_seconds
+    n_coins, n_periods = panel.shape
+    metrics = {
+        f"{kind}_{label}": np.full(n_coins, np.nan)
+        for label in windows
+        for kind in ("volatility", "momentum")
+    }
+    metrics["max_drawdown"] = np.full(n_coins, np.nan)
+
+    for block in range(0, n_coins, BLOCK_ROWS):
+        rows = slice(block, block + BLOCK_ROWS)
+        prices = forward_fill(panel[rows])
+        log_prices = np.log(prices)
+        squares, counts = cumulative_squares(np.diff(log_prices, axis=1))
+        for label, window in windows.items():
+            if window < n_periods:
+                # Only the latest window of each rolling series is reported
+                latest = slice(-window - 1, None)
+                metrics[f"volatility_{label}"][rows] = rolling_volatility(
+                    squares[:, latest], counts[:, latest], window, periods_per_year
+                )[:, 0]
+                metrics[f"momentum_{label}"][rows] = momentum(
+                    log_prices[:, latest], window
+                )[:, 0]
+        metrics["max_drawdown"][rows] = np.fmin.reduce(drawdowns(prices), axis=1)
+    return metrics
+
+
+def summarize_panel(
+    names: np.ndarray, panel: np.ndarray, step_seconds: int, resolution: str
+) -> Dict:
+    """
+    Rank the coins of a price panel by volatility, momentum and drawdown.
+
+    Args:
+        names: Display name of every panel row
+        panel: Price panel from build_price_panel
+        step_seconds: Grid cell length in seconds
+        resolution: Bar resolution the panel was built from
+
+    Returns:
+        Dict with the volatility analysis results
+    """
+    # Coins that stopped updating would look flat, so they are left out
+    observed = ~np.isnan(panel[:, -STALE_BARS:])
+    current = observed.any(axis=1)
+    metrics = panel_metrics(panel[current], step_seconds)
+    df = pd.DataFrame({"name": names[current], **metrics})
+
+    windows = list(window_periods(step_seconds))
+    specs = {f"volatility_{label}": (5, 5) for label in windows}
+    specs.update({f"momentum_{label}": (5, 5) for label in windows})
+    specs["max_drawdown"] = (0, 5)
+    rankings = rank_metrics(df, specs)
+
+    return {
+        "resolution": resolution,
+        "coins": int(current.sum()),
+        "windows": {
+            label: {
+                "median_volatility": float(df[f"volatility_{label}"].median()),
+                "most_volatile": rankings[f"volatility_{label}"]["largest"],
+                "least_volatile": rankings[f"volatility_{label}"]["smallest"],
+                "top_momentum": rankings[f"momentum_{label}"]["largest"],
+                "bottom_momentum": rankings[f"momentum_{label}"]["smallest"],
+            }
+            for label in windows
+        },
+        "largest_drawdown": rankings["max_drawdown"]["smallest"],
+    }
+
+
+def load_price_panel(
+    resolution: str, db: Optional[Database] = None, now: Optional[datetime] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the close price panel covering the longest window from stored bars.
+
+    Args:
+        resolution: Bar resolution ("1m", "1h" or "1d")
+        db: Database to read from. Defaults to get_db().
+        now: Current time (for tests)
+
+    Returns:
+        Tuple of (coin ids, price panel)
+    """
+    db = db if db is not None else get_db()
+    collection_name, step_seconds, _ = BAR_RESOLUTIONS[resolution]
+    periods = max(window_periods(step_seconds).values(), default=1) + 1
+    now = now or datetime.now(timezone.utc)
+    epoch = int(now.timestamp())
+    end = epoch - epoch % step_seconds
+    start = datetime.fromtimestamp(end - (periods - 1) * step_seconds, tz=timezone.utc)
+
+    ids: List[str] = []
+    times: List[datetime] = []
+    prices: List[float] = []
+    with MONGO_OPERATION_SECONDS.time(operation="find_bars"):
+        cursor = (
+            db[collection_name]
+            .find(
+                {"bucket": {"$gte": start}},
+                {"_id": 0, "id": 1, "bucket": 1, "close": 1},
+            )
+            .batch_size(EXTRACT_BATCH_SIZE)
+        )
+        while True:
+            batch = list(islice(cursor, EXTRACT_BATCH_SIZE))
+            if not batch:
+                break
+            ids.extend(doc["id"] for doc in batch)
+            times.extend(doc["bucket"] for doc in batch)
+            prices.extend(
+                np.nan if doc.get("close") is None else doc["close"] for doc in batch
+            )
+
+    return build_price_panel(
+        np.array(ids, dtype=object),
+        pd.to_datetime(times, utc=True).to_numpy(dtype="datetime64[ns]"),
+        np.array(prices, dtype=np.float64),
+        np.datetime64(start.replace(tzinfo=None), "ns"),
+        np.timedelta64(step_seconds, "s"),
+        periods,
+    )
+
+
+def analyze_volatility(resolution: str = "1h", db: Optional[Database] = None) -> Dict:
+    """
+    Analyze realized volatility, momentum and drawdowns from the stored bars.
+
+    Args:
+        resolution: Bar resolution of the price panel
+        db: Database to read from. Defaults to get_db().
+
+    Returns:
+        Dict with the volatility analysis results
+    """
+    db = db if db is not None else get_db()
+    coin_ids, panel = load_price_panel(resolution, db)
+    print(f"Built a {panel.shape[0]} x {panel.shape[1]} {resolution} price panel")
+
+    # Bars only carry the coin id; names come from the current market view
+    names = {
+        doc["_id"]: doc.get("name") or doc["_id"]
+        for doc in db[CURRENT_MARKET_COLLECTION].find(
+            {"_id": {"$in": coin_ids.tolist()}}, {"name": 1}
+        )
+    }
+    display_names = np.array(
+        [names.get(coin_id, coin_id) for coin_id in coin_ids], dtype=object
+    )
+    return summarize_panel(
+        display_names, panel, BAR_RESOLUTIONS[resolution][1], resolution
+    )
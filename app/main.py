@@ -1,13 +1,26 @@
 # app/main.py
 import argparse
+import os
 import subprocess
 import signal
+import socket
 import sys
+import threading
 
+from pymongo.errors import PyMongoError
+from app.core.config import ANALYSIS_ENGINE
 from app.data.extract import fetch_and_store_data
+from app.data.bars import backfill_bars, ensure_bar_indexes
+from app.data.current import backfill_current_market
+from app.data.migrate import migrate_timestamps
+from app.data.store import ensure_indexes
 from app.etl.pipeline import run_etl_pipeline
+from app.etl.retention import ensure_results_indexes
 from app.visualization.dashboards import run_dashboard_server
 from app.scheduler.tasks import schedule_tasks
+from app.storage.mongo import close_clients
+from app.utils.metrics import start_publisher
+from app.utils.notifications import dispatcher
 
 
 def signal_handler(signum, frame):
@@ -15,6 +28,17 @@ def signal_handler(signum, frame):
     print("\nShutting down scheduler...")
     if "scheduler" in globals():
         scheduler.shutdown()
+    if "worker_process" in globals() and worker_process.poll() is None:
+        print("Stopping worker process...")
+        worker_process.terminate()
+        try:
+            worker_process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker_process.kill()
+    print("Flushing notifications...")
+    dispatcher.close()
+    print("Closing MongoDB connections...")
+    close_clients()
     sys.exit(0)
 
 
@@ -22,7 +46,7 @@ def main():
     parser = argparse.ArgumentParser(description="Cryptocurrency Data Pipeline")
     parser.add_argument(
         "--mode",
-        choices=["fetch", "etl", "dashboard"],
+        choices=["fetch", "etl", "dashboard", "worker", "migrate"],
         default="dashboard",
         help="Operation mode",
     )
@@ -31,24 +55,109 @@ def main():
         "--per-page", type=int, default=100, help="Items per page to fetch"
     )
     parser.add_argument("--delay", type=int, default=1, help="Delay between requests")
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Pages fetched in parallel"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Max requests per second (defaults to 1/delay)",
+    )
+    parser.add_argument(
+        "--changes-only",
+        action="store_true",
+        help="Only store rows that changed since the last stored snapshot",
+    )
     parser.add_argument("--days", type=int, default=1, help="Days of data to process")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process data fetched since the last ETL run",
+    )
+    parser.add_argument(
+        "--full-rebuild-every",
+        type=int,
+        default=120,
+        help="Incremental runs between full rebuilds",
+    )
+    parser.add_argument(
+        "--current",
+        action="store_true",
+        help="Analyze the newest snapshot of every coin instead of the window",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "mongo"],
+        default=ANALYSIS_ENGINE,
+        help="Run the analysis in pandas or as a MongoDB aggregation",
+    )
     parser.add_argument("--debug", action="store_true", help="Run in debug mode")
     parser.add_argument("--port", type=int, default=8080, help="Port for dashboard")
+    parser.add_argument(
+        "--with-worker",
+        action="store_true",
+        help="Start a worker process alongside the dashboard",
+    )
 
     args = parser.parse_args()
 
+    if args.mode == "migrate":
+        migrate_timestamps()
+        backfill_bars()
+        backfill_current_market()
+        close_clients()
+        return
+
+    try:
+        ensure_indexes()
+        ensure_results_indexes()
+        ensure_bar_indexes()
+    except PyMongoError as e:
+        print(f"Warning: could not create MongoDB indexes: {e}")
+
     if args.mode == "fetch":
-        fetch_and_store_data(pages=args.pages, per_page=args.per_page, delay=args.delay)
+        fetch_and_store_data(
+            pages=args.pages,
+            per_page=args.per_page,
+            delay=args.delay,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            changes_only=args.changes_only,
+        )
+        close_clients()
     elif args.mode == "etl":
-        run_etl_pipeline(days=args.days)
-    elif args.mode == "dashboard":
+        run_etl_pipeline(
+            days=args.days,
+            incremental=args.incremental,
+            full_rebuild_every=args.full_rebuild_every,
+            current=args.current,
+            engine=args.engine,
+        )
+        dispatcher.close()
+        close_clients()
+    elif args.mode == "worker":
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
 
-        # Start the scheduler
+        # Run the fetch and ETL jobs until a shutdown signal arrives
         global scheduler
         scheduler = schedule_tasks()
+        start_publisher(f"worker@{socket.gethostname()}")
+        threading.Event().wait()
+    elif args.mode == "dashboard":
+        # Set up signal handlers for graceful shutdown
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        # The dashboard process only serves; jobs run in the worker process.
+        # With the debug reloader, only the outer process starts the worker.
+        if args.with_worker and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+            global worker_process
+            worker_process = subprocess.Popen(
+                [sys.executable, "-m", "app.main", "--mode", "worker"]
+            )
 
         # Run the dashboard
         run_dashboard_server(debug=args.debug, port=args.port)
@@ -60,30 +169,65 @@ if __name__ == "__main__":
     main()
 
 """
-usage: main.py [-h] [--mode {fetch,etl,dashboard}] [--pages PAGES] [--per-page PER_PAGE] [--delay DELAY] [--days DAYS] [--debug] [--port PORT]
+usage: main.py [-h] [--mode {fetch,etl,dashboard,worker,migrate}] [--pages PAGES] [--per-page PER_PAGE] [--delay DELAY] [--concurrency CONCURRENCY] [--rate RATE] [--changes-only] [--days DAYS] [--incremental] [--full-rebuild-every FULL_REBUILD_EVERY] [--current] [--engine {pandas,mongo}] [--debug] [--port PORT] [--with-worker]
 
 Cryptocurrency Data Pipeline
 
 options:
   -h, --help            show this help message and exit
-  --mode {fetch,etl,dashboard}
+  --mode {fetch,etl,dashboard,worker,migrate}
                         Operation mode
   --pages PAGES         Number of pages to fetch
   --per-page PER_PAGE   Items per page to fetch
   --delay DELAY         Delay between requests
+  --concurrency CONCURRENCY
+                        Pages fetched in parallel
+  --rate RATE           Max requests per second (defaults to 1/delay)
+  --changes-only        Only store rows that changed since the last stored snapshot
   --days DAYS           Days of data to process
+  --incremental         Only process data fetched since the last ETL run
+  --full-rebuild-every FULL_REBUILD_EVERY
+                        Incremental runs between full rebuilds
+  --current             Analyze the newest snapshot of every coin instead of the window
+  --engine {pandas,mongo}
+                        Run the analysis in pandas or as a MongoDB aggregation
   --debug               Run in debug mode
   --port PORT           Port for dashboard
+  --with-worker         Start a worker process alongside the dashboard
   
   
 Example:
 
-# Dashboard
+# Dashboard (serving only)
 python -m app.main --mode dashboard --debug --port 8051
 
+# Scheduled fetch and ETL jobs
+python -m app.main --mode worker
+
+# Dashboard and worker from one command
+python -m app.main --mode dashboard --port 8080 --with-worker
+
 # ETL
 python -m app.main --mode etl --days 1
 
+# Incremental ETL, rebuilding from the 30-day window every 120 runs
+python -m app.main --mode etl --days 30 --incremental
+
+# Analyze the newest snapshot of every coin updated in the last day
+python -m app.main --mode etl --days 1 --current
+
+# Run the analysis inside MongoDB instead of pandas
+python -m app.main --mode etl --days 1 --engine mongo
+
+# Convert string timestamps from older data to BSON dates (run once)
+python -m app.main --mode migrate
+
 # Fetch
 python -m app.main --mode fetch --pages 5 --per-page 50 --delay 2
+
+# Fetch, storing only changed rows
+python -m app.main --mode fetch --pages 20 --per-page 250 --changes-only
+
+# Fetch 4 pages at a time, at most 0.5 requests per second
+python -m app.main --mode fetch --pages 20 --per-page 250 --concurrency 4 --rate 0.5
 """
@@ -2,9 +2,15 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional
+from pathlib import Path
 import joblib
+from joblib import Parallel, delayed
 import os
+from app.core.config import DATA_CLEANER_N_JOBS, DATA_CLEANER_CHUNK_SIZE
+from app.core.schema import FEATURE_COLUMNS
+
+MODEL_PATH = Path(__file__).resolve().parent / "models" / "data_cleaner.joblib"
 
 
 class CryptoDataCleanerModel:
@@ -31,17 +37,8 @@ class CryptoDataCleanerModel:
         Returns:
             Scaled features array
         """
-        # Select relevant features for anomaly detection
-        features = [
-            "current_price",
-            "market_cap",
-            "circulating_supply",
-            "total_supply",
-            "price_change_percentage_24h",
-        ]
-
-        # Handle missing values
-        X = df[features].fillna(0)
+        # Handle missing values in the features used for anomaly detection
+        X = df[FEATURE_COLUMNS].fillna(0)
 
         # Scale the features
         if not self.is_fitted:
@@ -62,35 +59,81 @@ class CryptoDataCleanerModel:
         self.model.fit(X)
         self.is_fitted = True
 
-    def predict(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def score(
+        self,
+        df: pd.DataFrame,
+        n_jobs: Optional[int] = DATA_CLEANER_N_JOBS,
+        chunk_size: int = DATA_CLEANER_CHUNK_SIZE,
+    ) -> np.ndarray:
         """
-        Predict anomalies in the data and return cleaned and anomalous data separately.
+        Compute the anomaly decision score of every row.
+
+        Large frames are split into chunks that are scored on a thread pool;
+        tree traversal releases the GIL, so chunks run in parallel without
+        copying the model into worker processes.
 
         Args:
             df: Input DataFrame
+            n_jobs: Number of threads (-1 for all cores, None for 1)
+            chunk_size: Rows per chunk
 
         Returns:
-            Tuple of (cleaned_data, anomalous_data)
+            Array of scores, negative for anomalies
         """
         if not self.is_fitted:
             raise ValueError("Model must be fitted before making predictions")
 
         X = self._prepare_features(df)
-        predictions = self.model.predict(X)
+        if n_jobs in (None, 1) or len(X) <= chunk_size:
+            return self.model.decision_function(X)
 
-        # Split data into normal and anomalous
-        normal_mask = predictions == 1
-        anomalous_mask = predictions == -1
+        chunks = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(self.model.decision_function)(X[start : start + chunk_size])
+            for start in range(0, len(X), chunk_size)
+        )
+        return np.concatenate(chunks)
+
+    def predict_mask(
+        self,
+        df: pd.DataFrame,
+        n_jobs: Optional[int] = DATA_CLEANER_N_JOBS,
+        chunk_size: int = DATA_CLEANER_CHUNK_SIZE,
+    ) -> np.ndarray:
+        """
+        Predict which rows are normal, without copying the data.
 
-        cleaned_data = df[normal_mask].copy()
-        anomalous_data = df[anomalous_mask].copy()
+        Args:
+            df: Input DataFrame
+            n_jobs: Number of threads (-1 for all cores, None for 1)
+            chunk_size: Rows per chunk
 
-        return cleaned_data, anomalous_data
+        Returns:
+            Boolean array, True for normal rows and False for anomalies
+        """
+        return self.score(df, n_jobs=n_jobs, chunk_size=chunk_size) >= 0
 
-    def save_model(self, path: str = "app/ml/models/data_cleaner.joblib") -> None:
+    def predict(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Predict anomalies in the data and return cleaned and anomalous data separately.
+
+        Prefer predict_mask, which does not materialize the two frames.
+
+        Args:
+            df: Input DataFrame
+
+        Returns:
+            Tuple of (cleaned_data, anomalous_data)
+        """
+        normal_mask = self.predict_mask(df)
+        return df[normal_mask], df[~normal_mask]
+
+    def save_model(self, path: str = MODEL_PATH) -> None:
         """
         Save the fitted model and scaler to disk.
 
+        The artifact is written to a temporary file and moved into place so
+        readers never load a partially written model.
+
         Args:
             path: Path to save the model
         """
@@ -98,9 +141,11 @@ class CryptoDataCleanerModel:
             raise ValueError("Model must be fitted before saving")
 
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({"model": self.model, "scaler": self.scaler}, path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({"model": self.model, "scaler": self.scaler}, tmp_path)
+        os.replace(tmp_path, path)
 
-    def load_model(self, path: str = "app/ml/models/data_cleaner.joblib") -> None:
+    def load_model(self, path: str = MODEL_PATH) -> None:
         """
         Load a fitted model and scaler from disk.
 
@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+import pandas as pd
+from app.ml.data_cleaner import MODEL_PATH, CryptoDataCleanerModel
+from app.utils.metrics import MODEL_LOAD_SECONDS
+
+
+class ModelRegistry:
+    """
+    Keeps a fitted CryptoDataCleanerModel resident in the process.
+
+    The artifact is only reloaded when its mtime/size changes and its content
+    hash differs from the loaded one. A new model is fully loaded (or trained)
+    before it replaces the current one, so callers never see a partial model.
+    """
+
+    def __init__(self, path: Path = MODEL_PATH, contamination: float = 0.1):
+        """
+        Args:
+            path: Path to the model artifact
+            contamination: Contamination used when a model has to be trained
+        """
+        self.path = Path(path)
+        self.contamination = contamination
+        self._model: Optional[CryptoDataCleanerModel] = None
+        self._stat: Optional[Tuple[float, int]] = None
+        self._digest: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _file_digest(self) -> str:
+        """Return the SHA-256 of the artifact."""
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _load(self, stat: Tuple[float, int]) -> None:
+        """Load the artifact if its content changed since the last load."""
+        digest = self._file_digest()
+        if digest != self._digest:
+            started = time.perf_counter()
+            model = CryptoDataCleanerModel(contamination=self.contamination)
+            model.load_model(self.path)
+            self._model = model
+            self._digest = digest
+            elapsed = time.perf_counter() - started
+            MODEL_LOAD_SECONDS.observe(elapsed, action="load")
+            print(f"Loaded data cleaning model from {self.path} in {elapsed:.3f}s")
+        self._stat = stat
+
+    def _train(self, df: pd.DataFrame) -> None:
+        """Train a new model on df and persist it."""
+        started = time.perf_counter()
+        model = CryptoDataCleanerModel(contamination=self.contamination)
+        model.fit(df)
+        model.save_model(self.path)
+        self._model = model
+        self._digest = self._file_digest()
+        stat = self.path.stat()
+        self._stat = (stat.st_mtime, stat.st_size)
+        elapsed = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.observe(elapsed, action="train")
+        print(f"Trained new data cleaning model on {len(df)} rows in {elapsed:.3f}s")
+
+    def get(self, training_df: Optional[pd.DataFrame] = None) -> CryptoDataCleanerModel:
+        """
+        Get the current model, reloading or training it if needed.
+
+        Args:
+            training_df: Data to train on when no usable artifact exists
+
+        Returns:
+            Fitted CryptoDataCleanerModel
+        """
+        with self._lock:
+            try:
+                stat = self.path.stat()
+                stat = (stat.st_mtime, stat.st_size)
+                if stat != self._stat or self._model is None:
+                    self._load(stat)
+            except Exception as e:
+                if self._model is not None and self.path.exists():
+                    # Keep serving the resident model if a new artifact is bad
+                    print(f"Failed to reload data cleaning model: {e}")
+                    return self._model
+                if training_df is None:
+                    raise
+                print(f"Could not load data cleaning model ({e}), retraining...")
+                self._train(training_df)
+            return self._model
+
+
+cleaner_registry = ModelRegistry()
+
+
+def get_data_cleaner(
+    training_df: Optional[pd.DataFrame] = None,
+) -> CryptoDataCleanerModel:
+    """
+    Get the process-wide data cleaning model.
+
+    Args:
+        training_df: Data to train on when no usable artifact exists
+
+    Returns:
+        Fitted CryptoDataCleanerModel
+    """
+    return cleaner_registry.get(training_df)
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Optional
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+from app.storage.mongo import ensure_ttl_index, get_db
+from app.core.config import JOB_HISTORY_TTL_DAYS
+
+JOB_RUNS_COLLECTION = "job_runs"
+
+_indexes_ready = False
+
+
+def ensure_history_indexes() -> None:
+    """Index job runs by job and start time, expiring them after the TTL."""
+    global _indexes_ready
+    collection = get_db()[JOB_RUNS_COLLECTION]
+    collection.create_index([("job", ASCENDING), ("started_at", DESCENDING)])
+    # A changed JOB_HISTORY_TTL_DAYS updates the existing index's expiry
+    ensure_ttl_index(
+        collection, "started_at", JOB_HISTORY_TTL_DAYS * 24 * 3600, "started_at_ttl"
+    )
+    _indexes_ready = True
+
+
+def record_job_run(
+    job: str,
+    started_at: datetime,
+    finished_at: datetime,
+    outcome: str,
+    rows: Optional[int] = None,
+    error: Optional[str] = None,
+) -> None:
+    """
+    Store one scheduler job run so saturation and failures can be inspected.
+
+    Args:
+        job: Job id
+        started_at: Time the run started
+        finished_at: Time the run finished
+        outcome: "success", "partial" (some fetch pages failed) or "failed"
+        rows: Number of rows the run processed
+        error: Error message for failed runs
+    """
+    if not _indexes_ready:
+        try:
+            ensure_history_indexes()
+        except PyMongoError as e:
+            # Retried on the next run; the run itself is still recorded
+            print(f"Could not create job history indexes: {e}")
+    try:
+        get_db()[JOB_RUNS_COLLECTION].insert_one(
+            {
+                "job": job,
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "duration_seconds": (finished_at - started_at).total_seconds(),
+                "rows": rows,
+                "outcome": outcome,
+                "error": error,
+            }
+        )
+    except PyMongoError as e:
+        # History is diagnostic only; never fail a job because of it
+        print(f"Failed to record {job} run: {e}")
@@ -1,30 +1,140 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict
 from apscheduler.schedulers.background import BackgroundScheduler
 from app.etl.pipeline import run_etl_pipeline
 from app.data.extract import fetch_and_store_data
+from app.scheduler.history import record_job_run
+from app.core.config import SCHEDULED_ETL_DAYS, SCHEDULED_ETL_MODE
+
+FETCH_JOB_ID = "fetch"
+ETL_JOB_ID = "etl"
+
+FETCH_KWARGS = {
+    "pages": 20,
+    "per_page": 1000,
+    "concurrency": 4,
+    "rate": 1,
+    "changes_only": True,  # Skip unchanged rows, poll stable tail pages less
+}
+# run_etl_pipeline arguments of every SCHEDULED_ETL_MODE
+ETL_MODES = {
+    "current": {"current": True},  # Newest snapshot of every coin
+    "incremental": {"incremental": True},  # Merge new rows into persisted state
+    "window": {},  # Every snapshot of the window, closed days from the cache
+}
+
+
+def etl_kwargs(mode: str = SCHEDULED_ETL_MODE, days: int = SCHEDULED_ETL_DAYS) -> Dict:
+    """
+    Build the scheduled ETL's run_etl_pipeline arguments.
+
+    Args:
+        mode: Key of ETL_MODES; unknown modes fall back to "current"
+        days: Window length in days
+
+    Returns:
+        Keyword arguments for run_etl_pipeline
+    """
+    if mode not in ETL_MODES:
+        print(f"Warning: unknown scheduled ETL mode {mode!r}, using 'current'")
+        mode = "current"
+    return {"days": days, **ETL_MODES[mode]}
+
+
+ETL_KWARGS = etl_kwargs()
+
+# Set when a fetch commits new rows, cleared when the ETL picks them up
+_etl_pending = threading.Event()
+
+
+def run_fetch_job(scheduler: BackgroundScheduler, **kwargs) -> None:
+    """
+    Fetch new market data and trigger the ETL if any new rows were stored.
+
+    Args:
+        scheduler: Scheduler the ETL job is registered on
+        **kwargs: Arguments for fetch_and_store_data
+    """
+    started_at = datetime.now(timezone.utc)
+    try:
+        totals = fetch_and_store_data(**kwargs)
+    except Exception as e:
+        record_job_run(
+            FETCH_JOB_ID, started_at, datetime.now(timezone.utc), "failed", error=str(e)
+        )
+        raise
+    record_job_run(
+        FETCH_JOB_ID,
+        started_at,
+        datetime.now(timezone.utc),
+        "success" if not totals["failed_pages"] else "partial",
+        rows=totals["inserted"],
+    )
+
+    if totals["inserted"]:
+        _etl_pending.set()
+        # Run the ETL now instead of waiting for its next check; if it is
+        # still running the pending flag makes the following check pick it up
+        scheduler.modify_job(ETL_JOB_ID, next_run_time=datetime.now(timezone.utc))
+
+
+def run_etl_job(**kwargs) -> None:
+    """
+    Run the ETL pipeline if a fetch has committed new rows since the last run.
+
+    Args:
+        **kwargs: Arguments for run_etl_pipeline
+    """
+    if not _etl_pending.is_set():
+        return
+    _etl_pending.clear()
+
+    started_at = datetime.now(timezone.utc)
+    summary = run_etl_pipeline(**kwargs)
+    record_job_run(
+        ETL_JOB_ID,
+        started_at,
+        datetime.now(timezone.utc),
+        "success" if summary["success"] else "failed",
+        rows=summary["rows"],
+        error=summary.get("error"),
+    )
 
 
 def schedule_tasks():
     """
     Initialize and configure the scheduler with ETL and data fetching tasks.
 
+    Every job runs at most one instance at a time, and missed runs are
+    coalesced into one. The ETL is triggered by fetches that store new rows;
+    its interval only re-checks for pending work.
+
     Returns:
         BackgroundScheduler: Configured scheduler instance
     """
-    scheduler = BackgroundScheduler()
+    scheduler = BackgroundScheduler(
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 30}
+    )
 
     # Define tasks with their schedules
     tasks = [
         {
-            "task": fetch_and_store_data,
+            "task": run_fetch_job,
             "trigger": "interval",
+            "id": FETCH_JOB_ID,
             "seconds": 60,  # Fetch new data every minute
-            "kwargs": {"pages": 20, "per_page": 1000, "delay": 1},
+            "jitter": 5,
+            "args": [scheduler],
+            "kwargs": FETCH_KWARGS,
         },
         {
-            "task": run_etl_pipeline,
+            "task": run_etl_job,
             "trigger": "interval",
-            "seconds": 30,  # Run ETL pipeline every minute
-            "kwargs": {"days": 30},  # Process last day's data
+            "id": ETL_JOB_ID,
+            "seconds": 30,  # Check for pending ETL work
+            "jitter": 3,
+            "kwargs": ETL_KWARGS,
         },
     ]
 
@@ -42,6 +152,9 @@ def schedule_tasks():
             kwargs=task.get("kwargs", {})
         )
 
+    # Analyze whatever is already stored once at startup
+    _etl_pending.set()
+
     scheduler.start()
     print("Scheduler started with ETL and data fetching tasks.")
 
@@ -1,15 +1,119 @@
 # app/storage/mongo.py
-from pymongo import MongoClient
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from pymongo import ASCENDING, MongoClient
+from pymongo.collection import Collection
 from pymongo.database import Database
-from app.core.config import MONGODB_URI, DATABASE_NAME
+from pymongo.errors import OperationFailure
+from app.core.config import (
+    MONGODB_URI,
+    DATABASE_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE,
+)
+
+# One MongoClient per (pid, uri). MongoClient is thread-safe and owns its own
+# connection pool, so every module in a process shares the same pool. The pid
+# is part of the key because a client must never be reused across a fork.
+_clients: Dict[Tuple[int, str], MongoClient] = {}
+_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    """Build the MongoClient keyword arguments from configuration."""
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+    }
+
+
+def get_client(uri: Optional[str] = None) -> MongoClient:
+    """Get the process-wide MongoClient for a URI, creating it on first use.
 
+    Args:
+        uri: MongoDB connection string. Defaults to MONGODB_URI.
 
-def get_db() -> Database:
+    Returns:
+        client: Shared MongoClient instance
+    """
+    uri = uri or MONGODB_URI
+    key = (os.getpid(), uri)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = MongoClient(uri, **_client_options())
+            _clients[key] = client
+    return client
+
+
+def get_db(name: Optional[str] = None) -> Database:
     """Get a mongo db connection to work with
 
+    Args:
+        name: Database name. Defaults to DATABASE_NAME.
+
     Returns:
-        db: Database instance
+        db: Database instance backed by the shared client
     """
-    client = MongoClient(MONGODB_URI)
-    db: Database = client[DATABASE_NAME]
+    db: Database = get_client()[name or DATABASE_NAME]
     return db
+
+
+def ensure_ttl_index(collection: Collection, field: str, seconds: int, name: str):
+    """Create a TTL index, or update its expiry if the retention changed.
+
+    An existing plain index with the same name is converted to a TTL index.
+
+    Args:
+        collection: Collection to index
+        field: Date field the expiry is computed from
+        seconds: Seconds after which documents expire
+        name: Index name
+    """
+    try:
+        collection.create_index(
+            [(field, ASCENDING)], expireAfterSeconds=seconds, name=name
+        )
+    except OperationFailure as e:
+        if e.code != 85:  # IndexOptionsConflict
+            raise
+        collection.database.command(
+            "collMod",
+            collection.name,
+            index={"name": name, "expireAfterSeconds": seconds},
+        )
+
+
+def close_clients() -> None:
+    """Close every client owned by the current process and clear the registry."""
+    pid = os.getpid()
+    with _lock:
+        for key in [key for key in _clients if key[0] == pid]:
+            _clients.pop(key).close()
+
+
+def _reset_after_fork() -> None:
+    """Drop clients inherited from the parent without closing their sockets."""
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -2,52 +2,152 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import List, Optional
-from app.core.config import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD
+from app.core.config import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    SMTP_TIMEOUT,
+    SMTP_USE_TLS,
+    NOTIFICATION_EMAIL,
+)
+from app.utils.metrics import EMAIL_FAILURES
 
 
-def send_email(
+class SMTPConnection:
+    """A reusable SMTP connection that reconnects when the server drops it."""
+
+    def __init__(
+        self,
+        host: Optional[str] = SMTP_SERVER,
+        port: Optional[int] = SMTP_PORT,
+        username: Optional[str] = SMTP_USERNAME,
+        password: Optional[str] = SMTP_PASSWORD,
+        use_tls: bool = SMTP_USE_TLS,
+        timeout: float = SMTP_TIMEOUT,
+    ):
+        self.host = host
+        self.port = int(port) if port else 0
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        if not self.host:
+            raise ValueError("SMTP server not configured")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    def send(self, msg: MIMEMultipart) -> None:
+        """
+        Send a message, opening or re-opening the connection if needed.
+
+        Args:
+            msg: Message to send
+        """
+        if self._server is not None:
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._server = self._connect()
+            self._server.send_message(msg)
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+
+def build_message(
     subject: str,
     body: str,
-    to_emails: List[str] = ["nassytheresa@gmail.com"],
+    to_emails: List[str],
     from_email: Optional[str] = None,
     is_html: bool = False,
-) -> bool:
+) -> MIMEMultipart:
     """
-    Send an email using SMTP.
+    Build an email message.
 
     Args:
         subject (str): Email subject
         body (str): Email body content
         to_emails (List[str]): List of recipient email addresses
-        from_email (Optional[str]): Sender email address (defaults to SMTP_USERNAME from env)
+        from_email (Optional[str]): Sender email address
         is_html (bool): Whether the body content is HTML (defaults to False)
 
     Returns:
-        bool: True if email was sent successfully, False otherwise
+        MIMEMultipart: The message
     """
-    try:
+    msg = MIMEMultipart()
+    msg["Subject"] = subject
+    msg["From"] = from_email or ""
+    msg["To"] = ", ".join(to_emails)
+    msg.attach(MIMEText(body, "html" if is_html else "plain"))
+    return msg
 
-        if not all([SMTP_USERNAME, SMTP_PASSWORD]):
-            raise ValueError("SMTP credentials not found in environment variables")
 
-        # Create message
-        msg = MIMEMultipart()
-        msg["Subject"] = subject
-        msg["From"] = from_email or SMTP_USERNAME
-        msg["To"] = ", ".join(to_emails)
+def send_email(
+    subject: str,
+    body: str,
+    to_emails: Optional[List[str]] = None,
+    from_email: Optional[str] = None,
+    is_html: bool = False,
+    connection: Optional[SMTPConnection] = None,
+) -> bool:
+    """
+    Send an email right away and wait for the SMTP server.
 
-        # Attach body
-        content_type = "html" if is_html else "plain"
-        msg.attach(MIMEText(body, content_type))
+    Meant for one-off scripts and notebooks; the pipeline queues its
+    notifications with app.utils.notifications.notify instead, which sends
+    through the same SMTPConnection without blocking.
 
-        # Connect to SMTP server and send email
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()  # Enable TLS
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+    Args:
+        subject (str): Email subject
+        body (str): Email body content
+        to_emails (Optional[List[str]]): Recipients (defaults to NOTIFICATION_EMAIL)
+        from_email (Optional[str]): Sender email address (defaults to SMTP_USERNAME from env)
+        is_html (bool): Whether the body content is HTML (defaults to False)
+        connection (Optional[SMTPConnection]): Connection to send through
+            (defaults to one configured from env, closed afterwards)
 
+    Returns:
+        bool: True if email was sent successfully, False otherwise
+    """
+    owned = connection is None
+    connection = connection or SMTPConnection()
+    try:
+        connection.send(
+            build_message(
+                subject,
+                body,
+                to_emails or [NOTIFICATION_EMAIL],
+                from_email or connection.username,
+                is_html,
+            )
+        )
         return True
 
     except Exception as e:
+        EMAIL_FAILURES.inc()
         print(f"Failed to send email: {str(e)}")
         return False
+
+    finally:
+        if owned:
+            connection.close()
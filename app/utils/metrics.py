@@ -0,0 +1,319 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app.storage.mongo import get_db
+from app.core.config import METRICS_PUBLISH_SECONDS
+
+METRICS_COLLECTION = "process_metrics"
+
+# Latency buckets in seconds, from a fast Mongo write to a slow full rebuild
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric(ABC):
+    """Base class: one metric family whose children are keyed by label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Return (name suffix, labels, value) for every child."""
+
+
+class Counter(_Metric):
+    """A monotonically increasing count; its name should end in _total."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [("", dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, optionally computed at collection time."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """
+        Compute the values when the metrics are collected.
+
+        Args:
+            function: Returns a dict mapping label values to gauge values
+        """
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            items = list(self._function().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [("", dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                # Per-bucket counts (plus +Inf), sum
+                child = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            child[0][index] += 1
+            child[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(c[0]), c[1])) for key, c in self._values.items()]
+        samples = []
+        for key, (counts, total) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                samples.append(("_bucket", {**labels, "le": le}, cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """The metric families of one process."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> List[Dict]:
+        """
+        Snapshot every family as plain data that can be stored in MongoDB.
+
+        Returns:
+            List of families with name, help, type and samples
+        """
+        families = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                print(f"Failed to collect metric {metric.name}: {e}")
+                continue
+            families.append(
+                {
+                    "name": metric.name,
+                    "help": metric.documentation,
+                    "type": metric.type,
+                    "samples": [list(sample) for sample in samples],
+                }
+            )
+        return families
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(snapshots: Dict[str, List[Dict]]) -> str:
+    """
+    Render the families of several processes in the Prometheus text format.
+
+    Families with the same name are merged, and every sample is labelled
+    with the process it came from.
+
+    Args:
+        snapshots: Dict mapping a process name to its collected families
+
+    Returns:
+        Exposition text
+    """
+    merged: Dict[str, Dict] = {}
+    for process, families in snapshots.items():
+        for family in families:
+            entry = merged.setdefault(
+                family["name"],
+                {"help": family["help"], "type": family["type"], "samples": []},
+            )
+            for suffix, labels, value in family["samples"]:
+                entry["samples"].append((suffix, {"process": process, **labels}, value))
+
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for suffix, labels, value in family["samples"]:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+FETCH_PAGE_SECONDS = registry.register(
+    Histogram("coingecko_fetch_page_seconds", "CoinGecko page request latency")
+)
+MONGO_OPERATION_SECONDS = registry.register(
+    Histogram(
+        "mongo_operation_seconds", "MongoDB read and write latency", ["operation"]
+    )
+)
+ETL_STAGE_SECONDS = registry.register(
+    Histogram("etl_stage_seconds", "ETL stage duration", ["stage"])
+)
+MODEL_LOAD_SECONDS = registry.register(
+    Histogram(
+        "model_load_seconds", "Data cleaning model load or train time", ["action"]
+    )
+)
+ROWS_FETCHED = registry.register(
+    Counter("rows_fetched_total", "Market data rows fetched from CoinGecko")
+)
+DUPLICATE_ROWS = registry.register(
+    Counter("duplicate_rows_total", "Fetched rows that were already stored")
+)
+UNCHANGED_ROWS = registry.register(
+    Counter("unchanged_rows_total", "Fetched rows skipped by change detection")
+)
+PAGES_SKIPPED = registry.register(
+    Counter("pages_skipped_total", "Stable pages left out of a fetch cycle")
+)
+FETCH_PAGE_FAILURES = registry.register(
+    Counter("fetch_page_failures_total", "CoinGecko pages that could not be fetched")
+)
+ANOMALIES_DETECTED = registry.register(
+    Counter("anomalies_detected_total", "Rows removed by the data cleaning model")
+)
+ETL_RUNS = registry.register(
+    Counter("etl_runs_total", "ETL pipeline runs", ["outcome"])
+)
+EMAIL_FAILURES = registry.register(
+    Counter("email_failures_total", "Notification emails that could not be delivered")
+)
+COLLECTION_DOCUMENTS = registry.register(
+    Gauge(
+        "mongo_collection_documents",
+        "Estimated number of documents per collection",
+        ["collection"],
+    )
+)
+
+
+def publish(process: str) -> None:
+    """
+    Store this process's metrics so the dashboard's /metrics can serve them.
+
+    Args:
+        process: Name the samples are labelled with
+    """
+    get_db()[METRICS_COLLECTION].replace_one(
+        {"_id": process},
+        {
+            "_id": process,
+            "updated_at": datetime.now(timezone.utc),
+            "families": registry.collect(),
+        },
+        upsert=True,
+    )
+
+
+def start_publisher(process: str, interval: float = METRICS_PUBLISH_SECONDS):
+    """
+    Publish this process's metrics from a daemon thread every interval.
+
+    Args:
+        process: Name the samples are labelled with
+        interval: Seconds between publishes
+    """
+
+    def run():
+        while True:
+            try:
+                publish(process)
+            except Exception as e:
+                print(f"Failed to publish metrics: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="metrics-publisher", daemon=True)
+    thread.start()
+    return thread
+
+
+def load_published(max_age: float) -> Dict[str, List[Dict]]:
+    """
+    Read the metrics other processes published recently.
+
+    Args:
+        max_age: Ignore snapshots older than this many seconds
+
+    Returns:
+        Dict mapping a process name to its families
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    return {
+        doc["_id"]: doc["families"]
+        for doc in get_db()[METRICS_COLLECTION].find({"updated_at": {"$gte": since}})
+    }
@@ -0,0 +1,207 @@
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+from app.core.config import (
+    NOTIFICATION_EMAIL,
+    NOTIFY_MODE,
+    NOTIFY_DIGEST_SECONDS,
+    NOTIFY_QUEUE_SIZE,
+    NOTIFY_MAX_RETRIES,
+)
+from app.utils.email import SMTPConnection, build_message
+from app.utils.metrics import EMAIL_FAILURES
+
+INFO = "info"
+FAILURE = "failure"
+
+NOTIFY_MODES = ("immediate", "digest", "debounce")
+
+
+class NotificationDispatcher:
+    """
+    Delivers notifications from a background thread through a bounded queue.
+
+    Failures are always sent immediately. Info notifications depend on mode:
+    "immediate" sends each one, "digest" batches them into one summary per
+    digest interval, and "debounce" sends only the latest one once no new
+    notification has arrived for the interval. Delivery timeouts and retries
+    happen on the dispatcher thread and never block the caller.
+    """
+
+    def __init__(
+        self,
+        connection: Optional[SMTPConnection] = None,
+        to_emails: Optional[List[str]] = None,
+        from_email: Optional[str] = None,
+        mode: str = NOTIFY_MODE,
+        interval: float = NOTIFY_DIGEST_SECONDS,
+        max_queue: int = NOTIFY_QUEUE_SIZE,
+        max_retries: int = NOTIFY_MAX_RETRIES,
+        idle_close: float = 60.0,
+    ):
+        """
+        Args:
+            connection: SMTP connection to deliver through
+            to_emails: Recipients
+            from_email: Sender address (defaults to the SMTP username)
+            mode: "immediate", "digest" or "debounce" for info notifications
+            interval: Digest period or debounce quiet time in seconds
+            max_queue: Maximum number of queued notifications
+            max_retries: Delivery attempts before a message is dropped
+            idle_close: Close the SMTP connection after this many idle seconds
+        """
+        if mode not in NOTIFY_MODES:
+            # A typo in NOTIFY_MODE must not stop the pipeline from starting
+            print(f"Warning: unknown notification mode {mode!r}, using 'digest'")
+            mode = "digest"
+        self.connection = connection or SMTPConnection()
+        self.to_emails = to_emails or [NOTIFICATION_EMAIL]
+        self.from_email = from_email or self.connection.username
+        self.mode = mode
+        self.interval = interval
+        self.max_retries = max_retries
+        self.idle_close = idle_close
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max_queue)
+        self._pending: List[Dict] = []
+        self._window_start: Optional[float] = None
+        self._last_info: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the dispatcher thread once."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="notification-dispatcher", daemon=True
+                )
+                self._thread.start()
+
+    def notify(self, subject: str, body: str, level: str = INFO) -> bool:
+        """
+        Queue a notification without blocking.
+
+        Args:
+            subject: Email subject
+            body: Email body
+            level: INFO or FAILURE
+
+        Returns:
+            bool: True if queued, False if the queue was full
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(
+                {"subject": subject, "body": body, "level": level, "at": time.time()}
+            )
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"Notification queue full, dropping: {subject}")
+            return False
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Flush pending notifications and stop the dispatcher thread.
+
+        Args:
+            timeout: Seconds to wait for the flush
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _deliver(self, subject: str, body: str) -> None:
+        msg = build_message(subject, body, self.to_emails, self.from_email)
+        for attempt in range(self.max_retries):
+            try:
+                self.connection.send(msg)
+                self.sent += 1
+                return
+            except Exception as e:
+                self.connection.close()
+                if attempt + 1 == self.max_retries:
+                    self.failed += 1
+                    EMAIL_FAILURES.inc()
+                    print(f"Failed to send email: {str(e)}")
+                    return
+                time.sleep(min(2**attempt, 30))
+
+    def _flush_pending(self) -> None:
+        """Send the buffered info notifications according to the mode."""
+        if not self._pending:
+            return
+        if len(self._pending) == 1 or self.mode == "debounce":
+            latest = self._pending[-1]
+            self._deliver(latest["subject"], latest["body"])
+        else:
+            body = "\n\n".join(
+                f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(item['at']))} UTC] "
+                f"{item['subject']}\n{item['body']}"
+                for item in self._pending
+            )
+            self._deliver(f"Digest: {len(self._pending)} notifications", body)
+        self._pending.clear()
+        self._window_start = None
+
+    def _flush_due(self, now: float) -> bool:
+        if not self._pending:
+            return False
+        if self.mode == "digest":
+            return now - self._window_start >= self.interval
+        return now - self._last_info >= self.interval
+
+    def _run(self) -> None:
+        last_activity = time.time()
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = False
+            now = time.time()
+
+            if item is None:
+                self._flush_pending()
+                self.connection.close()
+                return
+            if item:
+                last_activity = now
+                if item["level"] == FAILURE or self.mode == "immediate":
+                    self._deliver(item["subject"], item["body"])
+                else:
+                    if self._window_start is None:
+                        self._window_start = now
+                    self._last_info = now
+                    self._pending.append(item)
+
+            if self._flush_due(now):
+                self._flush_pending()
+                last_activity = now
+            if now - last_activity > self.idle_close:
+                self.connection.close()
+
+
+dispatcher = NotificationDispatcher()
+
+
+def notify(subject: str, body: str, level: str = INFO) -> bool:
+    """
+    Queue a notification on the process-wide dispatcher.
+
+    Args:
+        subject: Email subject
+        body: Email body
+        level: INFO or FAILURE
+
+    Returns:
+        bool: True if queued, False if the queue was full
+    """
+    return dispatcher.notify(subject, body, level)
@@ -1,11 +1,39 @@
 # app/visualization/dashboards.py
+import threading
+import time
+from typing import Dict, Optional, Tuple
 import dash
-from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash import html, dcc, no_update
+from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, timezone
 import pandas as pd
+from pymongo.errors import OperationFailure, PyMongoError
+from flask import Response
+from app.core.config import (
+    COLLECTION_NAME,
+    DASHBOARD_POLL_SECONDS,
+    DASHBOARD_REFRESH_MS,
+    METRICS_PUBLISH_SECONDS,
+)
 from app.storage.mongo import get_db
+from app.etl.retention import (
+    CURRENT_COLLECTION,
+    CURRENT_ID,
+    RESULTS_COLLECTION,
+    ROLLUP_COLLECTIONS,
+)
+from app.data.bars import BAR_RESOLUTIONS
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.etl.incremental import STATE_COLLECTION
+from app.scheduler.history import JOB_RUNS_COLLECTION
+from app.utils.metrics import (
+    COLLECTION_DOCUMENTS,
+    METRICS_COLLECTION,
+    load_published,
+    registry,
+    render,
+)
 from app.etl.transform import transform_data
 from app.visualization.graphs import generate_all_graphs
 
@@ -51,23 +79,35 @@ app.layout = html.Div(
             ],
             style={"marginBottom": 30},
         ),
-        # Auto-refresh interval
+        # Return Correlations
+        html.Div(
+            [
+                html.H2("Return Correlations", style={"textAlign": "center"}),
+                dcc.Graph(id="correlation-heatmap"),
+            ],
+            style={"marginBottom": 30},
+        ),
+        # Auto-refresh interval; ticks only check the in-process notifier
         dcc.Interval(
             id="interval-component",
-            interval=5 * 60 * 1000,  # 5 minutes in milliseconds
+            interval=DASHBOARD_REFRESH_MS,
             n_intervals=0,
         ),
+        # Id of the analysis result this tab is currently showing
+        dcc.Store(id="result-id"),
     ]
 )
 
+NO_DATA_KEY = "no-data"
+
 
 def get_latest_data() -> dict:
-    """Get the latest data from MongoDB and transform it."""
+    """Get the current analysis result, read by key from the current document."""
     db = get_db()
-    collection = db["analysis_results"]
+    collection = db[CURRENT_COLLECTION]
 
-    # Get the most recent record
-    data = collection.find_one(sort=[("timestamp", -1)])
+    # The ETL replaces this single document on every run
+    data = collection.find_one({"_id": CURRENT_ID})
 
     if not data:
         return None
@@ -75,40 +115,171 @@ def get_latest_data() -> dict:
     return data
 
 
+def empty_figure() -> go.Figure:
+    """Figure shown when no analysis results are available."""
+    empty_fig = go.Figure()
+    empty_fig.update_layout(
+        title="No data available",
+        xaxis={"showgrid": False, "zeroline": False, "showticklabels": False},
+        yaxis={"showgrid": False, "zeroline": False, "showticklabels": False},
+    )
+    return empty_fig
+
+
+class ResultsNotifier:
+    """
+    Tracks the current analysis result for the whole process.
+
+    A background thread follows the current document through a change
+    stream, or by polling its result_id when change streams are unavailable
+    (e.g. a standalone mongod). Figures are generated once per new result and shared
+    by every open dashboard tab.
+    """
+
+    def __init__(self, poll_interval: float = DASHBOARD_POLL_SECONDS):
+        """
+        Args:
+            poll_interval: Seconds between polls when change streams are unavailable
+        """
+        self.poll_interval = poll_interval
+        self._latest_id = None
+        self._cache: Tuple[Optional[str], Optional[Dict]] = (None, None)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background watcher thread once per process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="results-notifier", daemon=True
+            )
+            self._thread.start()
+
+    def _poll_latest_id(self):
+        """Read only the current document's result_id, by key."""
+        doc = get_db()[CURRENT_COLLECTION].find_one(
+            {"_id": CURRENT_ID}, {"result_id": 1}
+        )
+        return doc.get("result_id") if doc else None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._latest_id = self._poll_latest_id()
+                try:
+                    with get_db()[CURRENT_COLLECTION].watch(
+                        [{"$match": {"documentKey._id": CURRENT_ID}}]
+                    ) as stream:
+                        for _ in stream:
+                            self._latest_id = self._poll_latest_id()
+                except OperationFailure:
+                    # Change streams need a replica set; poll the key instead
+                    while True:
+                        time.sleep(self.poll_interval)
+                        self._latest_id = self._poll_latest_id()
+            except PyMongoError as e:
+                print(f"Results notifier error: {e}")
+                time.sleep(self.poll_interval)
+
+    def get_figures(self) -> Tuple[str, Optional[Dict]]:
+        """
+        Get the figures for the newest analysis result.
+
+        Returns:
+            Tuple of (result key, figures dict or None if there is no data)
+        """
+        self.start()
+        latest_id = self._latest_id
+        key = str(latest_id) if latest_id is not None else NO_DATA_KEY
+        cached_key, figures = self._cache
+        if key == cached_key:
+            return cached_key, figures
+
+        with self._lock:
+            cached_key, figures = self._cache
+            if key != cached_key:
+                analysis_results = get_latest_data()
+                if analysis_results is None:
+                    key, figures = NO_DATA_KEY, None
+                else:
+                    key = str(analysis_results.get("result_id"))
+                    figures = generate_all_graphs(analysis_results)
+                self._cache = (key, figures)
+            return self._cache
+
+
+notifier = ResultsNotifier()
+
+
 @app.callback(
     [
         Output("market-cap-distribution", "figure"),
         Output("price-change-analysis", "figure"),
         Output("supply-utilization", "figure"),
         Output("top-performers", "figure"),
+        Output("correlation-heatmap", "figure"),
+        Output("result-id", "data"),
     ],
     [Input("interval-component", "n_intervals")],
+    [State("result-id", "data")],
 )
-def update_graphs(n):
-    """Update all graphs with the latest data."""
-    analysis_results = get_latest_data()
+def update_graphs(n, shown_id):
+    """Update all graphs when a new analysis result is available."""
+    result_id, graphs = notifier.get_figures()
 
-    if analysis_results is None:
-        # Return empty figures if no data is available
-        empty_fig = go.Figure()
-        empty_fig.update_layout(
-            title="No data available",
-            xaxis={"showgrid": False, "zeroline": False, "showticklabels": False},
-            yaxis={"showgrid": False, "zeroline": False, "showticklabels": False},
-        )
-        return empty_fig, empty_fig, empty_fig, empty_fig
+    if result_id == shown_id:
+        # Nothing new since this tab last rendered
+        return no_update, no_update, no_update, no_update, no_update, no_update
 
-    # Generate all graphs
-    graphs = generate_all_graphs(analysis_results)
+    if graphs is None:
+        # Return empty figures if no data is available
+        empty_fig = empty_figure()
+        return empty_fig, empty_fig, empty_fig, empty_fig, empty_fig, result_id
 
     return (
         graphs["market_cap_distribution"],
         graphs["price_change_analysis"],
         graphs["supply_utilization"],
         graphs["top_performers"],
+        graphs["correlation_heatmap"],
+        result_id,
     )
 
 
+# Every collection the app writes; add new collections here to report their size
+SIZED_COLLECTIONS = (
+    COLLECTION_NAME,
+    CURRENT_MARKET_COLLECTION,
+    RESULTS_COLLECTION,
+    CURRENT_COLLECTION,
+    *ROLLUP_COLLECTIONS.values(),
+    *(collection for collection, _, _ in BAR_RESOLUTIONS.values()),
+    STATE_COLLECTION,
+    JOB_RUNS_COLLECTION,
+    METRICS_COLLECTION,
+)
+
+
+def collection_sizes() -> Dict[Tuple[str], int]:
+    """Estimated document counts, read from collection metadata."""
+    db = get_db()
+    return {(name,): db[name].estimated_document_count() for name in SIZED_COLLECTIONS}
+
+
+@app.server.route("/metrics")
+def metrics():
+    """Serve this process's metrics and those published by the worker."""
+    try:
+        snapshots = load_published(max_age=3 * METRICS_PUBLISH_SECONDS)
+    except PyMongoError as e:
+        print(f"Could not read published metrics: {e}")
+        snapshots = {}
+    snapshots["dashboard"] = registry.collect()
+    return Response(render(snapshots), mimetype="text/plain; version=0.0.4")
+
+
 def run_dashboard_server(debug: bool = False, port: int = 8080):
     """
     Run the visualization dashboard server.
@@ -118,4 +289,8 @@ def run_dashboard_server(debug: bool = False, port: int = 8080):
         port: Port to run the dashboard on
     """
     print(f"Starting dashboard on port {port}...")
+    # Only the dashboard reports collection sizes; the worker imports this
+    # module too, and publishing them from both would duplicate the gauges
+    COLLECTION_DOCUMENTS.set_function(collection_sizes)
+    notifier.start()
     app.run(debug=debug, port=port, host="0.0.0.0")
@@ -183,6 +183,49 @@ def create_top_performers(analysis_results: Dict) -> go.Figure:
     return fig
 
 
+def create_correlation_heatmap(analysis_results: Dict) -> go.Figure:
+    """
+    Create a heatmap of the return correlations of the largest coins.
+
+    Args:
+        analysis_results: Dictionary containing analysis results
+
+    Returns:
+        Plotly figure object
+    """
+    correlation_data = analysis_results.get("correlation_analysis") or {}
+    coins = correlation_data.get("coins", [])
+
+    fig = go.Figure(
+        data=[
+            go.Heatmap(
+                z=correlation_data.get("matrix", []),
+                x=coins,
+                y=coins,
+                zmin=-1,
+                zmax=1,
+                colorscale="RdBu",
+                reversescale=True,
+                colorbar=dict(title="Correlation"),
+            )
+        ]
+    )
+
+    halflife = correlation_data.get("halflife_days")
+    fig.update_layout(
+        title=(
+            f"Return Correlations ({correlation_data.get('resolution')} returns, "
+            f"{halflife:g}-day half-life)"
+            if coins
+            else "Return Correlations: not enough price history yet"
+        ),
+        xaxis_tickangle=-45,
+        yaxis_autorange="reversed",
+    )
+
+    return fig
+
+
 def generate_all_graphs(analysis_results: Dict) -> Dict[str, go.Figure]:
     """
     Generate all graphs from the analysis results.
@@ -198,6 +241,7 @@ def generate_all_graphs(analysis_results: Dict) -> Dict[str, go.Figure]:
         "price_change_analysis": create_price_change_analysis(analysis_results),
         "supply_utilization": create_supply_utilization(analysis_results),
         "top_performers": create_top_performers(analysis_results),
+        "correlation_heatmap": create_correlation_heatmap(analysis_results),
     }
 
 
@@ -0,0 +1,57 @@
+"""
+Measure how CryptoDataCleanerModel scoring scales with frame size and n_jobs.
+
+Usage:
+    python -m benchmarks.bench_anomaly_scoring --rows 10000 100000 1000000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml.data_cleaner import CryptoDataCleanerModel
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Generate a frame with the anomaly model's feature columns."""
+    rng = np.random.default_rng(seed)
+    price = rng.lognormal(0, 3, rows)
+    supply = rng.lognormal(16, 2, rows)
+    return pd.DataFrame(
+        {
+            "current_price": price,
+            "market_cap": price * supply,
+            "circulating_supply": supply,
+            "total_supply": supply * rng.uniform(1, 2, rows),
+            "price_change_percentage_24h": rng.normal(0, 5, rows),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anomaly scoring benchmark")
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    model = CryptoDataCleanerModel(contamination=0.1)
+    model.fit(make_frame(10_000, seed=1))
+
+    print(f"{'rows':>10} {'n_jobs':>6} {'seconds':>9} {'rows/s':>12}")
+    for rows in args.rows:
+        df = make_frame(rows)
+        for n_jobs in args.jobs:
+            started = time.perf_counter()
+            model.predict_mask(df, n_jobs=n_jobs, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - started
+            print(f"{rows:>10} {n_jobs:>6} {elapsed:>9.3f} {rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
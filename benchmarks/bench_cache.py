@@ -0,0 +1,89 @@
+"""
+Compare a cold snapshot cache window (every closed day fetched and written)
+with a warm one (closed days memory-mapped, one fetched_at delta query) and
+with building the whole window from the query results.
+
+The queries run against synthetic documents held in memory, so the timings
+cover frame building and cache I/O but not the MongoDB round trips.
+
+Usage:
+    python -m benchmarks.bench_cache --coins 500 --days 3 --interval 5
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.etl.cache import SnapshotCache
+from app.etl.extract import EXTRACT_SCHEMA, build_market_frame
+from benchmarks.synthetic import make_documents
+
+OPS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot cache benchmark")
+    parser.add_argument("--coins", type=int, default=500)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument(
+        "--interval", type=int, default=5, help="Minutes between snapshots"
+    )
+    parser.add_argument("--new-snapshots", type=int, default=1)
+    args = parser.parse_args()
+
+    # Snapshots every `interval` minutes, ending just before `now`
+    now = datetime(2025, 3, 10, 12, tzinfo=timezone.utc)
+    snapshots = args.days * 1440 // args.interval
+    first = now - timedelta(minutes=args.interval * snapshots)
+    documents = []
+    for snapshot in range(snapshots + args.new_snapshots):
+        timestamp = first + timedelta(minutes=args.interval * snapshot)
+        for doc in make_documents(args.coins, 1, seed=snapshot):
+            doc["last_updated"] = doc["fetched_at"] = timestamp
+            documents.append({key: doc[key] for key in EXTRACT_SCHEMA})
+    stored = args.coins * snapshots
+    times = {
+        field: pd.to_datetime([doc[field] for doc in documents], utc=True)
+        for field in ("last_updated", "fetched_at")
+    }
+    print(f"{stored} documents over {args.days} days, {args.coins} coins")
+
+    visible = stored
+
+    def fetch(query):
+        mask = np.arange(len(documents)) < visible
+        for field, condition in query.items():
+            for op, bound in condition.items():
+                mask &= OPS[op](times[field], pd.Timestamp(bound))
+        return build_market_frame([documents[i] for i in np.flatnonzero(mask)])
+
+    start = now - timedelta(days=args.days)
+    with tempfile.TemporaryDirectory() as root:
+        cache = SnapshotCache(root, EXTRACT_SCHEMA)
+
+        started = time.perf_counter()
+        df = fetch({"last_updated": {"$gte": start}})
+        print(f"uncached {time.perf_counter() - started:8.3f}s  {len(df)} rows")
+
+        started = time.perf_counter()
+        df = cache.load_window(start, fetch, now=now)
+        print(f"cold     {time.perf_counter() - started:8.3f}s  {len(df)} rows")
+
+        # The next fetch cycles store a few new snapshots
+        visible = len(documents)
+        later = now + timedelta(minutes=args.interval * args.new_snapshots + 2)
+        started = time.perf_counter()
+        df = cache.load_window(start, fetch, now=later)
+        print(f"warm     {time.perf_counter() - started:8.3f}s  {len(df)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare the pandas and MongoDB aggregation analysis engines on a synthetic
+collection. Unlike the other benchmarks this one needs a MongoDB server
+(MONGODB_URI, MongoDB 7.0+ for $median); it seeds a scratch database and
+drops it afterwards.
+
+Usage:
+    python -m benchmarks.bench_engines --coins 2000 --snapshots 60
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from pymongo import ASCENDING
+
+from app.etl.extract import find_market_frame, window_query
+from app.etl.pushdown import aggregate_analysis
+from app.etl.transform import transform_data
+from app.storage.mongo import get_client
+from benchmarks.synthetic import make_documents
+
+
+def median_time(fn: Callable, repeat: int) -> float:
+    """Median wall time of fn over `repeat` runs, discarding its print() output."""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def top_names(results: Dict) -> List[str]:
+    return [coin["name"] for coin in results["top_performers"]["by_market_cap"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis engine benchmark")
+    parser.add_argument("--coins", type=int, default=2000)
+    parser.add_argument("--snapshots", type=int, default=60)
+    parser.add_argument("--null-rate", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database", default="crypto_bench")
+    parser.add_argument("--keep", action="store_true", help="Keep the database")
+    args = parser.parse_args()
+
+    client = get_client()
+    client.drop_database(args.database)
+    collection = client[args.database]["market_data"]
+    collection.create_index([("last_updated", ASCENDING)])
+    documents = make_documents(args.coins, args.snapshots, null_rate=args.null_rate)
+    for start in range(0, len(documents), 10000):
+        collection.insert_many(documents[start : start + 10000], ordered=False)
+    print(f"Seeded {len(documents)} documents into {args.database}")
+
+    try:
+        match, _ = window_query(collection, days=1)
+        outputs = {}
+
+        def run_pandas():
+            outputs["pandas"] = transform_data(find_market_frame(collection, match))
+
+        def run_mongo():
+            outputs["mongo"], _ = aggregate_analysis(collection, match)
+
+        # Load (or train) the anomaly model before timing the pandas engine
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_pandas()
+        for name, fn in (("pandas", run_pandas), ("mongo", run_mongo)):
+            print(f"{name:<8} {median_time(fn, args.repeat):8.3f}s")
+
+        # The mongo engine skips the anomaly model, so small differences are expected
+        for engine, results in outputs.items():
+            market_cap = results["market_cap_analysis"]
+            print(
+                f"{engine:<8} total market cap {market_cap['total_market_cap']:,}  "
+                f"median {market_cap['market_cap_distribution']['median']:,.0f}"
+            )
+        shared = set(top_names(outputs["pandas"])) & set(top_names(outputs["mongo"]))
+        print(f"Top 10 by market cap in common: {len(shared)}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    main()
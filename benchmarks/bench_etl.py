@@ -0,0 +1,181 @@
+"""
+Time and memory-profile the ETL hot paths on synthetic data and write the
+results as JSON, optionally compared against a previous run.
+
+Usage:
+    python -m benchmarks.bench_etl --coins 2000 --snapshots 30 --output bench_etl.json
+    python -m benchmarks.bench_etl --baseline bench_etl.json --output bench_new.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from app.etl.extract import EXTRACT_SCHEMA, build_market_frame
+from app.etl.load import convert_numpy_types
+from app.etl.transform import (
+    analyze_market_cap,
+    analyze_price_changes,
+    analyze_supply_metrics,
+    clean_data,
+    get_top_performers,
+    rank_metrics,
+    transform_data,
+)
+from app.ml.data_cleaner import CryptoDataCleanerModel
+from app.ml.registry import cleaner_registry
+from benchmarks.synthetic import make_documents
+
+
+def run_case(name: str, fn: Callable, repeat: int) -> Dict:
+    """
+    Time fn over several runs, then measure its peak allocation in one more.
+
+    The code under test logs with print(); its output is discarded.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "name": name,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "peak_mib": peak / 2**20,
+    }
+
+
+def build_cases(documents: List[Dict]) -> List[tuple]:
+    """Prepare the inputs of every case and return (name, callable) pairs."""
+    projected = [{key: doc.get(key) for key in EXTRACT_SCHEMA} for doc in documents]
+    df = build_market_frame(projected)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaned = clean_data(df)
+        analysis_results = transform_data(df)
+    fitted = CryptoDataCleanerModel(contamination=0.1)
+    fitted.fit(df)
+
+    def fit():
+        CryptoDataCleanerModel(contamination=0.1).fit(df)
+
+    return [
+        ("extract.build_market_frame", lambda: build_market_frame(projected)),
+        ("transform.transform_data", lambda: transform_data(df)),
+        ("transform.clean_data", lambda: clean_data(df)),
+        ("transform.rank_metrics", lambda: rank_metrics(cleaned)),
+        ("transform.analyze_market_cap", lambda: analyze_market_cap(cleaned)),
+        ("transform.analyze_price_changes", lambda: analyze_price_changes(cleaned)),
+        ("transform.analyze_supply_metrics", lambda: analyze_supply_metrics(cleaned)),
+        ("transform.get_top_performers", lambda: get_top_performers(cleaned)),
+        ("data_cleaner.fit", fit),
+        ("data_cleaner.predict", lambda: fitted.predict(df)),
+        ("data_cleaner.predict_mask", lambda: fitted.predict_mask(df)),
+        ("load.convert_numpy_types", lambda: convert_numpy_types(analysis_results)),
+    ]
+
+
+def environment() -> Dict:
+    """Versions and machine details needed to compare runs."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def print_results(results: List[Dict], baseline: Dict[str, Dict]) -> None:
+    header = f"{'case':<36} {'median s':>10} {'min s':>10} {'peak MiB':>9}"
+    print(header + (f" {'vs base':>8}" if baseline else ""))
+    for result in results:
+        line = (
+            f"{result['name']:<36} {result['median_s']:>10.4f} "
+            f"{result['min_s']:>10.4f} {result['peak_mib']:>9.1f}"
+        )
+        previous = baseline.get(result["name"])
+        if previous:
+            line += f" {result['median_s'] / previous['median_s']:>7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL micro-benchmarks")
+    parser.add_argument("--coins", type=int, default=2000)
+    parser.add_argument("--snapshots", type=int, default=30)
+    parser.add_argument("--null-rate", type=float, default=0.02)
+    parser.add_argument("--outlier-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", nargs="+", help="Only run cases containing these")
+    parser.add_argument("--output", default="bench_etl.json")
+    parser.add_argument("--baseline", help="Previous JSON output to compare with")
+    args = parser.parse_args()
+
+    documents = make_documents(
+        args.coins,
+        args.snapshots,
+        null_rate=args.null_rate,
+        outlier_rate=args.outlier_rate,
+        seed=args.seed,
+    )
+    print(f"{len(documents)} documents")
+
+    # transform_data trains a model when none exists; keep it out of the repo
+    with tempfile.TemporaryDirectory() as model_dir:
+        cleaner_registry.path = Path(model_dir) / "data_cleaner.joblib"
+        results = [
+            run_case(name, fn, args.repeat)
+            for name, fn in build_cases(documents)
+            if not args.cases or any(part in name for part in args.cases)
+        ]
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+    print_results(results, baseline)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            "coins": args.coins,
+            "snapshots": args.snapshots,
+            "rows": len(documents),
+            "null_rate": args.null_rate,
+            "outlier_rate": args.outlier_rate,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "environment": environment(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the legacy full-document extraction with the projected, typed
+columnar build used by extract_crypto_data.
+
+Usage:
+    python -m benchmarks.bench_extract --coins 2000 --snapshots 60
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.etl.extract import EXTRACT_SCHEMA, build_market_frame
+from benchmarks.synthetic import make_documents
+
+
+def measure(label: str, build) -> pd.DataFrame:
+    """Time a frame build and report its peak allocation and frame size."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = build()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = df.memory_usage(deep=True).sum()
+    print(
+        f"{label:<10} {elapsed:8.3f}s  peak {peak / 2**20:8.1f} MiB  "
+        f"frame {size / 2**20:8.1f} MiB"
+    )
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction benchmark")
+    parser.add_argument("--coins", type=int, default=2000)
+    parser.add_argument("--snapshots", type=int, default=60)
+    args = parser.parse_args()
+
+    documents = make_documents(args.coins, args.snapshots)
+    projected = [{key: doc[key] for key in EXTRACT_SCHEMA} for doc in documents]
+    print(f"{len(documents)} documents")
+
+    measure("legacy", lambda: pd.DataFrame(documents))
+    measure("columnar", lambda: build_market_frame(projected))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Synthetic CoinGecko /coins/markets documents for offline benchmarks.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+# Numeric fields that may be nulled out, as CoinGecko does for young coins
+NULLABLE_FIELDS = (
+    "market_cap",
+    "total_volume",
+    "price_change_percentage_24h",
+    "circulating_supply",
+    "total_supply",
+)
+
+
+def make_documents(
+    coins: int,
+    snapshots: int,
+    null_rate: float = 0.0,
+    outlier_rate: float = 0.0,
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Generate full CoinGecko-style market documents, one per coin per snapshot.
+
+    Args:
+        coins: Number of distinct coins
+        snapshots: Number of fetches, one minute apart
+        null_rate: Probability that each nullable numeric field is None
+        outlier_rate: Probability that a row has an absurd price and 24h change
+        seed: Random seed
+
+    Returns:
+        List of market documents as stored in MongoDB
+    """
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    base_prices = rng.lognormal(0, 3, coins)
+    supplies = rng.lognormal(16, 2, coins)
+    documents = []
+    for snapshot in range(snapshots):
+        timestamp = start + timedelta(minutes=snapshot)
+        prices = base_prices * rng.lognormal(0, 0.01, coins)
+        changes = rng.normal(0, 5, coins)
+        outliers = rng.random(coins) < outlier_rate
+        prices[outliers] *= 1e4
+        changes[outliers] = rng.choice([-99.0, 5000.0], outliers.sum())
+        nulls = rng.random((coins, len(NULLABLE_FIELDS))) < null_rate
+        for coin in range(coins):
+            price = float(prices[coin])
+            supply = float(supplies[coin])
+            document = {
+                "id": f"coin-{coin}",
+                "symbol": f"c{coin}",
+                "name": f"Coin {coin}",
+                "image": f"https://assets.coingecko.com/coins/images/{coin}/large.png",
+                "current_price": price,
+                "market_cap": price * supply,
+                "market_cap_rank": coin + 1,
+                "fully_diluted_valuation": price * supply * 2,
+                "total_volume": price * supply * 0.05,
+                "high_24h": price * 1.05,
+                "low_24h": price * 0.95,
+                "price_change_24h": price * float(changes[coin]) / 100,
+                "price_change_percentage_24h": float(changes[coin]),
+                "market_cap_change_24h": price * supply * float(changes[coin]) / 100,
+                "market_cap_change_percentage_24h": float(changes[coin]),
+                "circulating_supply": supply,
+                "total_supply": supply * 2,
+                "max_supply": None,
+                "ath": price * 3,
+                "ath_change_percentage": -60.0,
+                "ath_date": "2021-11-10T14:24:11.849Z",
+                "atl": price / 10,
+                "atl_change_percentage": 900.0,
+                "atl_date": "2015-10-20T00:00:00.000Z",
+                "roi": {"times": 1.5, "currency": "usd", "percentage": 150.0},
+                "last_updated": timestamp,
+                "fetched_at": timestamp,
+            }
+            for field, is_null in zip(NULLABLE_FIELDS, nulls[coin]):
+                if is_null:
+                    document[field] = None
+            documents.append(document)
+    return documents
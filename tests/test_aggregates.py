@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from app.etl.aggregates import QuantileSketch, RunningStats, TopK
+
+
+def batches(values, sizes):
+    """Split values into consecutive batches of the given sizes."""
+    return np.split(values, np.cumsum(sizes)[:-1])
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(10, 3, 5000)
+    values[rng.random(len(values)) < 0.05] = np.nan
+    return values
+
+
+def test_running_stats_merge_matches_single_pass(values):
+    merged = RunningStats()
+    for batch in batches(values, [1, 2, 997, 3000, 1000]):
+        part = RunningStats()
+        part.update(batch)
+        # State is persisted between runs
+        merged.merge(RunningStats.from_dict(part.to_dict()))
+
+    single = RunningStats()
+    single.update(values)
+    observed = values[~np.isnan(values)]
+    for stats in (merged, single):
+        assert stats.count == len(observed)
+        assert stats.total == pytest.approx(observed.sum(), rel=1e-12)
+        assert stats.mean == pytest.approx(observed.mean(), rel=1e-12)
+        assert stats.std == pytest.approx(observed.std(ddof=1), rel=1e-9)
+
+
+def test_running_stats_edge_cases():
+    stats = RunningStats()
+    stats.update(np.array([np.nan]))
+    stats.merge(RunningStats())
+    assert stats.count == 0 and np.isnan(stats.std)
+    stats.update(np.array([4.0]))
+    assert (stats.mean, stats.total) == (4.0, 4.0) and np.isnan(stats.std)
+    assert RunningStats.from_dict(None).to_dict() == RunningStats().to_dict()
+
+
+@pytest.mark.parametrize("q", [0.0, 0.01, 0.25, 0.5, 0.9, 1.0])
+def test_quantile_sketch_relative_error(values, q):
+    sketch = QuantileSketch(0.01)
+    for batch in batches(values, [100, 2400, 2500]):
+        part = QuantileSketch(0.01)
+        part.update(batch)
+        sketch.merge(QuantileSketch.from_dict(part.to_dict()))
+
+    single = QuantileSketch(0.01)
+    single.update(values)
+    assert sketch.buckets == single.buckets
+
+    observed = values[~np.isnan(values)]
+    exact = np.quantile(observed, q, method="lower")
+    assert sketch.quantile(q) == pytest.approx(exact, rel=0.01)
+
+
+def test_quantile_sketch_ignores_non_positive():
+    sketch = QuantileSketch()
+    sketch.update(np.array([-1.0, 0.0, np.nan]))
+    assert sketch.count == 0 and np.isnan(sketch.quantile(0.5))
+
+
+@pytest.mark.parametrize("largest", [True, False])
+def test_top_k_merge_matches_full_sort(values, largest):
+    names = np.array([f"c{i}" for i in range(len(values))], dtype=object)
+    merged = TopK(10, "market_cap", largest)
+    offset = 0
+    for batch in batches(values, [5, 1000, 3995]):
+        part = TopK(10, "market_cap", largest)
+        part.update(names[offset : offset + len(batch)], batch)
+        merged.merge(TopK.from_dict(part.to_dict()))
+        offset += len(batch)
+
+    single = TopK(10, "market_cap", largest)
+    single.update(names, values)
+
+    observed = np.flatnonzero(~np.isnan(values))
+    order = observed[np.argsort(values[observed])]
+    best = (order[::-1] if largest else order)[:10]
+    expected = [{"name": names[i], "market_cap": float(values[i])} for i in best]
+    assert merged.records == expected
+    assert single.records == expected
@@ -0,0 +1,105 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.data.bars import _merge_pipeline, aggregate_bars
+
+BUCKET = datetime(2025, 3, 10, 12, tzinfo=timezone.utc)
+
+
+def snapshot(seconds, price, volume=None):
+    return {
+        "id": "btc",
+        "current_price": price,
+        "total_volume": price * 10 if volume is None else volume,
+        "last_updated": BUCKET + timedelta(seconds=seconds),
+    }
+
+
+# Prices by second within one 1m bucket: open 10, high 30, low 5, close 20
+SNAPSHOTS = [
+    snapshot(0, 10.0),
+    snapshot(15, 30.0),
+    snapshot(30, 5.0),
+    snapshot(59, 20.0),
+]
+
+
+def evaluate(expression, doc):
+    """Evaluate the aggregation operators used by _merge_pipeline."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if not isinstance(expression, dict):
+        return expression
+    ((op, args),) = expression.items()
+    if op == "$cond":
+        condition, then, otherwise = args
+        return evaluate(then if evaluate(condition, doc) else otherwise, doc)
+    values = [evaluate(arg, doc) for arg in args]
+    if op == "$or":
+        return any(values)
+    if op == "$not":
+        return not values[0]
+    if op in ("$lt", "$gte"):
+        # Missing values sort before everything, as in BSON comparison order
+        left, right = ((value is not None, value) for value in values)
+        return left < right if op == "$lt" else left >= right
+    # $min and $max ignore missing values
+    present = [value for value in values if value is not None]
+    if op == "$min":
+        return min(present, default=None)
+    if op == "$max":
+        return max(present, default=None)
+    raise NotImplementedError(op)
+
+
+def merge(stored, coin_id, bucket, bar):
+    (stage,) = _merge_pipeline(coin_id, bucket, bar)
+    (fields,) = stage.values()
+    return {field: evaluate(expression, stored) for field, expression in fields.items()}
+
+
+def assert_ohlc(bar):
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (10, 30, 5, 20)
+    assert bar["open_at"] == BUCKET
+    assert bar["close_at"] == BUCKET + timedelta(seconds=59)
+    assert bar["volume"] == 200
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(4))))
+def test_aggregate_bars_is_order_independent(order):
+    bars = aggregate_bars([SNAPSHOTS[i] for i in order], 60)
+    assert list(bars) == [("btc", BUCKET)]
+    assert_ohlc(bars["btc", BUCKET])
+
+
+def test_aggregate_bars_buckets_and_skips_invalid_rows():
+    naive = dict(snapshot(61, 7.0), last_updated=datetime(2025, 3, 10, 12, 1, 1))
+    rows = SNAPSHOTS + [
+        naive,
+        dict(snapshot(5, 99.0), current_price=None),
+        dict(snapshot(5, 99.0), last_updated="2025-03-10T12:00:05Z"),
+    ]
+    bars = aggregate_bars(rows, 60)
+    assert_ohlc(bars["btc", BUCKET])
+    assert bars["btc", BUCKET + timedelta(minutes=1)]["close"] == 7.0
+    assert list(aggregate_bars(rows, 3600)) == [("btc", BUCKET)]
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(4))))
+def test_merging_partial_bars_is_order_independent(order):
+    stored = {}
+    for i in order:
+        ((key, bar),) = aggregate_bars([SNAPSHOTS[i]], 60).items()
+        stored = merge(stored, *key, bar)
+    assert_ohlc(stored)
+    assert (stored["id"], stored["bucket"]) == ("btc", BUCKET)
+
+
+def test_merge_is_idempotent():
+    ((key, bar),) = aggregate_bars(SNAPSHOTS[1:3], 60).items()
+    stored = merge({}, *key, bar)
+    assert merge(stored, *key, bar) == stored
+    ((key, bar),) = aggregate_bars([SNAPSHOTS[3], SNAPSHOTS[0]], 60).items()
+    assert_ohlc(merge(stored, *key, bar))
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from app.etl.cache import SnapshotCache
+from app.etl.extract import EXTRACT_SCHEMA, build_market_frame
+
+OPS = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+}
+
+DAY = datetime(2025, 3, 2, tzinfo=timezone.utc)
+
+
+class FakeCollection:
+    """Market documents with a find() for the range filters the cache issues."""
+
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def add(self, coin, last_updated, fetched_at):
+        self.documents.append(
+            {
+                "id": coin,
+                "name": coin.title(),
+                "current_price": 1.0,
+                "last_updated": last_updated,
+                "fetched_at": fetched_at,
+            }
+        )
+
+    def fetch(self, query):
+        self.queries.append(query)
+        matches = [
+            doc
+            for doc in self.documents
+            if all(
+                OPS[op](doc[field], bound)
+                for field, condition in query.items()
+                for op, bound in condition.items()
+            )
+        ]
+        return build_market_frame(matches)
+
+    def window(self, start):
+        return self.fetch({"last_updated": {"$gte": start}})
+
+
+def rows(df):
+    return sorted(zip(df["id"].astype(str), df["last_updated"]))
+
+
+@pytest.fixture
+def collection():
+    collection = FakeCollection()
+    collection.add("alpha", DAY - timedelta(hours=1), DAY - timedelta(hours=1))
+    collection.add("alpha", DAY + timedelta(minutes=5), DAY + timedelta(minutes=5))
+    return collection
+
+
+def test_late_row_of_closed_day_is_folded(tmp_path, collection):
+    cache = SnapshotCache(str(tmp_path), EXTRACT_SCHEMA)
+    start = DAY - timedelta(days=1)
+    cache.load_window(start, collection.fetch, now=DAY + timedelta(minutes=20))
+
+    # Stamped yesterday 23:30 but only fetched after yesterday was closed
+    collection.add("beta", DAY - timedelta(minutes=30), DAY + timedelta(minutes=30))
+    now = DAY + timedelta(minutes=40)
+    df = cache.load_window(start, collection.fetch, now=now)
+    assert rows(df) == rows(collection.window(start))
+
+    # The partition was rewritten, so a fresh process sees the row too
+    restarted = SnapshotCache(str(tmp_path), EXTRACT_SCHEMA)
+    df = restarted.load_window(start, collection.fetch, now=now)
+    assert rows(df) == rows(collection.window(start))
+
+
+def test_late_row_is_picked_up_after_restart(tmp_path, collection):
+    start = DAY - timedelta(days=1)
+    SnapshotCache(str(tmp_path), EXTRACT_SCHEMA).load_window(
+        start, collection.fetch, now=DAY + timedelta(minutes=20)
+    )
+    collection.add("beta", DAY - timedelta(minutes=30), DAY + timedelta(minutes=30))
+
+    restarted = SnapshotCache(str(tmp_path), EXTRACT_SCHEMA)
+    df = restarted.load_window(start, collection.fetch, now=DAY + timedelta(hours=1))
+    assert rows(df) == rows(collection.window(start))
+
+
+def test_row_already_in_partition_is_not_duplicated(tmp_path, collection):
+    # Fetched inside the settle period of the run that writes the partition
+    collection.add(
+        "beta", DAY - timedelta(seconds=30), DAY + timedelta(minutes=19, seconds=30)
+    )
+    cache = SnapshotCache(str(tmp_path), EXTRACT_SCHEMA)
+    start = DAY - timedelta(days=1)
+    cache.load_window(start, collection.fetch, now=DAY + timedelta(minutes=20))
+    df = cache.load_window(start, collection.fetch, now=DAY + timedelta(minutes=40))
+    assert rows(df) == rows(collection.window(start))
+
+
+def test_warm_window_runs_one_query(tmp_path, collection):
+    cache = SnapshotCache(str(tmp_path), EXTRACT_SCHEMA)
+    start = DAY - timedelta(days=1)
+    cache.load_window(start, collection.fetch, now=DAY + timedelta(minutes=20))
+    collection.add("alpha", DAY + timedelta(minutes=25), DAY + timedelta(minutes=25))
+
+    collection.queries.clear()
+    df = cache.load_window(start, collection.fetch, now=DAY + timedelta(minutes=40))
+    assert len(collection.queries) == 1
+    assert "fetched_at" in collection.queries[0]
+    assert rows(df) == rows(collection.window(start))
+    assert isinstance(df, pd.DataFrame)
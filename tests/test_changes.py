@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+
+from app.data.changes import SCHEDULE_ID, ChangeTracker, fingerprint
+from app.data.current import CURRENT_MARKET_COLLECTION
+from app.etl.incremental import STATE_COLLECTION
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = {doc["_id"]: doc for doc in documents}
+
+    def find(self, query, projection=None):
+        return list(self.documents.values())
+
+    def find_one(self, query):
+        return self.documents.get(query["_id"])
+
+    def replace_one(self, query, document, upsert=False):
+        self.documents[query["_id"]] = document
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def row(coin, price, last_updated="2025-01-01T00:00:00.000Z"):
+    return {
+        "id": coin,
+        "last_updated": last_updated,
+        "current_price": price,
+        "market_cap": 10.0,
+        "total_volume": 1.0,
+    }
+
+
+def test_fingerprint_normalizes_timestamps():
+    raw = row("btc", 1.0, "2025-01-01T00:00:00.000Z")
+    stored = dict(raw, _id="btc", last_updated=datetime(2025, 1, 1))
+    aware = dict(raw, last_updated=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert fingerprint(raw) == fingerprint(stored) == fingerprint(aware)
+    assert fingerprint(raw) != fingerprint(row("btc", 1.5))
+    assert fingerprint(raw) != fingerprint(row("btc", 1.0, "2025-01-01T00:01:00Z"))
+
+
+def test_select_changed_skips_stored_snapshots():
+    stored = dict(row("btc", 1.0), _id="btc")
+    db = FakeDatabase({CURRENT_MARKET_COLLECTION: FakeCollection([stored])})
+    tracker = ChangeTracker()
+    tracker.load(db)
+
+    changed, pending = tracker.select_changed([row("btc", 1.0), row("eth", 2.0)])
+    assert [r["id"] for r in changed] == ["eth"]
+    tracker.mark_stored(1, pending)
+    # Once stored, the same snapshot is unchanged
+    assert tracker.select_changed([row("eth", 2.0)]) == ([], {})
+
+
+def test_stable_pages_back_off_exponentially():
+    tracker = ChangeTracker(hot_pages=1, max_interval=4)
+    tracker.fingerprints = {}
+    fetched = {page: [] for page in (1, 2, 3)}
+    for cycle in range(1, 17):
+        for page in tracker.pages_due(3):
+            fetched[page].append(cycle)
+            # Page 3 changes on every fetch, page 2 never does
+            tracker.mark_stored(page, {"x": b"new"} if page == 3 else {})
+    assert fetched[1] == list(range(1, 17))
+    assert fetched[3] == list(range(1, 17))
+    # Intervals 2, 4, then capped at max_interval
+    assert fetched[2] == [1, 3, 7, 11, 15]
+
+
+def test_changed_page_is_polled_every_cycle_again():
+    tracker = ChangeTracker(hot_pages=0, max_interval=8)
+    tracker.fingerprints = {}
+    for _ in range(3):
+        for page in tracker.pages_due(1):
+            tracker.mark_stored(page, {})
+    assert tracker.pages_due(1) == []
+    tracker._cycle += 3
+    assert tracker.pages_due(1) == [1]
+    tracker.mark_stored(1, {"btc": b"new"})
+    assert tracker.pages_due(1) == [1]
+
+
+def test_schedule_survives_restarts():
+    db = FakeDatabase()
+    tracker = ChangeTracker(hot_pages=1, max_interval=8)
+    tracker.load(db)
+    for _ in range(3):
+        for page in tracker.pages_due(3):
+            tracker.mark_stored(page, {})
+    tracker.save(db)
+    assert set(db[STATE_COLLECTION].documents[SCHEDULE_ID]["pages"]) == {"1", "2", "3"}
+
+    restarted = ChangeTracker(hot_pages=1, max_interval=8)
+    restarted.load(db)
+    fresh = ChangeTracker(hot_pages=1, max_interval=8)
+    fresh.load(FakeDatabase())
+    assert restarted.pages_due(3) == tracker.pages_due(3) == [1]
+    assert fresh.pages_due(3) == [1, 2, 3]
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.etl.correlation import (
+    CORRELATION_STATE_ID,
+    CorrelationState,
+    correlated_pairs,
+    update_correlations,
+)
+
+
+def riskmetrics(returns, decay):
+    """Period-by-period RiskMetrics update, missing returns counted as zero."""
+    covariance = np.zeros((returns.shape[1], returns.shape[1]))
+    for row in np.nan_to_num(returns):
+        covariance = decay * covariance + (1 - decay) * np.outer(row, row)
+    return covariance
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    market = rng.normal(0, 0.01, 300)
+    returns = 0.7 * market[:, None] + rng.normal(0, 0.01, (300, 300))
+    returns[rng.random(returns.shape) < 0.05] = np.nan
+    return returns
+
+
+def new_state(coins, decay):
+    state = CorrelationState()
+    state.reindex([f"c{i}" for i in range(coins)])
+    state.decay = decay
+    return state
+
+
+def test_batched_update_matches_iterative_riskmetrics(returns):
+    # More coins than BLOCK_ROWS, so several row blocks are updated
+    state = new_state(returns.shape[1], 0.97)
+    for batch in np.array_split(returns, [1, 120]):
+        state.update(batch)
+    expected = riskmetrics(returns, 0.97)
+    np.testing.assert_allclose(state.covariance, expected, rtol=1e-4, atol=1e-10)
+    np.testing.assert_array_equal(state.observations, (~np.isnan(returns)).sum(axis=0))
+
+    std = np.sqrt(np.diag(expected))
+    rows = np.arange(0, 300, 7)
+    np.testing.assert_allclose(
+        state.correlation(rows),
+        (expected / np.outer(std, std))[np.ix_(rows, rows)],
+        rtol=1e-4,
+        atol=1e-5,
+    )
+
+
+def test_state_round_trip_and_reindex(returns):
+    state = new_state(5, 0.9)
+    state.update(returns[:, :5])
+    restored = CorrelationState(state.to_dict())
+    np.testing.assert_array_equal(restored.covariance, state.covariance)
+
+    restored.reindex(["c3", "new", "c1"])
+    np.testing.assert_array_equal(
+        restored.covariance[np.ix_([0, 2], [0, 2])],
+        state.covariance[np.ix_([3, 1], [3, 1])],
+    )
+    assert not restored.covariance[1].any()
+    assert restored.observations.tolist()[1] == 0
+
+
+def test_correlated_pairs_match_full_sort():
+    rng = np.random.default_rng(1)
+    correlation = np.corrcoef(rng.normal(size=(12, 40)))
+    correlation[2, :] = correlation[:, 2] = np.nan
+    names = [f"c{i}" for i in range(12)]
+    first, second = np.triu_indices(12, 1)
+    pairs = sorted(
+        (
+            (correlation[i, j], [names[i], names[j]])
+            for i, j in zip(first, second)
+            if not np.isnan(correlation[i, j])
+        ),
+        key=lambda pair: pair[0],
+    )
+    most = correlated_pairs(names, correlation, 5, True)
+    least = correlated_pairs(names, correlation, 5, False)
+    assert [p["pair"] for p in most] == [pair for _, pair in pairs[::-1][:5]]
+    assert [p["pair"] for p in least] == [pair for _, pair in pairs[:5]]
+
+
+class Cursor(list):
+    def sort(self, field, direction):
+        return Cursor(sorted(self, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, n):
+        return Cursor(self[:n])
+
+
+class Collection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.stored = {}
+
+    def find(self, query, projection=None):
+        if "bucket" not in query:
+            return Cursor(self.docs)
+        ids = set(query["id"]["$in"])
+        low = query["bucket"]["$gte"].replace(tzinfo=None)
+        high = query["bucket"]["$lt"].replace(tzinfo=None)
+        return [d for d in self.docs if d["id"] in ids and low <= d["bucket"] < high]
+
+    def find_one(self, query):
+        return self.stored.get(query["_id"])
+
+    def replace_one(self, query, doc, upsert=False):
+        self.stored[query["_id"]] = doc
+
+
+def fake_db(end, coins=6, hours=400):
+    rng = np.random.default_rng(2)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (hours, coins)), axis=0))
+    bars = [
+        {
+            "id": f"c{coin}",
+            "bucket": (end - timedelta(hours=hours - hour)).replace(tzinfo=None),
+            "close": float(closes[hour, coin]),
+        }
+        for coin in range(coins)
+        for hour in range(hours)
+        if not (coin == 3 and hour % 7 == 0)
+    ]
+    market = [
+        {"_id": f"c{coin}", "name": f"Coin {coin}", "market_cap": 1e9 - coin}
+        for coin in range(coins)
+    ]
+    return {
+        "market_bars_1h": Collection(bars),
+        "current_market": Collection(market),
+        "etl_state": Collection(),
+    }
+
+
+def test_incremental_runs_match_one_shot():
+    end = datetime(2026, 1, 10, tzinfo=timezone.utc)
+    args = ("1h", 6, 4, 7)
+
+    one_shot = fake_db(end)
+    update_correlations(*args, db=one_shot, now=end + timedelta(minutes=5))
+
+    incremental = fake_db(end)
+    for now in (end - timedelta(hours=50), end - timedelta(hours=49, minutes=30), end):
+        results = update_correlations(
+            *args, db=incremental, now=now + timedelta(minutes=5)
+        )
+
+    expected = CorrelationState(one_shot["etl_state"].stored[CORRELATION_STATE_ID])
+    state = CorrelationState(incremental["etl_state"].stored[CORRELATION_STATE_ID])
+    assert state.watermark == expected.watermark
+    np.testing.assert_allclose(state.covariance, expected.covariance, rtol=1e-4)
+    assert results["coins"] == ["Coin 0", "Coin 1", "Coin 2", "Coin 3"]
+    assert len(results["most_correlated"]) == 5
@@ -0,0 +1,133 @@
+import pytest
+import requests
+
+from app.data import extract
+from app.data.extract import TokenBucket, _retry_after, fetch_page_with_backoff
+
+
+class FakeClock:
+    """Stands in for the time module; sleep() advances monotonic()."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(extract, "time", clock)
+    return clock
+
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(response=response)
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+    assert clock.now == pytest.approx(101.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1)
+    bucket.acquire()
+    clock.now += 60
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [1.0]
+
+
+def test_pause_blocks_every_acquire(clock):
+    bucket = TokenBucket(rate=4)
+    bucket.pause(5)
+    bucket.pause(2)  # a shorter pause does not cut the longer one
+    bucket.acquire()
+    # The pause also empties the bucket, so the next token takes 1 / rate
+    assert clock.sleeps == [5.0, 0.25]
+
+
+def test_non_positive_rate_disables_limiting(clock):
+    bucket = TokenBucket(rate=0)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        # pycoingecko re-raises the JSON error body as ValueError(dict)
+        (ValueError({"status": {"error_code": 429, "error_message": "limit"}}), 0.0),
+        (ValueError({"error_code": 429}), 0.0),
+        (ValueError({"error": "coin not found"}), None),
+        (ValueError("invalid literal"), None),
+        # Raw HTTP errors from the session
+        (http_error(429, {"Retry-After": "30"}), 30.0),
+        (http_error(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}), 0.0),
+        (http_error(429), 0.0),
+        (http_error(500), None),
+        (requests.HTTPError("no response"), None),
+    ],
+)
+def test_retry_after(error, expected):
+    assert _retry_after(error) == expected
+
+
+class FakeClient:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def get_coins_markets(self, **params):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return [{"id": "btc", "page": params["page"]}]
+
+
+def test_fetch_backs_off_on_rate_limits(clock):
+    limiter = TokenBucket(rate=4)
+    client = FakeClient(
+        [
+            ValueError({"status": {"error_code": 429}}),
+            http_error(429, {"Retry-After": "9"}),
+        ]
+    )
+    data = fetch_page_with_backoff(3, 100, limiter, client, base_backoff=2.0)
+    assert data == [{"id": "btc", "page": 3}]
+    assert client.calls == 3
+    # max(Retry-After, 2 * 2**attempt): 2s, then the 9s the server asked for,
+    # each followed by the 1 / rate refill of the emptied bucket
+    assert clock.sleeps == [2.0, 0.25, 9.0, 0.25]
+
+
+def test_fetch_gives_up_after_max_retries(clock):
+    limiter = TokenBucket(rate=4)
+    client = FakeClient([http_error(429)] * 3)
+    with pytest.raises(requests.HTTPError):
+        fetch_page_with_backoff(1, 100, limiter, client, max_retries=2)
+    assert client.calls == 3
+
+
+def test_fetch_raises_other_errors_immediately(clock):
+    client = FakeClient([http_error(500)])
+    with pytest.raises(requests.HTTPError):
+        fetch_page_with_backoff(1, 100, TokenBucket(rate=4), client)
+    assert client.calls == 1
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.scheduler import history
+
+
+class FakeCollection:
+    """Keeps index options and rejects a TTL change like MongoDB does."""
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.indexes = {}
+        self.documents = []
+
+    def create_index(self, keys, expireAfterSeconds=None, name=None, **kwargs):
+        name = name or "_".join(field for field, _ in keys)
+        existing = self.indexes.get(name)
+        if existing is not None and existing != expireAfterSeconds:
+            raise OperationFailure("Index with name already exists", code=85)
+        self.indexes[name] = expireAfterSeconds
+        return name
+
+    def insert_one(self, document):
+        self.documents.append(document)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection(self, name))
+
+    def command(self, name, collection, index):
+        self.commands.append((name, collection, index))
+        self[collection].indexes[index["name"]] = index["expireAfterSeconds"]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(history, "get_db", lambda: db)
+    monkeypatch.setattr(history, "_indexes_ready", False)
+    return db
+
+
+def test_changed_ttl_is_applied_and_runs_are_still_recorded(db, monkeypatch):
+    collection = db[history.JOB_RUNS_COLLECTION]
+    collection.indexes["started_at_ttl"] = 7 * 24 * 3600
+    monkeypatch.setattr(history, "JOB_HISTORY_TTL_DAYS", 14)
+
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    history.record_job_run(
+        "fetch", started, started + timedelta(seconds=3), "partial", rows=5
+    )
+
+    assert collection.indexes["started_at_ttl"] == 14 * 24 * 3600
+    assert db.commands[0][0] == "collMod"
+    assert history._indexes_ready
+    assert collection.documents[0]["outcome"] == "partial"
+    assert collection.documents[0]["duration_seconds"] == 3
+
+
+def test_index_failure_does_not_stop_recording(db, monkeypatch):
+    def fail():
+        raise OperationFailure("not authorized", code=13)
+
+    monkeypatch.setattr(history, "ensure_history_indexes", fail)
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    history.record_job_run("etl", started, started, "failed", error="boom")
+    assert db[history.JOB_RUNS_COLLECTION].documents[0]["error"] == "boom"
+    assert not history._indexes_ready
@@ -0,0 +1,155 @@
+import copy
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.etl import incremental
+from app.etl.incremental import SETTLE, IncrementalState, run_incremental_analysis
+from app.etl.transform import rank_metrics
+
+
+def cleaned_frame(rows, seed=0):
+    """Rows shaped like clean_data output, with distinct metric values."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "name": [f"Coin {i}" for i in range(rows)],
+            "market_cap": rng.lognormal(18, 2, rows),
+            "total_volume": rng.lognormal(15, 2, rows),
+            "price_change_percentage_24h": rng.normal(0, 5, rows),
+            "circulating_supply": rng.uniform(1, 100, rows),
+            "total_supply": rng.uniform(100, 200, rows),
+        }
+    )
+
+
+def test_state_round_trip_matches_single_batch():
+    df = cleaned_frame(3000)
+    incremental = IncrementalState()
+    for start, stop in [(0, 10), (10, 1500), (1500, 3000)]:
+        incremental.update(df.iloc[start:stop])
+        # Each run starts from the persisted document
+        incremental = IncrementalState(copy.deepcopy(incremental.to_dict()))
+        incremental.runs_since_rebuild += 1
+
+    single = IncrementalState()
+    single.update(df)
+    assert incremental.runs_since_rebuild == 3
+
+    merged_results = incremental.to_results()
+    single_results = single.to_results()
+    for section in ("top_performers", "supply_analysis", "price_analysis"):
+        for key, value in single_results[section].items():
+            if isinstance(value, list):
+                assert merged_results[section][key] == value
+            else:
+                assert merged_results[section][key] == pytest.approx(value)
+    distribution = merged_results["market_cap_analysis"]["market_cap_distribution"]
+    assert distribution["mean"] == pytest.approx(df["market_cap"].mean())
+    assert distribution["std"] == pytest.approx(df["market_cap"].std())
+    assert distribution["median"] == pytest.approx(df["market_cap"].median(), rel=0.02)
+    assert merged_results["market_cap_analysis"]["total_market_cap"] == pytest.approx(
+        int(df["market_cap"].sum()), abs=1
+    )
+
+
+def test_rankings_match_rank_metrics():
+    df = cleaned_frame(500, seed=1)
+    state = IncrementalState()
+    state.update(df.iloc[:250])
+    state.update(df.iloc[250:])
+    results = state.to_results()
+    rankings = rank_metrics(df)
+    assert (
+        results["top_performers"]["by_market_cap"] == rankings["market_cap"]["largest"]
+    )
+    assert results["top_performers"]["by_volume"] == rankings["total_volume"]["largest"]
+    assert (
+        results["price_analysis"]["least_volatile"]
+        == rankings["price_change_percentage_24h"]["smallest"]
+    )
+    assert (
+        results["supply_analysis"]["lowest_utilization"]
+        == rankings["supply_utilization"]["smallest"]
+    )
+
+
+def test_empty_state_returns_empty_results():
+    state = IncrementalState()
+    state.update(cleaned_frame(0))
+    assert state.to_results()["market_cap_analysis"]["total_market_cap"] == 0
+
+
+class Run:
+    """Patches the incremental module's storage and extraction."""
+
+    def __init__(self, monkeypatch, state=None):
+        self.saved = state
+        self.calls = []
+        self.frame = cleaned_frame(0)
+        monkeypatch.setattr(incremental, "load_state", lambda: self.saved)
+        monkeypatch.setattr(incremental, "save_state", self.save)
+        monkeypatch.setattr(incremental, "extract_crypto_data", self.extract)
+        monkeypatch.setattr(incremental, "clean_data", lambda df: df)
+
+    def save(self, state):
+        self.saved = IncrementalState(copy.deepcopy(state.to_dict()))
+
+    def extract(self, days=1, since=None):
+        self.calls.append(since)
+        return self.frame
+
+
+def with_fetched_at(df, fetched_at):
+    return df.assign(fetched_at=pd.to_datetime(fetched_at, utc=True))
+
+
+def test_rows_inside_the_settle_period_are_read_again(monkeypatch):
+    now = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    run = Run(monkeypatch)
+    df = cleaned_frame(4)
+    # The last two rows belong to a page still being written
+    run.frame = with_fetched_at(
+        df, [now - timedelta(minutes=5)] * 2 + [now - timedelta(seconds=10)] * 2
+    )
+    _, rows = run_incremental_analysis(now=now)
+    assert rows == 2
+    assert run.saved.watermark == now - SETTLE
+    assert run.saved.market_cap.count == 2
+
+    # The next run reads from the cutoff and picks up the rest of the page
+    run.frame = run.frame.iloc[2:]
+    _, rows = run_incremental_analysis(now=now + timedelta(minutes=1))
+    assert run.calls[-1] == now - SETTLE
+    assert rows == 2
+    assert run.saved.market_cap.count == 4
+
+
+def test_empty_extract_keeps_the_watermark(monkeypatch):
+    now = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    state = IncrementalState({"watermark": now - timedelta(hours=1)})
+    state.update(cleaned_frame(3))
+    run = Run(monkeypatch, state)
+    run_incremental_analysis(now=now)
+    assert run.saved.watermark == now - timedelta(hours=1)
+    assert run.saved.runs_since_rebuild == 1
+
+
+def test_failed_rebuild_keeps_the_previous_state(monkeypatch):
+    now = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    state = IncrementalState(
+        {"watermark": now - timedelta(hours=1), "runs_since_rebuild": 120}
+    )
+    state.update(cleaned_frame(3))
+    run = Run(monkeypatch, state)
+    results, rows = run_incremental_analysis(full_rebuild_every=120, now=now)
+    assert rows == 0
+    assert run.saved is state
+    assert results == state.to_results()
+
+    # Without a previous state nothing is saved, so the next run rebuilds
+    run.saved = None
+    run_incremental_analysis(now=now)
+    assert run.saved is None
@@ -0,0 +1,83 @@
+import pytest
+
+from app.utils.metrics import (
+    COLLECTION_DOCUMENTS,
+    Counter,
+    Gauge,
+    Histogram,
+    _Metric,
+    registry,
+    render,
+)
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("base", "Not a metric")
+
+
+def test_render_merges_processes():
+    counter = Counter("runs_total", "Runs", ["status"])
+    counter.inc(status="success")
+    gauge = Gauge("size", "Size", ["collection"])
+    gauge.set_function(lambda: {("market_data",): 42})
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    histogram.observe(0.5)
+
+    text = render(
+        {
+            "worker": [
+                {
+                    "name": "runs_total",
+                    "help": "Runs",
+                    "type": "counter",
+                    "samples": [list(s) for s in counter.samples()],
+                }
+            ],
+            "dashboard": [
+                {
+                    "name": "size",
+                    "help": "Size",
+                    "type": "gauge",
+                    "samples": [list(s) for s in gauge.samples()],
+                },
+                {
+                    "name": "latency_seconds",
+                    "help": "Latency",
+                    "type": "histogram",
+                    "samples": [list(s) for s in histogram.samples()],
+                },
+            ],
+        }
+    )
+    assert 'runs_total{process="worker",status="success"} 1' in text
+    assert 'size{process="dashboard",collection="market_data"} 42' in text
+    assert 'latency_seconds_bucket{process="dashboard",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{process="dashboard",le="1.0"} 1' in text
+
+
+def test_importing_dashboards_does_not_register_collection_sizes():
+    import app.visualization.dashboards  # noqa: F401
+
+    # Only run_dashboard_server installs the collection size callback, so a
+    # worker that imports the module publishes no collection gauges
+    family = next(
+        f for f in registry.collect() if f["name"] == COLLECTION_DOCUMENTS.name
+    )
+    assert family["samples"] == []
+
+
+def test_collection_sizes_cover_every_collection(monkeypatch):
+    from app.visualization import dashboards
+
+    class FakeDatabase(dict):
+        def __missing__(self, name):
+            collection = type("FakeCollection", (), {})()
+            collection.estimated_document_count = lambda: len(name)
+            return collection
+
+    monkeypatch.setattr(dashboards, "get_db", FakeDatabase)
+    sizes = dashboards.collection_sizes()
+    for name in ("current_market", "etl_state", "process_metrics", "job_runs"):
+        assert sizes[(name,)] == len(name)
+    assert len(sizes) == len(dashboards.SIZED_COLLECTIONS)
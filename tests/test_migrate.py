@@ -0,0 +1,60 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.data.migrate import dedupe_snapshots
+
+
+class FakeCollection:
+    """Evaluates the dedupe $group over in-memory documents."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.deletes = []
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        assert allowDiskUse
+        key = pipeline[0]["$group"]["_id"]
+        groups = defaultdict(list)
+        for doc in self.documents:
+            groups[tuple(doc[path[1:]] for path in key.values())].append(doc["_id"])
+        for ids in groups.values():
+            if len(ids) > 1:
+                yield {"keep": min(ids), "ids": ids}
+
+    def delete_many(self, query):
+        ids = set(query["_id"]["$in"])
+        self.deletes.append(len(ids))
+        before = len(self.documents)
+        self.documents = [doc for doc in self.documents if doc["_id"] not in ids]
+        return SimpleNamespace(deleted_count=before - len(self.documents))
+
+
+def test_keeps_first_stored_copy_of_every_snapshot():
+    first = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    second = datetime(2025, 1, 1, 0, 1, tzinfo=timezone.utc)
+    collection = FakeCollection(
+        [
+            {"_id": 5, "id": "btc", "last_updated": first},
+            {"_id": 2, "id": "btc", "last_updated": first},
+            {"_id": 9, "id": "btc", "last_updated": first},
+            {"_id": 3, "id": "btc", "last_updated": second},
+            {"_id": 4, "id": "eth", "last_updated": first},
+            {"_id": 7, "id": "eth", "last_updated": first},
+        ]
+    )
+    assert dedupe_snapshots(collection, batch_size=2) == 3
+    assert sorted(doc["_id"] for doc in collection.documents) == [2, 3, 4]
+    # Deletes are flushed once the batch is full
+    assert collection.deletes == [2, 1]
+
+
+def test_no_duplicates_deletes_nothing():
+    collection = FakeCollection(
+        [
+            {"_id": 1, "id": "btc", "last_updated": 1},
+            {"_id": 2, "id": "eth", "last_updated": 1},
+        ]
+    )
+    assert dedupe_snapshots(collection) == 0
+    assert collection.deletes == []
@@ -0,0 +1,118 @@
+import socket
+import time
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.utils.email import SMTPConnection, send_email
+from app.utils.notifications import FAILURE, NotificationDispatcher
+
+
+class Recorder:
+    """aiosmtpd handler that keeps every message, or rejects them all."""
+
+    def __init__(self, reject: bool = False):
+        self.reject = reject
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject:
+            return "554 Transaction failed"
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    def start(reject=False):
+        handler = Recorder(reject)
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        controllers.append(controller)
+        return handler, SMTPConnection(
+            "127.0.0.1", controller.port, use_tls=False, timeout=5
+        )
+
+    controllers = []
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+def make_dispatcher(connection, **kwargs):
+    return NotificationDispatcher(
+        connection,
+        to_emails=["ops@example.com"],
+        from_email="etl@example.com",
+        **kwargs,
+    )
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_digest_batches_info_and_sends_failures_immediately(smtp):
+    handler, connection = smtp()
+    dispatcher = make_dispatcher(connection, mode="digest", interval=3600)
+
+    for run in range(3):
+        dispatcher.notify(f"Run {run} completed", f"Run {run} body")
+    dispatcher.notify("ETL failed", "Traceback", level=FAILURE)
+    assert wait_for(lambda: len(handler.messages) == 1)
+    assert handler.messages[0]["Subject"] == "ETL failed"
+
+    # Closing flushes the pending digest
+    dispatcher.close()
+    assert [msg["Subject"] for msg in handler.messages] == [
+        "ETL failed",
+        "Digest: 3 notifications",
+    ]
+    digest = handler.messages[1]
+    assert digest["To"] == "ops@example.com"
+    assert digest["From"] == "etl@example.com"
+    body = digest.get_payload()[0].get_payload()
+    assert all(f"Run {run} completed" in body for run in range(3))
+    assert (dispatcher.sent, dispatcher.failed) == (2, 0)
+
+
+def test_rejected_delivery_is_retried_then_counted(smtp):
+    handler, connection = smtp(reject=True)
+    dispatcher = make_dispatcher(connection, mode="immediate", max_retries=2)
+
+    dispatcher.notify("ETL failed", "Traceback", level=FAILURE)
+    dispatcher.close()
+    assert handler.messages == []
+    assert (dispatcher.sent, dispatcher.failed) == (0, 1)
+
+
+def test_unknown_mode_falls_back_to_digest(smtp):
+    _, connection = smtp()
+    assert make_dispatcher(connection, mode="digets").mode == "digest"
+
+
+def test_send_email(smtp):
+    handler, connection = smtp()
+    assert send_email(
+        "Report",
+        "<b>done</b>",
+        ["ops@example.com"],
+        "etl@example.com",
+        is_html=True,
+        connection=connection,
+    )
+    assert handler.messages[0]["Subject"] == "Report"
+    assert handler.messages[0].get_payload()[0].get_content_type() == "text/html"
+
+    rejecting, connection = smtp(reject=True)
+    assert not send_email("Report", "body", ["ops@example.com"], connection=connection)
@@ -0,0 +1,27 @@
+import math
+
+from app.etl.pipeline import format_summary
+from app.etl.transform import empty_results
+
+
+def test_summary_tolerates_missing_names_and_stats():
+    results = empty_results()
+    results["market_cap_analysis"]["total_market_cap"] = None
+    results["market_cap_analysis"]["top_10_market_cap"] = 1234567
+    results["price_analysis"]["avg_price_change_24h"] = math.nan
+    results["top_performers"]["by_market_cap"] = [
+        {"name": "Bitcoin", "market_cap": 3.0},
+        {"name": None, "id": "ethereum", "market_cap": 2.0},
+        {"name": math.nan, "market_cap": 1.0},
+    ]
+    summary = format_summary(results, 3)
+    assert "Total market cap: n/a" in summary
+    assert "Top 10 market cap: 1,234,567" in summary
+    assert "Average 24h price change: n/a%" in summary
+    assert "Top by market cap: Bitcoin, ethereum, unknown" in summary
+
+
+def test_summary_of_empty_results():
+    summary = format_summary(empty_results(), 0)
+    assert "Rows processed: 0" in summary
+    assert summary.endswith("Top by market cap: ")
@@ -0,0 +1,60 @@
+import math
+
+from app.etl.pushdown import aggregate_analysis, analysis_pipeline
+
+
+class FakeCollection:
+    """Returns a canned $facet result document from aggregate()."""
+
+    def __init__(self, result):
+        self.result = result
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter([self.result] if self.result else [])
+
+
+STATS = {
+    "rows": 3,
+    "total_market_cap": 600.0,
+    "mean_market_cap": 200.0,
+    "std_market_cap": 100.0,
+    "median_market_cap": 200.0,
+    "avg_price_change_24h": 1.5,
+    "avg_supply_utilization": float("inf"),
+}
+
+
+def test_records_tolerate_missing_names_and_infinite_utilization():
+    collection = FakeCollection(
+        {
+            "stats": [STATS],
+            "market_cap_largest": [
+                {"name": "Alpha", "market_cap": 300.0},
+                {"market_cap": 200.0},
+            ],
+            "supply_utilization_largest": [
+                {"name": "Alpha", "supply_utilization": float("inf")},
+                {"name": "Beta", "supply_utilization": 0.5},
+            ],
+        }
+    )
+    results, rows = aggregate_analysis(collection, {"last_updated": {"$gte": 0}})
+    assert rows == 3
+    assert collection.pipelines == [analysis_pipeline({"last_updated": {"$gte": 0}})]
+    assert results["top_performers"]["by_market_cap"] == [
+        {"name": "Alpha", "market_cap": 300.0},
+        {"name": None, "market_cap": 200.0},
+    ]
+    assert results["market_cap_analysis"]["top_10_market_cap"] == 500
+    supply = results["supply_analysis"]
+    assert math.isinf(supply["avg_supply_utilization"])
+    assert supply["highest_utilization"][0]["supply_utilization"] == float("inf")
+    assert supply["lowest_utilization"] == []
+
+
+def test_empty_match_returns_empty_results():
+    results, rows = aggregate_analysis(FakeCollection(None), {})
+    assert rows == 0
+    assert results["top_performers"]["by_market_cap"] == []
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.schema import FEATURE_COLUMNS
+from app.ml.data_cleaner import CryptoDataCleanerModel
+from app.ml.registry import ModelRegistry
+
+
+def frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        rng.lognormal(size=(200, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS
+    )
+
+
+def save_model(path, seed):
+    model = CryptoDataCleanerModel()
+    model.fit(frame(seed))
+    model.save_model(path)
+
+
+def touch(path, offset):
+    """Give the artifact a new mtime, as a rewrite in a later second would."""
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + offset))
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loads = []
+    original = CryptoDataCleanerModel.load_model
+
+    def load_model(self, path):
+        loads.append(path)
+        original(self, path)
+
+    monkeypatch.setattr(CryptoDataCleanerModel, "load_model", load_model)
+    return loads
+
+
+def test_unchanged_artifact_is_not_reread(tmp_path, loads):
+    path = tmp_path / "cleaner.joblib"
+    save_model(path, seed=1)
+    registry = ModelRegistry(path)
+    model = registry.get()
+    assert registry.get() is model
+    assert len(loads) == 1
+
+
+def test_same_digest_keeps_the_resident_model(tmp_path, loads):
+    path = tmp_path / "cleaner.joblib"
+    save_model(path, seed=1)
+    registry = ModelRegistry(path)
+    model = registry.get()
+
+    # Rewritten with identical content: mtime changes, the hash does not
+    path.write_bytes(path.read_bytes())
+    touch(path, 10)
+    assert registry.get() is model
+    assert len(loads) == 1
+
+
+def test_different_digest_swaps_the_model(tmp_path, loads):
+    path = tmp_path / "cleaner.joblib"
+    save_model(path, seed=1)
+    registry = ModelRegistry(path)
+    model = registry.get()
+
+    save_model(path, seed=2)
+    touch(path, 10)
+    reloaded = registry.get()
+    assert reloaded is not model
+    assert len(loads) == 2
+    assert registry.get() is reloaded
+
+
+def test_missing_artifact_is_trained_and_saved(tmp_path, loads):
+    path = tmp_path / "models" / "cleaner.joblib"
+    registry = ModelRegistry(path)
+    with pytest.raises(FileNotFoundError):
+        registry.get()
+
+    model = registry.get(training_df=frame(1))
+    assert model.is_fitted and path.exists()
+    assert registry.get() is model
+    assert loads == []
+
+
+def test_corrupt_artifact(tmp_path, loads):
+    path = tmp_path / "cleaner.joblib"
+    save_model(path, seed=1)
+    registry = ModelRegistry(path)
+    model = registry.get()
+
+    # A bad replacement is ignored while a model is resident
+    path.write_bytes(b"not a model")
+    assert registry.get() is model
+
+    # A fresh process has nothing to fall back to but retraining
+    fresh = ModelRegistry(path)
+    with pytest.raises(Exception):
+        fresh.get()
+    retrained = fresh.get(training_df=frame(3))
+    assert retrained.is_fitted
+    assert fresh.get() is retrained
+    assert ModelRegistry(path).get().is_fitted
@@ -0,0 +1,138 @@
+from datetime import datetime
+
+from app.etl.retention import (
+    CURRENT_COLLECTION,
+    CURRENT_ID,
+    ROLLUP_COLLECTIONS,
+    update_current,
+    update_rollups,
+)
+
+
+def _get(doc, path):
+    for key in path.split("."):
+        doc = doc.get(key) if isinstance(doc, dict) else None
+    return doc
+
+
+def _set(doc, path, value):
+    *parents, field = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    doc[field] = value
+
+
+class FakeCollection:
+    """Applies the update operators update_rollups and update_current use."""
+
+    def __init__(self):
+        self.documents = {}
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.documents.get(query["_id"])
+        if doc is None:
+            doc = self.documents[query["_id"]] = {"_id": query["_id"]}
+            for path, value in update.get("$setOnInsert", {}).items():
+                _set(doc, path, value)
+        for path, value in update.get("$inc", {}).items():
+            _set(doc, path, (_get(doc, path) or 0) + value)
+        for op, pick in (("$min", min), ("$max", max)):
+            for path, value in update.get(op, {}).items():
+                current = _get(doc, path)
+                _set(doc, path, value if current is None else pick(current, value))
+        for path, value in update.get("$set", {}).items():
+            _set(doc, path, value)
+
+    def replace_one(self, query, document, upsert=False):
+        self.documents[query["_id"]] = document
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def run(_id, timestamp, total_market_cap, avg_price_change=1.0):
+    return {
+        "_id": _id,
+        "timestamp": timestamp,
+        "market_cap_analysis": {
+            "total_market_cap": total_market_cap,
+            "top_10_market_cap": total_market_cap // 2,
+            "market_cap_distribution": {"mean": 1.0, "median": 1.0, "std": 0.0},
+        },
+        "price_analysis": {"avg_price_change_24h": avg_price_change},
+        "supply_analysis": {"avg_supply_utilization": 0.5},
+    }
+
+
+def store(db, results):
+    update_rollups(results, db)
+    update_current(results, db)
+
+
+def test_runs_in_the_same_hour_merge_into_one_bucket():
+    db = FakeDatabase()
+    store(db, run("a", datetime(2025, 3, 10, 12, 5), 300))
+    store(db, run("b", datetime(2025, 3, 10, 12, 35), 100, float("nan")))
+
+    hourly = db[ROLLUP_COLLECTIONS["hourly"]].documents
+    assert list(hourly) == [datetime(2025, 3, 10, 12)]
+    bucket = hourly[datetime(2025, 3, 10, 12)]
+    assert bucket["bucket"] == datetime(2025, 3, 10, 12)
+    assert bucket["runs"] == 2
+    assert bucket["first_run"] == datetime(2025, 3, 10, 12, 5)
+    assert bucket["last_run"] == datetime(2025, 3, 10, 12, 35)
+    assert bucket["total_market_cap"] == {
+        "count": 2,
+        "sum": 400.0,
+        "min": 100.0,
+        "max": 300.0,
+        "last": 100.0,
+    }
+    # The NaN of the second run is left out of the metric
+    assert bucket["avg_price_change_24h"] == {
+        "count": 1,
+        "sum": 1.0,
+        "min": 1.0,
+        "max": 1.0,
+        "last": 1.0,
+    }
+
+    daily = db[ROLLUP_COLLECTIONS["daily"]].documents
+    assert list(daily) == [datetime(2025, 3, 10)]
+    assert daily[datetime(2025, 3, 10)]["total_market_cap"]["sum"] == 400.0
+
+    current = db[CURRENT_COLLECTION].documents
+    assert list(current) == [CURRENT_ID]
+    assert current[CURRENT_ID]["result_id"] == "b"
+    assert current[CURRENT_ID]["timestamp"] == datetime(2025, 3, 10, 12, 35)
+
+
+def test_runs_across_a_day_boundary_start_new_buckets():
+    db = FakeDatabase()
+    store(db, run("a", datetime(2025, 3, 10, 23, 50), 300))
+    store(db, run("b", datetime(2025, 3, 11, 0, 10), 200))
+    # A late run lands in the previous buckets; the pointer follows the last
+    # stored run
+    store(db, run("c", datetime(2025, 3, 10, 23, 40), 500))
+
+    hourly = db[ROLLUP_COLLECTIONS["hourly"]].documents
+    assert sorted(hourly) == [datetime(2025, 3, 10, 23), datetime(2025, 3, 11, 0)]
+    late = hourly[datetime(2025, 3, 10, 23)]
+    assert late["runs"] == 2
+    assert late["first_run"] == datetime(2025, 3, 10, 23, 40)
+    assert late["last_run"] == datetime(2025, 3, 10, 23, 50)
+    assert late["total_market_cap"]["max"] == 500.0
+    assert hourly[datetime(2025, 3, 11, 0)]["runs"] == 1
+
+    daily = db[ROLLUP_COLLECTIONS["daily"]].documents
+    assert sorted(daily) == [datetime(2025, 3, 10), datetime(2025, 3, 11)]
+    assert daily[datetime(2025, 3, 10)]["total_market_cap"]["sum"] == 800.0
+    assert daily[datetime(2025, 3, 11)]["total_market_cap"]["sum"] == 200.0
+
+    current = db[CURRENT_COLLECTION].documents[CURRENT_ID]
+    assert current["_id"] == CURRENT_ID
+    assert current["result_id"] == "c"
+    assert current["timestamp"] == datetime(2025, 3, 10, 23, 40)
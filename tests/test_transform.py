@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.etl.transform import rank_metrics
+
+
+def reference(df, metric, k, largest):
+    """nlargest/nsmallest over the non-missing rows, as rank_metrics records."""
+    # Unlike rank_metrics, nlargest pads with NaN rows when it runs short
+    valid = df.dropna(subset=[metric])
+    if k < len(valid):
+        ranked = valid.nlargest(k, metric) if largest else valid.nsmallest(k, metric)
+    else:
+        # nlargest falls back to an unstable sort here
+        ranked = valid.sort_values(metric, ascending=not largest, kind="stable")
+    return [
+        {"name": name, metric: float(value)}
+        for name, value in zip(ranked["name"], ranked[metric])
+    ]
+
+
+def assert_parity(df, k_largest, k_smallest):
+    rankings = rank_metrics(df, {"value": (k_largest, k_smallest)})["value"]
+    assert rankings["largest"] == reference(df, "value", k_largest, True)
+    assert rankings["smallest"] == reference(df, "value", k_smallest, False)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_nlargest_with_ties_nan_and_inf(seed):
+    rng = np.random.default_rng(seed)
+    rows = int(rng.integers(1, 60))
+    # Few distinct values, so ties are common
+    pool = np.array([np.nan, np.inf, -np.inf, 0.0, -0.0, 1.0, -1.0, 2.5, 1e300])
+    # Every other case is mostly missing, so few candidates are valid
+    nan_rate = 0.8 if seed % 2 else 0.2
+    p = np.r_[nan_rate, np.full(len(pool) - 1, (1 - nan_rate) / (len(pool) - 1))]
+    values = rng.choice(pool, rows, p=p)
+    df = pd.DataFrame({"name": [f"c{i}" for i in range(rows)], "value": values})
+    for k in (1, 3, rows // 2, rows, rows + 5):
+        assert_parity(df, k, k)
+
+
+def test_single_inf_among_nans():
+    df = pd.DataFrame({"name": ["c0", "c1", "c2"], "value": [np.nan, -np.inf, np.nan]})
+    for k in (1, 2):
+        rankings = rank_metrics(df, {"value": (k, k)})["value"]
+        assert rankings["largest"] == [{"name": "c1", "value": -np.inf}]
+        assert rankings["smallest"] == [{"name": "c1", "value": -np.inf}]
+        assert_parity(df, k, k)
+
+
+def test_derived_supply_utilization_and_empty_frame():
+    df = pd.DataFrame(
+        {
+            "name": ["a", "b", "c", "d"],
+            "circulating_supply": [50.0, 10.0, np.nan, 5.0],
+            "total_supply": [100.0, 0.0, 10.0, 0.0],
+        }
+    )
+    rankings = rank_metrics(df, {"supply_utilization": (2, 1)})
+    assert rankings["supply_utilization"]["largest"] == [
+        {"name": "b", "supply_utilization": np.inf},
+        {"name": "d", "supply_utilization": np.inf},
+    ]
+    assert rankings["supply_utilization"]["smallest"] == [
+        {"name": "a", "supply_utilization": 0.5}
+    ]
+    assert rank_metrics(df.iloc[:0], {"market_cap": (3, 3)}) == {
+        "market_cap": {"largest": [], "smallest": []}
+    }
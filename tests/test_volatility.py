@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.etl.volatility import (
+    build_price_panel,
+    cumulative_squares,
+    drawdowns,
+    forward_fill,
+    log_returns,
+    panel_metrics,
+    rolling_volatility,
+    summarize_panel,
+)
+
+START = np.datetime64("2025-01-01T00:00", "ns")
+STEP = np.timedelta64(3600, "s")
+PERIODS_PER_YEAR = 365 * 24
+
+
+@pytest.fixture
+def observations():
+    """Hourly random walks with gaps and several observations per hour."""
+    rng = np.random.default_rng(0)
+    ids, times, prices = [], [], []
+    for coin in range(20):
+        walk = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+        for cell in range(200):
+            if rng.random() < 0.1:
+                continue
+            for extra in range(rng.integers(1, 3)):
+                ids.append(f"c{coin}")
+                offset = np.timedelta64(int(rng.integers(0, 3600)), "s")
+                times.append(START + cell * STEP + offset)
+                prices.append(walk[cell] * (1 + 0.001 * extra))
+    return np.array(ids, dtype=object), np.array(times), np.array(prices)
+
+
+@pytest.fixture
+def panel(observations):
+    return build_price_panel(*observations, START, STEP, 200)
+
+
+def test_price_panel_matches_pandas_pivot(observations, panel):
+    ids, times, prices = observations
+    coin_ids, built = panel
+    df = pd.DataFrame({"id": ids, "time": times, "price": prices})
+    df["cell"] = (df["time"] - START) // STEP
+    reference = (
+        df.sort_values("time", kind="stable")
+        .groupby(["id", "cell"])["price"]
+        .last()
+        .unstack()
+        .reindex(index=coin_ids, columns=range(200))
+    )
+    np.testing.assert_allclose(built, reference.to_numpy())
+    np.testing.assert_allclose(forward_fill(built), reference.ffill(axis=1).to_numpy())
+
+
+def test_rolling_kernels_match_pandas(panel):
+    _, built = panel
+    prices = forward_fill(built)
+    returns = pd.DataFrame(np.log(prices)).diff(axis=1).iloc[:, 1:]
+    window = 24
+
+    variance = (returns**2).T.rolling(window, min_periods=window // 2).mean().T
+    expected = np.sqrt(variance.to_numpy()[:, window - 1 :] * PERIODS_PER_YEAR)
+    volatility = rolling_volatility(
+        *cumulative_squares(log_returns(prices)), window, PERIODS_PER_YEAR
+    )
+    np.testing.assert_allclose(volatility, expected)
+
+    expected_drawdowns = prices / pd.DataFrame(prices).cummax(axis=1).to_numpy() - 1
+    np.testing.assert_allclose(drawdowns(prices), expected_drawdowns)
+
+    metrics = panel_metrics(built, 3600)
+    np.testing.assert_allclose(metrics["volatility_24h"], volatility[:, -1])
+    np.testing.assert_allclose(
+        metrics["momentum_24h"], np.log(prices[:, -1] / prices[:, -1 - window])
+    )
+    np.testing.assert_allclose(
+        metrics["max_drawdown"], np.nanmin(expected_drawdowns, axis=1)
+    )
+
+
+def test_sparse_windows_are_nan():
+    returns = np.full((1, 10), np.nan)
+    returns[0, :4] = 0.01
+    volatility = rolling_volatility(*cumulative_squares(returns), 8, 1.0)
+    # Windows need half of their returns observed
+    assert not np.isnan(volatility[0, 0])
+    assert np.isnan(volatility[0, -1])
+
+
+def test_summary_leaves_out_stale_coins(panel):
+    coin_ids, built = panel
+    built = built.copy()
+    built[0, -5:] = np.nan
+    summary = summarize_panel(coin_ids, built, 3600, "1h")
+    assert summary["coins"] == len(coin_ids) - 1
+    ranked = summary["windows"]["24h"]["most_volatile"]
+    assert len(ranked) == 5 and coin_ids[0] not in [r["name"] for r in ranked]